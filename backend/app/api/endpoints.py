@@ -1,12 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+import json
+import time
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from app.database import get_db
-from app.models import Repository
-from app.schemas.base import RepositoryCreate, RepositoryResponse, SignalResponse, OverviewResponse, ContributorsHealthResponse
-from app.services.data_collector import DataCollector
+from app.models import Repository, SyncCheckpoint, SyncJob, SyncRun, SyncWatermark
+from app.schemas.base import RepositoryCreate, RepositoryResponse, SyncRunResponse, SignalResponse, OverviewResponse, ContributorsHealthResponse
+from app.services.github_client import GitHubAPIError, GitHubClient
+from app.services.sync_jobs import enqueue_sync, queue_estimates
 from app.services.signal_engine import SignalEngine
-from typing import List
+from typing import List, Optional
 
 import logging
 
@@ -28,32 +34,65 @@ def clamp_days(days: int, default: int = 90, lo: int = 1, hi: int = 365) -> int:
     return d
 
 
+def with_queue_status(db: Session, repos) -> List[RepositoryResponse]:
+    """Repository responses with queue position / ETA of their pending sync."""
+    estimates = queue_estimates(db)
+    responses = []
+    for repo in repos:
+        response = RepositoryResponse.model_validate(repo)
+        estimate = estimates.get(repo.id)
+        if estimate is not None:
+            response.queue_position = estimate["queue_position"]
+            response.sync_eta_seconds = estimate["eta_seconds"]
+        responses.append(response)
+    return responses
+
+
 @router.post("/repositories/sync", response_model=RepositoryResponse)
-async def sync_repository(
-    repo_in: RepositoryCreate, 
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
-):
-    """Trigger a sync for a repository"""
-    collector = DataCollector(db)
-    
-    # For MVP we sync immediately to show results
+async def sync_repository(repo_in: RepositoryCreate, db: Session = Depends(get_db)):
+    """Queue an interactive sync for a repository. The worker pool
+    (`app.worker`) runs it; progress shows up on the repository's
+    sync_status/sync_item_count, queue_position and sync_eta_seconds.
+
+    The repository is looked up on GitHub first, so a name that doesn't
+    exist (404) or can't be read (400) is rejected instead of queued."""
     try:
-        # Phase 1: Init Sync (Fast)
-        repo = await collector.init_sync(repo_in.owner, repo_in.name)
-        
-        # Phase 2: Background Processing (Slow)
-        # We need to pass a new instance of Collector or a static method to avoid DB session issues
-        # But for simplicity, we rely on execute_sync creating its own session.
-        # We pass the method from the current instance, but the method implementation 
-        # creates a NEW session, so it's safe.
-        background_tasks.add_task(collector.execute_sync, repo.id, repo_in.owner, repo_in.name)
-        
-        return repo
+        await GitHubClient().get_repository(repo_in.owner, repo_in.name)
+    except GitHubAPIError as e:
+        if e.status_code == 404:
+            raise HTTPException(
+                status_code=404, detail=f"Repository '{repo_in.owner}/{repo_in.name}' not found on GitHub"
+            )
+        raise HTTPException(status_code=400, detail=str(e))
+
+    def enqueue():
+        repo = enqueue_sync(
+            db, repo_in.owner, repo_in.name, repo_in.ingest_mode, full_resync=repo_in.full_resync
+        )
+        return with_queue_status(db, [repo])[0]
+
+    try:
+        return await run_in_threadpool(enqueue)
     except Exception as e:
-        logger.error(f"Sync failed: {e}")
+        logger.error(f"Sync enqueue failed: {e}")
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.get("/repositories/{repo_id}/sync-runs", response_model=List[SyncRunResponse])
+def get_sync_runs(repo_id: int, limit: int = 20, db: Session = Depends(get_db)):
+    """Performance telemetry of the repository's latest syncs, newest first:
+    wall time, GitHub calls/bytes/rate-limit waits, write time and rows, per
+    phase and in total."""
+    if not db.query(Repository.id).filter(Repository.id == repo_id).first():
+        raise HTTPException(status_code=404, detail="Repository not found")
+    limit = max(1, min(limit, 200))
+    return (
+        db.query(SyncRun)
+        .filter(SyncRun.repository_id == repo_id)
+        .order_by(SyncRun.started_at.desc(), SyncRun.id.desc())
+        .limit(limit)
+        .all()
+    )
+
 @router.get("/repositories/{repo_id}/overview", response_model=OverviewResponse)
 def get_repo_overview(repo_id: int, db: Session = Depends(get_db)):
     """Get high-level health overview for a repository"""
@@ -75,7 +114,14 @@ def delete_repository(repo_id: int, db: Session = Depends(get_db)):
     repo = db.query(Repository).get(repo_id)
     if not repo:
         raise HTTPException(status_code=404, detail="Repository not found")
-        
+
+    # Sync state is keyed by repository id, which a re-added repository can
+    # reuse; left behind, it would make that repository's first sync resume
+    # from another repository's watermarks or checkpoints (or list its sync
+    # runs). Deleting its jobs also stops a running sync: the worker loses
+    # the lease and cancels it.
+    for model in (SyncWatermark, SyncCheckpoint, SyncJob, SyncRun):
+        db.query(model).filter(model.repository_id == repo_id).delete(synchronize_session=False)
     db.delete(repo)
     db.commit()
     return None
@@ -134,7 +180,135 @@ def get_newcomer_funnel(repo_id: int, days: int = 365, db: Session = Depends(get
 @router.get("/repositories", response_model=List[RepositoryResponse])
 def get_repositories(db: Session = Depends(get_db)):
     """List all tracked repositories"""
-    return db.query(Repository).all()
+    return with_queue_status(db, db.query(Repository).all())
+
+@router.get("/github/cache-stats")
+def get_github_cache_stats():
+    """Process-wide hit/miss counters for the GitHub conditional-request cache."""
+    from app.services.github_cache import get_response_cache
+    cache = get_response_cache()
+    if cache is None:
+        return {"enabled": False}
+    return cache.stats()
+
+@router.get("/contributor-cache/stats")
+def get_contributor_cache_stats():
+    """Size, hit rate, evictions and expirations of the process-wide
+    contributor cache shared by all syncs."""
+    from app.services.contributor_cache import get_contributor_cache
+    return get_contributor_cache().stats()
+
+@router.get("/sync/queue")
+def get_sync_queue(db: Session = Depends(get_db)):
+    """Queued and running sync jobs with queue position and ETA, and the
+    global GitHub request scheduler's per-repository slot usage."""
+    from app.services.sync_scheduler import scheduler_stats
+    jobs = [
+        {"repository_id": repo_id, **estimate}
+        for repo_id, estimate in queue_estimates(db).items()
+    ]
+    jobs.sort(key=lambda j: (j["queue_position"] or 0, j["eta_seconds"]))
+    return {"jobs": jobs, "scheduler": scheduler_stats()}
+
+@router.get("/sync/pipelines")
+def get_sync_pipelines():
+    """Per-stage throughput and queue depth of running sync phase pipelines
+    in this process, and of the most recently finished ones."""
+    from app.services.sync_pipeline import pipeline_snapshots
+    return pipeline_snapshots()
+
+@router.post("/webhooks/github", status_code=202)
+async def receive_github_webhook(request: Request):
+    """GitHub webhook receiver. Verifies X-Hub-Signature-256 against
+    GITHUB_WEBHOOK_SECRET and queues the delivery; it is applied to tracked
+    repositories within about WEBHOOK_FLUSH_SECONDS (see app.services.webhooks)."""
+    from app.config import get_settings
+    from app.services.webhooks import SUPPORTED_EVENTS, get_webhook_applier, verify_signature
+    secret = get_settings().GITHUB_WEBHOOK_SECRET
+    if not secret:
+        raise HTTPException(status_code=503, detail="Webhooks are not configured")
+    body = await request.body()
+    if not verify_signature(secret, body, request.headers.get("X-Hub-Signature-256")):
+        raise HTTPException(status_code=401, detail="Invalid signature")
+    event = request.headers.get("X-GitHub-Event", "")
+    if event == "ping":
+        return {"status": "pong"}
+    if event not in SUPPORTED_EVENTS:
+        return {"status": "ignored", "event": event}
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Payload is not valid JSON")
+    if not get_webhook_applier().submit(event, request.headers.get("X-GitHub-Delivery"), payload):
+        # GitHub marks the delivery failed; it can be redelivered later.
+        raise HTTPException(status_code=503, detail="Webhook queue is full")
+    return {"status": "queued"}
+
+@router.get("/webhooks/stats")
+def get_webhook_stats():
+    """Webhook deliveries received, queued, applied, ignored and failed, and
+    the longest delay from receipt to being applied."""
+    from app.services.webhooks import get_webhook_applier
+    return get_webhook_applier().stats()
+
+@router.get("/events")
+async def stream_events(request: Request, repo_id: Optional[int] = None):
+    """Server-sent events: sync_status, sync_progress and data_changed for
+    all repositories (or just `repo_id`), so dashboards refetch only when
+    something changed (see app.services.sync_events). A reconnecting
+    EventSource sends Last-Event-ID and is sent the events it missed, or a
+    `resync` event if they are gone."""
+    from app.config import get_settings
+    from app.services.sync_events import format_sse, get_event_bus, resync_message
+    settings = get_settings()
+    last_event_id = request.headers.get("last-event-id")
+
+    async def stream():
+        bus = get_event_bus()
+        subscription = bus.subscribe(repo_id)
+        start_id = bus.last_id
+        missed = bus.replay(last_event_id, repo_id) if last_event_id else []
+        # Open streams hold up a graceful shutdown, so each one ends after
+        # EVENTS_STREAM_MAX_SECONDS; EventSource reconnects after `retry` ms.
+        deadline = time.monotonic() + settings.EVENTS_STREAM_MAX_SECONDS
+        try:
+            yield "retry: 1000\n\n"
+            for message in missed if missed is not None else [resync_message()]:
+                yield format_sse(message)
+            # Where this stream starts, so the next reconnect resumes here
+            # even if no event arrives before it.
+            yield f"id: {start_id}\n\n"
+            while not await request.is_disconnected():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                message = await subscription.next(timeout=min(settings.EVENTS_KEEPALIVE_SECONDS, remaining))
+                if subscription.overflowed:
+                    subscription.overflowed = False
+                    yield format_sse(resync_message())
+                # A comment line keeps proxies from closing an idle stream.
+                yield format_sse(message) if message else ": keepalive\n\n"
+        finally:
+            bus.unsubscribe(subscription)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
+
+@router.get("/events/stats")
+def get_event_stats():
+    """Open event streams and events published, throttled and dropped."""
+    from app.services.sync_events import get_event_bus
+    return get_event_bus().stats()
+
+@router.get("/github/rate-limit")
+def get_github_rate_limit():
+    """Current GitHub budget per token and resource (core/search/graphql),
+    whether each token is parked, requests routed to it, and how long new
+    requests would wait for a permit."""
+    from app.services.rate_limit import governor_snapshots
+    return {"tokens": governor_snapshots()}
 
 @router.get("/health/contributors", response_model=ContributorsHealthResponse)
 def get_contributors_health_by_query(repo: str, db: Session = Depends(get_db)):
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import List, Optional
 from functools import lru_cache
 
 class Settings(BaseSettings):
@@ -8,9 +8,91 @@ class Settings(BaseSettings):
     
     # GitHub Config
     GITHUB_TOKEN: str
+    # Optional extra tokens (comma-separated). Requests are routed to whichever
+    # token has the most remaining budget.
+    GITHUB_TOKENS: str = ""
+    # Override to point the client at a local stand-in server for testing.
+    GITHUB_API_URL: str = "https://api.github.com"
+    # Max concurrent GitHub requests per sync; also sizes the HTTP connection pool.
+    GITHUB_MAX_CONCURRENCY: int = 10
+    # Upper bound on open connections across all concurrent syncs.
+    GITHUB_MAX_CONNECTIONS: int = 100
+    # Max concurrent GitHub requests across all syncs in the process, shared
+    # fairly between repositories (see app.services.sync_scheduler)
+    GITHUB_GLOBAL_MAX_CONCURRENCY: int = 16
+    # Conditional-request (ETag) cache for GitHub GETs
+    GITHUB_CACHE_ENABLED: bool = True
+    GITHUB_CACHE_PATH: str = "./github_cache.db"
+    GITHUB_CACHE_MAX_ENTRIES: int = 50000
+    # Record/replay of GitHub traffic: "off", "record" or "replay"
+    GITHUB_CASSETTE_MODE: str = "off"
+    GITHUB_CASSETTE_PATH: str = "./github_cassette.jsonl.gz"
+    GITHUB_CASSETTE_LATENCY_MS: int = 0
     
     # Database
     DATABASE_URL: str = "sqlite:///./sql_app.db"
+    # Rows buffered per batched upsert during sync
+    SYNC_BATCH_SIZE: int = 500
+    # Max entries per github_id -> row id map preloaded at sync start
+    SYNC_IDENTITY_MAP_MAX: int = 200000
+    # Sync phase pipeline: items buffered between the fetch, transform and
+    # write stages (fetch uses GITHUB_MAX_CONCURRENCY workers, transform and
+    # write one each)
+    SYNC_PIPELINE_QUEUE_SIZE: int = 200
+    # Process-wide github_id -> contributor cache shared by all syncs
+    CONTRIBUTOR_CACHE_MAX_ENTRIES: int = 100000
+    CONTRIBUTOR_CACHE_TTL_SECONDS: int = 6 * 3600
+    # Sync job queue: run the worker pool inside the API process, or set to
+    # False and run `python -m app.worker` separately.
+    SYNC_WORKER_EMBEDDED: bool = True
+    # Jobs run in parallel per worker process
+    SYNC_WORKER_CONCURRENCY: int = 2
+    SYNC_WORKER_POLL_SECONDS: float = 2.0
+    # A running job's lease is renewed every third of this; an expired lease
+    # (crashed worker) makes the job claimable again.
+    SYNC_JOB_LEASE_SECONDS: int = 900
+    SYNC_JOB_MAX_ATTEMPTS: int = 3
+    # Retry delay doubles per attempt from this base, capped at one hour.
+    SYNC_JOB_RETRY_BASE_SECONDS: int = 30
+    # Periodic background re-sync of tracked repositories (incremental). The
+    # interval scales inversely with activity: a repository with
+    # AUTO_REFRESH_REFERENCE_EVENTS_PER_DAY events/day is refreshed every
+    # AUTO_REFRESH_INTERVAL_SECONDS, busier ones more often, within the
+    # min/max bounds, jittered by +/- AUTO_REFRESH_JITTER.
+    AUTO_REFRESH_ENABLED: bool = True
+    AUTO_REFRESH_INTERVAL_SECONDS: int = 6 * 3600
+    AUTO_REFRESH_MIN_SECONDS: int = 30 * 60
+    AUTO_REFRESH_MAX_SECONDS: int = 24 * 3600
+    AUTO_REFRESH_REFERENCE_EVENTS_PER_DAY: float = 10.0
+    AUTO_REFRESH_JITTER: float = 0.1
+    AUTO_REFRESH_POLL_SECONDS: int = 60
+    # GitHub webhooks (POST /api/webhooks/github): shared secret for the
+    # X-Hub-Signature-256 check; the endpoint is disabled while unset.
+    GITHUB_WEBHOOK_SECRET: Optional[str] = None
+    # Deliveries are queued in memory and applied in batches of up to
+    # WEBHOOK_BATCH_SIZE, at least every WEBHOOK_FLUSH_SECONDS.
+    WEBHOOK_BATCH_SIZE: int = 200
+    WEBHOOK_FLUSH_SECONDS: float = 1.0
+    WEBHOOK_QUEUE_MAX: int = 10000
+    # Server-sent events (GET /api/events): per-stream queue length, keepalive
+    # comment interval, and minimum spacing of progress / data-changed events
+    # per repository. Streams are closed after EVENTS_STREAM_MAX_SECONDS (the
+    # browser reconnects), which also bounds how long a shutdown waits on them.
+    EVENTS_QUEUE_SIZE: int = 100
+    EVENTS_KEEPALIVE_SECONDS: int = 15
+    EVENTS_STREAM_MAX_SECONDS: int = 60
+    EVENTS_PROGRESS_MIN_SECONDS: float = 0.5
+    EVENTS_DATA_CHANGED_MIN_SECONDS: float = 5.0
+    # Events kept (and still published for this long after the last stream
+    # closed) so a reconnecting client gets what it missed via Last-Event-ID.
+    EVENTS_REPLAY_SIZE: int = 500
+    EVENTS_REPLAY_SECONDS: float = 30.0
+    # With SYNC_WORKER_EMBEDDED off, the API polls repository rows this often
+    # (while streams are open) to publish the separate worker's progress.
+    EVENTS_WATCH_POLL_SECONDS: float = 1.0
+    # Per-sync telemetry (GET /api/repositories/{id}/sync-runs): runs kept
+    # per repository, oldest pruned first.
+    SYNC_RUNS_KEEP: int = 200
     
     # AI Config
     GEMINI_API_KEY: Optional[str] = None
@@ -23,6 +105,12 @@ class Settings(BaseSettings):
     class Config:
         env_file = ".env"
 
+    @property
+    def github_tokens(self) -> List[str]:
+        """GITHUB_TOKEN followed by any GITHUB_TOKENS, de-duplicated, order kept."""
+        tokens = [self.GITHUB_TOKEN] + self.GITHUB_TOKENS.split(",")
+        return list(dict.fromkeys(t.strip() for t in tokens if t and t.strip()))
+
 @lru_cache()
 def get_settings():
     return Settings()
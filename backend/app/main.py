@@ -2,8 +2,15 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api import endpoints
-from app.database import engine, Base
+from app.database import engine, Base, SessionLocal
 from app.migrations import run_additive_migrations
+from app.services.github_client import close_http_client
+from app.services.github_cache import close_response_cache
+from app.services.contributor_cache import warm_contributor_cache
+from app.worker import start_embedded_worker, stop_embedded_worker
+from app.services.webhooks import start_webhook_applier, stop_webhook_applier
+from app.services.sync_events import start_repository_watch, stop_repository_watch
+from app.services.github_cassette import close_cassette
 from sqlalchemy import text
 from app.config import get_settings
 
@@ -16,8 +23,19 @@ async def lifespan(app: FastAPI):
 
     Runs once before the app begins serving requests:
     - create_all: add any brand-new tables (does NOT alter existing ones).
-    - run_additive_migrations: ALTER existing tables to add missing columns.
+    - run_additive_migrations: ALTER existing tables to add missing columns
+      and unique indexes.
     - PRAGMA journal_mode=WAL: enable WAL for better read/write concurrency.
+    - warm_contributor_cache: preload the process-wide contributor cache.
+    - start_embedded_worker: run queued sync jobs in this process, unless
+      SYNC_WORKER_EMBEDDED is off (then run `python -m app.worker`).
+    - start_webhook_applier: apply queued GitHub webhook deliveries in batches.
+    - start_repository_watch: with a separate worker process, poll repository
+      rows to feed sync progress to the /events stream.
+
+    On shutdown, applies webhook deliveries still queued, hands running sync
+    jobs back to the queue and closes the shared GitHub HTTP connection pool,
+    the conditional-request cache and any recording cassette.
     """
     # Create tables (new tables only; existing tables are not ALTERed here).
     Base.metadata.create_all(bind=engine)
@@ -33,6 +51,19 @@ async def lifespan(app: FastAPI):
         connection.commit()
     print("[OK] Database configured with WAL Mode")
 
+    # Syncs resolve contributors through a shared cache; warm it up front.
+    with SessionLocal() as db:
+        warm_contributor_cache(db)
+
+    # Durable sync queue: jobs left by a crashed process are reclaimed once
+    # their lease expires.
+    start_embedded_worker()
+    # Webhook deliveries are queued by the endpoint and applied here.
+    start_webhook_applier()
+    # Syncs in this process publish to the event stream directly; a separate
+    # worker's progress is picked up from the database.
+    start_repository_watch()
+
     print("\n" + "=" * 50)
     print("REGISTERED ROUTES:")
     for route in app.routes:
@@ -42,7 +73,13 @@ async def lifespan(app: FastAPI):
 
     yield
 
-    # (No explicit shutdown work needed.)
+    await stop_repository_watch()
+    await stop_webhook_applier()
+    await stop_embedded_worker()
+    # Release pooled keep-alive connections to api.github.com.
+    await close_http_client()
+    close_response_cache()
+    close_cassette()
 
 
 app = FastAPI(
@@ -8,7 +8,9 @@ via `PRAGMA table_info` and runs `ALTER TABLE ... ADD COLUMN` for any model
 column that is missing in the live database.
 
 Only additive, nullable (or defaulted) columns are added here — this intentionally
-avoids destructive operations and keeps first-deploy safe.
+avoids destructive operations and keeps first-deploy safe. Unique indexes
+declared on existing tables are created too; rows that would violate one
+(duplicates written before the index existed) are collapsed to the newest.
 """
 from sqlalchemy import inspect, text
 from app.database import engine, Base
@@ -74,6 +76,36 @@ def run_additive_migrations() -> None:
                 except Exception as exc:  # noqa: BLE001
                     print(f"[migration] skipped {table_name}.{column.name}: {exc}")
 
+    _create_unique_indexes(inspector, existing_tables)
+
+
+def _create_unique_indexes(inspector, existing_tables) -> None:
+    """Create unique indexes missing from existing tables, after deleting
+    duplicate rows (keeping the highest id). Rows with a NULL in the indexed
+    columns never conflict, so they are left alone."""
+    for table_name, table in Base.metadata.tables.items():
+        if table_name not in existing_tables:
+            continue
+        live_indexes = {ix["name"] for ix in inspector.get_indexes(table_name)}
+        for index in table.indexes:
+            if not index.unique or index.name in live_indexes:
+                continue
+            cols = [f'"{c.name}"' for c in index.columns]
+            not_null = " AND ".join(f"{c} IS NOT NULL" for c in cols)
+            try:
+                with engine.begin() as conn:
+                    removed = 0
+                    if "id" in table.c:
+                        removed = conn.execute(text(
+                            f'DELETE FROM "{table_name}" WHERE {not_null} AND id NOT IN '
+                            f'(SELECT MAX(id) FROM "{table_name}" WHERE {not_null} '
+                            f'GROUP BY {", ".join(cols)})'
+                        )).rowcount
+                    index.create(conn)
+                print(f"[migration] +index {index.name} ({removed} duplicate rows removed)")
+            except Exception as exc:  # noqa: BLE001
+                print(f"[migration] skipped index {index.name}: {exc}")
+
 
 def col_type_label(column) -> str:
     return column.type.compile(dialect=engine.dialect)
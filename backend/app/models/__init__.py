@@ -23,6 +23,20 @@ class Repository(Base):
     sync_status = Column(String, default="completed") # queued, syncing, completed, failed
     sync_item_count = Column(Integer, default=0)
     sync_total_items = Column(Integer, default=0)
+    # Last sync's change detection: items skipped as unchanged vs. reprocessed
+    sync_skipped_items = Column(Integer, default=0)
+    sync_refreshed_items = Column(Integer, default=0)
+    # Phase the running sync is on (prs, issues, commits, finalize) and the
+    # last page it committed there
+    sync_phase = Column(String, nullable=True)
+    sync_page = Column(Integer, nullable=True)
+    # When the auto-refresher next queues a background sync; cleared when a
+    # sync starts and rescheduled from its activity rate
+    next_refresh_at = Column(DateTime, nullable=True)
+
+    # Ingestion backend: "rest" (per-item child fetches), "graphql" (bulk pages)
+    # or "stream" (REST with one repo-wide comment listing joined by issue number)
+    ingest_mode = Column(String, default="rest")
     
     # Relationships
     pull_requests = relationship("PullRequest", back_populates="repository")
@@ -166,6 +180,9 @@ class ContributionEvent(Base):
     __table_args__ = (
         Index("ix_event_repo_time", "repository_id", "event_at"),
         Index("ix_event_repo_contributor", "repository_id", "contributor_id"),
+        # One row per action; syncs upsert against this key.
+        Index("ux_event_identity", "repository_id", "contributor_id", "event_type",
+              "source_id", unique=True),
     )
 
 class Review(Base):
@@ -186,6 +203,129 @@ class Review(Base):
     repository = relationship("Repository")
     reviewer = relationship("Contributor")
 
+class SyncWatermark(Base):
+    """
+    Newest GitHub timestamp fully processed per repository and sync phase
+    (prs, issues, comments, commits). Incremental syncs list only what
+    changed since the watermark (less a small overlap).
+    """
+    __tablename__ = "sync_watermarks"
+
+    id = Column(Integer, primary_key=True, index=True)
+    repository_id = Column(Integer, ForeignKey("repositories.id"), index=True)
+    phase = Column(String, nullable=False)
+    high_water = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ux_watermark_repo_phase", "repository_id", "phase", unique=True),
+    )
+
+class SyncCheckpoint(Base):
+    """
+    Progress of one sync phase (prs, issues, commits) for a repository,
+    committed after every page. A retried or restarted sync resumes the
+    phase from `cursor` (next page URL for REST, endCursor for GraphQL), or
+    skips it when `done`. Cleared once the sync completes.
+    """
+    __tablename__ = "sync_checkpoints"
+
+    id = Column(Integer, primary_key=True, index=True)
+    repository_id = Column(Integer, ForeignKey("repositories.id"), index=True)
+    phase = Column(String, nullable=False)
+    # Ingest mode (plus ":full" for full resyncs) the cursor belongs to
+    mode = Column(String, nullable=False)
+    cursor = Column(Text, nullable=True)
+    page = Column(Integer, default=0)
+    items = Column(Integer, default=0)
+    # Newest timestamp processed so far; becomes the watermark when done
+    high_water = Column(DateTime, nullable=True)
+    failed_items = Column(Integer, default=0)
+    done = Column(Boolean, default=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ux_checkpoint_repo_phase", "repository_id", "phase", unique=True),
+    )
+
+class SyncJob(Base):
+    """
+    Durable sync request, run by the worker pool (`app.worker`). A worker
+    claims a queued job by taking a lease and renews it while syncing; a job
+    whose lease expired (worker crash/restart) is claimed again. Failures are
+    retried with exponential backoff up to `max_attempts`. Due jobs are
+    claimed by priority, then in `run_after` order.
+    """
+    __tablename__ = "sync_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    repository_id = Column(Integer, ForeignKey("repositories.id"), index=True)
+    owner = Column(String, nullable=False)
+    name = Column(String, nullable=False)
+    ingest_mode = Column(String, nullable=True)
+    full_resync = Column(Boolean, default=False)
+    # "interactive" (user request) or "background" (refresh); interactive
+    # jobs are claimed first and weigh more in the request scheduler.
+    priority = Column(String, default="interactive")
+
+    status = Column(String, default="queued")  # queued, running, succeeded, failed
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    run_after = Column(DateTime, default=datetime.utcnow)
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+    repository = relationship("Repository")
+
+    __table_args__ = (
+        Index("ix_sync_job_status_run_after", "status", "run_after"),
+    )
+
+class SyncRun(Base):
+    """
+    Telemetry of one sync run (init_sync + execute_sync): where the time
+    went and what it cost. Columns hold run totals; `phases` holds the same
+    counters per phase (init, prs, issues, commits, finalize) as JSON.
+    """
+    __tablename__ = "sync_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    repository_id = Column(Integer, ForeignKey("repositories.id"), index=True)
+    status = Column(String)  # completed, failed
+    ingest_mode = Column(String, nullable=True)
+    full_resync = Column(Boolean, default=False)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime, nullable=True)
+    wall_seconds = Column(Float, default=0.0)
+
+    # GitHub: requests made, of which answered 304 from the ETag cache,
+    # response bytes, summed round-trip time and time parked by rate limits
+    api_calls = Column(Integer, default=0)
+    cache_hits = Column(Integer, default=0)
+    bytes_received = Column(Integer, default=0)
+    request_seconds = Column(Float, default=0.0)
+    rate_limit_wait_seconds = Column(Float, default=0.0)
+    # Database: time in batched upserts, new rows and rewritten existing rows
+    write_seconds = Column(Float, default=0.0)
+    rows_inserted = Column(Integer, default=0)
+    rows_updated = Column(Integer, default=0)
+    # Highest process RSS sampled during the run (shared with concurrent syncs)
+    peak_rss_bytes = Column(Integer, nullable=True)
+
+    phases = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+
+    repository = relationship("Repository")
+
+    __table_args__ = (
+        Index("ix_sync_run_repo_started", "repository_id", "started_at"),
+    )
+
 class Comment(Base):
     """Issue / PR comment detail for responsiveness analytics."""
     __tablename__ = "comments"
@@ -1,10 +1,16 @@
-from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+import json
+
+from pydantic import BaseModel, field_validator
+from typing import List, Optional, Dict, Any, Literal
 from datetime import datetime
 
 class RepositoryCreate(BaseModel):
     owner: str
     name: str
+    # "rest", "graphql" or "stream"; None keeps the repository's current mode.
+    ingest_mode: Optional[Literal["rest", "graphql", "stream"]] = None
+    # Ignore stored watermarks and unchanged-item skipping; reprocess the full window.
+    full_resync: bool = False
 
 class RepositoryResponse(BaseModel):
     id: int
@@ -18,10 +24,50 @@ class RepositoryResponse(BaseModel):
     sync_status: str = "completed"
     sync_item_count: int = 0
     sync_total_items: int = 0
+    sync_skipped_items: Optional[int] = 0
+    sync_refreshed_items: Optional[int] = 0
+    sync_phase: Optional[str] = None
+    sync_page: Optional[int] = None
+    ingest_mode: Optional[str] = "rest"
+    # Set while a sync job is queued (1-based position) or running; ETA in
+    # seconds until the sync is expected to finish.
+    queue_position: Optional[int] = None
+    sync_eta_seconds: Optional[float] = None
+    # Next background refresh (auto-refresher), if scheduled
+    next_refresh_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
 
+class SyncRunResponse(BaseModel):
+    id: int
+    status: str
+    ingest_mode: Optional[str] = None
+    full_resync: bool = False
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+    wall_seconds: float = 0.0
+    api_calls: int = 0
+    cache_hits: int = 0
+    bytes_received: int = 0
+    request_seconds: float = 0.0
+    rate_limit_wait_seconds: float = 0.0
+    write_seconds: float = 0.0
+    rows_inserted: int = 0
+    rows_updated: int = 0
+    peak_rss_bytes: Optional[int] = None
+    # phase (init, prs, issues, commits, finalize) -> the counters above
+    phases: Dict[str, Dict[str, Any]] = {}
+    error: Optional[str] = None
+
+    @field_validator("phases", mode="before")
+    @classmethod
+    def parse_phases(cls, value):
+        return json.loads(value) if isinstance(value, str) else value or {}
+
+    class Config:
+        from_attributes = True
+
 class SignalResponse(BaseModel):
     id: str
     name: str
@@ -0,0 +1,131 @@
+"""
+Periodic background refresh of tracked repositories.
+
+Each pass looks at repositories that have been synced at least once and are
+not queued or syncing:
+
+- A repository without `next_refresh_at` (a sync just started or finished)
+  is scheduled `interval` after its last sync.
+- A repository past its `next_refresh_at` gets a background sync job
+  (incremental: stored watermarks and unchanged-item skipping apply) and is
+  rescheduled.
+
+The interval is inversely proportional to the repository's contribution
+events per day over the last week, bounded by AUTO_REFRESH_MIN_SECONDS and
+AUTO_REFRESH_MAX_SECONDS, and jittered so repositories added together drift
+apart instead of refreshing in lockstep. Rescheduling is a conditional
+UPDATE, so refreshers in several worker processes never queue the same
+repository twice.
+"""
+import asyncio
+import logging
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import func, update
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models import ContributionEvent, Repository
+from app.services.sync_jobs import enqueue_sync
+from app.services.sync_scheduler import BACKGROUND
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Activity window the refresh interval is derived from.
+ACTIVITY_WINDOW = timedelta(days=7)
+
+
+def refresh_interval(events_per_day: float) -> float:
+    """Seconds between refreshes for a repository with this activity rate."""
+    if events_per_day <= 0:
+        return float(settings.AUTO_REFRESH_MAX_SECONDS)
+    interval = (settings.AUTO_REFRESH_INTERVAL_SECONDS
+                * settings.AUTO_REFRESH_REFERENCE_EVENTS_PER_DAY / events_per_day)
+    return float(min(max(interval, settings.AUTO_REFRESH_MIN_SECONDS),
+                     settings.AUTO_REFRESH_MAX_SECONDS))
+
+
+def _jittered(seconds: float) -> timedelta:
+    jitter = settings.AUTO_REFRESH_JITTER
+    return timedelta(seconds=seconds * random.uniform(1 - jitter, 1 + jitter))
+
+
+def activity_rates(db: Session, now: datetime) -> Dict[int, float]:
+    """{repository_id: contribution events per day} over ACTIVITY_WINDOW."""
+    rows = (
+        db.query(ContributionEvent.repository_id, func.count(ContributionEvent.id))
+        .filter(ContributionEvent.event_at >= now - ACTIVITY_WINDOW)
+        .group_by(ContributionEvent.repository_id)
+        .all()
+    )
+    days = ACTIVITY_WINDOW.total_seconds() / 86400
+    return {repo_id: count / days for repo_id, count in rows}
+
+
+def _reschedule(db: Session, repo_id: int, expected: Optional[datetime],
+                next_at: datetime) -> bool:
+    """Move `next_refresh_at` from `expected` to `next_at`; False if another
+    refresher (or a sync starting) changed it first."""
+    current = (Repository.next_refresh_at.is_(None) if expected is None
+               else Repository.next_refresh_at == expected)
+    moved = db.execute(
+        update(Repository)
+        .where(Repository.id == repo_id, current)
+        .values(next_refresh_at=next_at)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return bool(moved)
+
+
+def schedule_refreshes(db: Session, now: datetime = None) -> List[str]:
+    """Run one refresher pass. Returns the full names of repositories queued."""
+    now = now or datetime.utcnow()
+    candidates = [
+        (repo.id, repo.owner, repo.name, repo.full_name, repo.last_synced_at, repo.next_refresh_at)
+        for repo in db.query(Repository).filter(
+            Repository.github_id.isnot(None),
+            Repository.last_synced_at.isnot(None),
+            Repository.sync_status.notin_(("queued", "syncing")),
+        )
+        if repo.next_refresh_at is None or repo.next_refresh_at <= now
+    ]
+    if not candidates:
+        db.rollback()
+        return []
+    rates = activity_rates(db, now)
+
+    queued = []
+    for repo_id, owner, name, full_name, last_synced_at, next_refresh_at in candidates:
+        interval = _jittered(refresh_interval(rates.get(repo_id, 0.0)))
+        if next_refresh_at is None and last_synced_at + interval > now:
+            _reschedule(db, repo_id, None, last_synced_at + interval)
+            continue
+        if not _reschedule(db, repo_id, next_refresh_at, now + interval):
+            continue
+        try:
+            enqueue_sync(db, owner, name, priority=BACKGROUND)
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Auto-refresh could not queue {full_name}: {e}")
+            continue
+        queued.append(full_name)
+    return queued
+
+
+async def run_auto_refresh(poll_seconds: float = None) -> None:
+    """Refresher loop; runs until cancelled."""
+    poll_seconds = poll_seconds or settings.AUTO_REFRESH_POLL_SECONDS
+    while True:
+        try:
+            with SessionLocal() as db:
+                queued = schedule_refreshes(db)
+            if queued:
+                logger.info(f"Auto-refresh queued {len(queued)} repositories: {', '.join(queued)}")
+        except Exception as e:
+            logger.error(f"Auto-refresh pass failed: {e}")
+        await asyncio.sleep(poll_seconds)
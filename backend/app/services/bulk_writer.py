@@ -0,0 +1,286 @@
+"""
+Batched upserts for sync rows keyed by GitHub id (or a natural key).
+
+`DataCollector` used to resolve every PR, issue, review, comment and label
+with a `SELECT ... WHERE github_id = ?` followed by an ORM add + flush. The
+`BulkUpserter` instead buffers plain row dicts and writes them in batches
+with the dialect's native `INSERT ... ON CONFLICT (github_id) DO UPDATE`
+(SQLite >= 3.24, PostgreSQL). Other dialects fall back to one SELECT per
+batch plus executemany INSERT/UPDATE.
+
+Only the columns present in a row are written, so a row that leaves out a
+column (e.g. `updated_at` after a failed child fetch) keeps the stored value,
+just as not assigning the ORM attribute did. Foreign keys to rows that may
+be in the same batch (a review's PR, an issue's labels) are given as GitHub
+ids and resolved after their parents are written.
+
+Contribution events have no GitHub id; they conflict on their unique
+`(repository_id, contributor_id, event_type, source_id)` key instead, so an
+event seen again (or written by an overlapping sync) updates the stored row.
+"""
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import bindparam, delete, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models import (
+    Comment, ContributionEvent, Issue, Label, PullRequest, Review, issue_labels,
+)
+from app.services.identity_map import LOOKUP_CHUNK, IdentityMaps
+
+settings = get_settings()
+
+# Parents before children, so references resolve within the same flush.
+WRITE_ORDER = (Label, PullRequest, Issue, Review, Comment, ContributionEvent)
+# Models whose existing rows are never overwritten (first sighting wins).
+INSERT_ONLY = (Label,)
+# Conflict target per model; models not listed conflict on github_id.
+CONFLICT_KEYS = {
+    ContributionEvent: ("repository_id", "contributor_id", "event_type", "source_id"),
+}
+
+
+def conflict_key(model) -> Tuple[str, ...]:
+    return CONFLICT_KEYS.get(model, ("github_id",))
+
+
+class BulkUpserter:
+    def __init__(self, db: Session, batch_size: int = None, identity: IdentityMaps = None):
+        self.db = db
+        self.identity = identity
+        self.batch_size = batch_size or settings.SYNC_BATCH_SIZE
+        self.dialect = db.get_bind().dialect.name
+        # model -> conflict key values -> row; rows with a NULL in their
+        # conflict key can't conflict (NULLs are distinct in unique indexes).
+        self._rows: Dict[type, Dict[tuple, Dict]] = defaultdict(dict)
+        self._anonymous: Dict[type, List[Dict]] = defaultdict(list)
+        # model -> [(row, column, parent model, parent github_id)] filled at flush
+        self._refs: Dict[type, List[Tuple[Dict, str, type, Optional[int]]]] = defaultdict(list)
+        # issue github_id -> label github_ids (replaces the issue's labels)
+        self._issue_labels: Dict[int, List[int]] = {}
+        self.rows_written = 0
+        # Rows `insert_one` inserted (it never updates); part of rows_written
+        self.rows_inserted_one = 0
+        self.batches = 0
+        self.write_seconds = 0.0
+
+    def __len__(self) -> int:
+        return (
+            sum(len(r) for r in self._rows.values())
+            + sum(len(r) for r in self._anonymous.values())
+            + len(self._issue_labels)
+        )
+
+    def add(self, model, row: Dict, ref: Tuple[str, type, Optional[int]] = None) -> None:
+        """Queue `row` for `model`. `ref=(column, parent_model, parent_github_id)`
+        sets `column` to the parent's primary key once the parent is written."""
+        key = tuple(row.get(column) for column in conflict_key(model))
+        queued = self._rows[model].get(key)
+        if None in key:
+            self._anonymous[model].append(row)
+        elif queued is None:
+            self._rows[model][key] = row
+        elif model in INSERT_ONLY:
+            return
+        else:
+            # Same item twice in one batch: later values win, as sequential
+            # ORM writes would have.
+            queued.update(row)
+            row = queued
+        if ref is not None:
+            self._refs[model].append((row, *ref))
+
+    def set_issue_labels(self, issue_github_id: int, label_github_ids: Iterable[int]) -> None:
+        """Replace the issue's labels with these (written after issues and labels)."""
+        self._issue_labels[issue_github_id] = list(dict.fromkeys(label_github_ids))
+
+    def flush_if_full(self) -> None:
+        if len(self) >= self.batch_size:
+            self.flush()
+
+    def clear(self) -> None:
+        """Drop everything buffered (after a rollback)."""
+        self._rows.clear()
+        self._anonymous.clear()
+        self._refs.clear()
+        self._issue_labels = {}
+
+    def flush(self) -> None:
+        """Write every buffered row in dependency order, in the session's transaction."""
+        if not len(self):
+            return
+        start = time.perf_counter()
+        written = 0
+        for model in WRITE_ORDER:
+            rows = list(self._rows.pop(model, {}).values()) + self._anonymous.pop(model, [])
+            refs = self._refs.pop(model, [])
+            if not rows:
+                continue
+            self._resolve(refs)
+            written += self._upsert(model, rows)
+        if self._issue_labels:
+            written += self._replace_issue_labels()
+        self.rows_written += written
+        self.batches += 1
+        self.write_seconds += time.perf_counter() - start
+
+    def rate(self) -> float:
+        """Rows written per second of write time."""
+        return self.rows_written / self.write_seconds if self.write_seconds else 0.0
+
+    def lookup_ids(self, model, github_ids: Iterable[int]) -> Dict[int, int]:
+        """{github_id: primary key} for existing rows of `model`, from the
+        identity map when there is one for `model`."""
+        id_map = self.identity.get(model) if self.identity is not None else None
+        if id_map is not None:
+            return id_map.get_many(github_ids)
+        github_ids = list(github_ids)
+        found = {}
+        for i in range(0, len(github_ids), LOOKUP_CHUNK):
+            chunk = github_ids[i:i + LOOKUP_CHUNK]
+            found.update(self.db.execute(
+                select(model.github_id, model.id).where(model.github_id.in_(chunk))
+            ).all())
+        return found
+
+    def insert_one(self, model, row: Dict) -> int:
+        """Insert a row keyed by github_id right away and return its primary key.
+        If a concurrent sync inserted it first, the existing key is returned."""
+        start = time.perf_counter()
+        try:
+            if self.dialect in ("sqlite", "postgresql"):
+                if self.dialect == "sqlite":
+                    from sqlalchemy.dialects.sqlite import insert as dialect_insert
+                else:
+                    from sqlalchemy.dialects.postgresql import insert as dialect_insert
+                stmt = dialect_insert(model.__table__).values(row).on_conflict_do_nothing(
+                    index_elements=["github_id"]
+                )
+                result = self.db.execute(stmt)
+                if result.rowcount:
+                    self.rows_written += 1
+                    self.rows_inserted_one += 1
+                    return result.inserted_primary_key[0]
+            else:
+                existing = self.db.execute(
+                    select(model.id).where(model.github_id == row["github_id"])
+                ).scalar()
+                if existing is None:
+                    self.rows_written += 1
+                    self.rows_inserted_one += 1
+                    return self.db.execute(insert(model.__table__).values(row)).inserted_primary_key[0]
+                return existing
+            return self.db.execute(
+                select(model.id).where(model.github_id == row["github_id"])
+            ).scalar()
+        finally:
+            self.write_seconds += time.perf_counter() - start
+
+    # ------------------------------------------------------------------
+    def _resolve(self, refs) -> None:
+        """Fill foreign keys from parents written earlier in this flush (or before)."""
+        if not refs:
+            return
+        wanted = defaultdict(set)
+        for _, _, parent, gh_id in refs:
+            if gh_id is not None:
+                wanted[parent].add(gh_id)
+        ids = {parent: self.lookup_ids(parent, gh_ids) for parent, gh_ids in wanted.items()}
+        for row, column, parent, gh_id in refs:
+            row[column] = ids[parent].get(gh_id) if gh_id is not None else None
+
+    def _upsert(self, model, rows: List[Dict]) -> int:
+        # executemany needs one column set per statement; group rows by keys.
+        groups = defaultdict(list)
+        for row in rows:
+            groups[tuple(sorted(row))].append(row)
+        for keys, group in groups.items():
+            if self.dialect in ("sqlite", "postgresql"):
+                self._native_upsert(model, keys, group)
+            else:
+                self._generic_upsert(model, keys, group)
+        return len(rows)
+
+    def _native_upsert(self, model, keys, rows) -> None:
+        if self.dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        target = conflict_key(model)
+        stmt = dialect_insert(model.__table__)
+        if model in INSERT_ONLY:
+            stmt = stmt.on_conflict_do_nothing(index_elements=list(target))
+        else:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(target),
+                set_={k: stmt.excluded[k] for k in keys if k not in target},
+            )
+        self.db.execute(stmt, rows)
+
+    def _generic_upsert(self, model, keys, rows) -> None:
+        target = conflict_key(model)
+        existing = self._existing_ids(model, target, rows)
+
+        def row_key(r):
+            return tuple(r.get(c) for c in target)
+
+        new_rows = [r for r in rows if row_key(r) not in existing]
+        if new_rows:
+            self.db.execute(insert(model.__table__), new_rows)
+        if model in INSERT_ONLY:
+            return
+        changed = [
+            {"b_pk": existing[row_key(r)], **{f"b_{k}": r[k] for k in keys}}
+            for r in rows if row_key(r) in existing
+        ]
+        if changed:
+            table = model.__table__
+            stmt = update(table).where(table.c.id == bindparam("b_pk")).values(
+                {k: bindparam(f"b_{k}") for k in keys if k not in target}
+            )
+            self.db.execute(stmt, changed)
+
+    def _existing_ids(self, model, target, rows) -> Dict[tuple, int]:
+        """{conflict key values: primary key} for rows already stored."""
+        if target == ("github_id",):
+            found = self.lookup_ids(
+                model, [r["github_id"] for r in rows if r.get("github_id") is not None]
+            )
+            return {(gh_id,): pk for gh_id, pk in found.items()}
+        # Composite keys: narrow by the last (most selective) column and match
+        # the rest in memory.
+        table = model.__table__
+        narrow = target[-1]
+        values_in = list({r[narrow] for r in rows if r.get(narrow) is not None})
+        wanted = {tuple(r.get(c) for c in target) for r in rows}
+        found = {}
+        for i in range(0, len(values_in), LOOKUP_CHUNK):
+            result = self.db.execute(
+                select(table.c.id, *(table.c[c] for c in target))
+                .where(table.c[narrow].in_(values_in[i:i + LOOKUP_CHUNK]))
+            )
+            for pk, *values in result:
+                if tuple(values) in wanted:
+                    found[tuple(values)] = pk
+        return found
+
+    def _replace_issue_labels(self) -> int:
+        wanted, self._issue_labels = self._issue_labels, {}
+        issue_ids = self.lookup_ids(Issue, wanted)
+        label_ids = self.lookup_ids(Label, {gh for gh_ids in wanted.values() for gh in gh_ids})
+        pks = list(issue_ids.values())
+        for i in range(0, len(pks), LOOKUP_CHUNK):
+            self.db.execute(
+                delete(issue_labels).where(issue_labels.c.issue_id.in_(pks[i:i + LOOKUP_CHUNK]))
+            )
+        links = [
+            {"issue_id": issue_ids[issue_gh], "label_id": label_ids[label_gh]}
+            for issue_gh, label_ghs in wanted.items() if issue_gh in issue_ids
+            for label_gh in label_ghs if label_gh in label_ids
+        ]
+        if links:
+            self.db.execute(insert(issue_labels), links)
+        return len(links)
@@ -0,0 +1,150 @@
+"""
+Process-wide cache of contributor row ids, shared by every sync.
+
+Each `DataCollector` used to start with an empty contributor map and re-resolve
+the same maintainers and bots on every sync (and again in the second collector
+built by `execute_sync`). This cache maps `github_id -> ContributorRef`
+(row id, login, avatar) for the life of the process. It is warmed from the
+`contributors` table at startup, most recently active contributors first.
+
+Entries are evicted least-recently-used past `CONTRIBUTOR_CACHE_MAX_ENTRIES`
+and expire after `CONTRIBUTOR_CACHE_TTL_SECONDS`. Collectors publish the ids
+they resolve only after their transaction commits, so the cache never hands
+out a row that a rollback removed.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models import Contributor
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+
+class ContributorRef:
+    __slots__ = ("id", "login", "avatar_url")
+
+    def __init__(self, id, login, avatar_url=None):
+        self.id = id
+        self.login = login
+        self.avatar_url = avatar_url
+
+
+class ContributorCache:
+    """Bounded LRU of github_id -> ContributorRef with a TTL. Thread-safe."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # github_id -> (ref, expires_at); most recently used last.
+        self._entries: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.warmed = 0
+
+    def get(self, github_id: int) -> Optional[ContributorRef]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(github_id)
+            if entry is not None and entry[1] <= now:
+                del self._entries[github_id]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(github_id)
+            self.hits += 1
+            return entry[0]
+
+    def put_many(self, refs: Dict[int, ContributorRef]) -> None:
+        if not refs:
+            return
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            for github_id, ref in refs.items():
+                self._entries[github_id] = (ref, expires_at)
+                self._entries.move_to_end(github_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def put(self, github_id: int, ref: ContributorRef) -> None:
+        self.put_many({github_id: ref})
+
+    def clear(self) -> None:
+        """Forget every entry (e.g. after the tables were recreated)."""
+        with self._lock:
+            self._entries.clear()
+
+    def warm(self, db: Session) -> int:
+        """Load up to `max_entries` contributors, most recently active last in
+        LRU order so they are evicted last. Returns the number loaded."""
+        rows = db.execute(
+            select(Contributor.github_id, Contributor.id, Contributor.login, Contributor.avatar_url)
+            .where(Contributor.github_id.isnot(None))
+            .order_by(
+                Contributor.last_contribution_date.is_(None),
+                Contributor.last_contribution_date.desc(),
+                Contributor.id.desc(),
+            )
+            .limit(self.max_entries)
+        ).all()
+        self.put_many({
+            gh_id: ContributorRef(pk, login, avatar)
+            for gh_id, pk, login, avatar in reversed(rows)
+        })
+        self.warmed = len(rows)
+        return self.warmed
+
+    def stats(self) -> Dict:
+        with self._lock:
+            size = len(self._entries)
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            "size": size,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "warmed": self.warmed,
+            "hits": hits,
+            "misses": misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(hits / total, 4) if total else None,
+        }
+
+
+_cache: Optional[ContributorCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_contributor_cache() -> ContributorCache:
+    """Return the process-wide contributor cache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ContributorCache(
+                    settings.CONTRIBUTOR_CACHE_MAX_ENTRIES, settings.CONTRIBUTOR_CACHE_TTL_SECONDS
+                )
+    return _cache
+
+
+def warm_contributor_cache(db: Session) -> None:
+    """Fill the cache from the contributors table; failures only cost warmth."""
+    try:
+        loaded = get_contributor_cache().warm(db)
+        logger.info(f"Contributor cache warmed with {loaded} contributors")
+    except Exception as e:  # noqa: BLE001
+        logger.warning(f"Contributor cache warm-up failed: {e}")
@@ -1,28 +1,44 @@
+from sqlalchemy import event, func
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 import json
 import logging
+import time
 from app.models import (
     Repository, PullRequest, Issue, Contributor, RepositoryStats,
-    ContributionEvent, Review, Comment, Label,
+    ContributionEvent, Review, Comment, Label, SyncWatermark, SyncCheckpoint,
 )
 from app.services.github_client import GitHubClient
+from app.services.bulk_writer import BulkUpserter
+from app.services.identity_map import IdentityMaps
+from app.services.contributor_cache import ContributorRef, get_contributor_cache
+from app.services.github_records import UserRecord
+from app.services.sync_pipeline import RowSet, SyncPipeline
+from app.services.sync_telemetry import SyncRunRecorder
+from app.services.sync_events import (
+    publish_data_changed, publish_progress, publish_status, repo_state,
+)
+from app.config import get_settings
 import asyncio
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 # Rolling collection window
 WINDOW_DAYS = 365
+# Incremental syncs re-read this far behind each stored watermark, so items
+# updated while the previous sync was listing are not missed.
+WATERMARK_OVERLAP = timedelta(minutes=10)
+# Checkpoints older than this are not resumed (their cursors may be stale).
+CHECKPOINT_MAX_AGE = timedelta(hours=24)
 
 
-def _parse_dt(value):
-    """Parse a GitHub ISO timestamp into a naive datetime (UTC)."""
-    if not value:
-        return None
-    try:
-        return datetime.fromisoformat(value.replace("Z", "+00:00")).replace(tzinfo=None)
-    except (ValueError, AttributeError):
-        return None
+def _newest(current, values):
+    """Max of `current` and the non-None datetimes in `values`."""
+    for value in values:
+        if value is not None and (current is None or value > current):
+            current = value
+    return current
 
 
 def _is_bot(login: str) -> bool:
@@ -33,33 +49,69 @@ def _is_bot(login: str) -> bool:
 
 
 class DataCollector:
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, client: GitHubClient = None):
         self.db = db
-        self.client = GitHubClient()
-        self.contributor_cache = {}  # github_id -> Contributor
-        # Per-session dedup of contribution-event keys we've already resolved,
-        # so overlapping re-sync windows don't re-issue a SELECT per duplicate
-        # event. Set of (repo_id, contributor_id, event_type, source_id).
+        self.client = client or GitHubClient()
+        # github_id -> row id maps (PRs, issues, labels); preloaded for the
+        # repository by execute_sync, filled lazily otherwise.
+        self.identity = IdentityMaps(db)
+        # Contributors resolve through the process-wide cache. Ids resolved in
+        # the current transaction are held back and published on commit.
+        self.contributors = get_contributor_cache()
+        self._new_contributors = {}
+        event.listen(db, "after_commit", self._publish_contributors)
+        event.listen(db, "after_rollback", self._forget_contributors)
+        # Per-session dedup of contribution-event keys we've already queued,
+        # so overlapping re-sync windows don't re-upsert the same event.
+        # Set of (repo_id, contributor_id, event_type, source_id).
         self._event_seen = set()
+        # github_id -> stored updated_at, preloaded by execute_sync. An item
+        # whose listing updated_at matches is skipped without child fetches.
+        self._known_prs = {}
+        self._known_issues = {}
+        self.skipped_items = 0
+        self.refreshed_items = 0
+        # Items whose child fetches failed; holds the phase watermark back.
+        self.failed_items = 0
+        # PR/issue/review/comment/label rows are buffered and upserted in batches.
+        self.writer = BulkUpserter(db, identity=self.identity)
+        # Per-phase counters of the running sync (set by execute_sync).
+        self.telemetry = None
+        self._init_started = None
 
     # ------------------------------------------------------------------
     # Stage 1: init
     # ------------------------------------------------------------------
-    async def init_sync(self, owner: str, repo_name: str):
+    async def init_sync(self, owner: str, repo_name: str, ingest_mode: str = None,
+                        full_resync: bool = False):
         """Fetch metadata/counts, set status to 'syncing'. Returns repo immediately."""
+        self._init_started = time.perf_counter()
         repo_data = await self.client.get_repository(owner, repo_name)
         repo = self._get_or_create_repo(repo_data)
-        self.contributor_cache = {}
+        if ingest_mode:
+            repo.ingest_mode = ingest_mode
+        # A new repository row is flushed above; commit before awaiting the
+        # searches so the write lock isn't held while other syncs run.
+        self.db.commit()
+        self.identity.reset()
         self._event_seen = set()
 
         since = datetime.utcnow() - timedelta(days=WINDOW_DAYS)
         since_str = since.strftime("%Y-%m-%d")
+        watermarks = {} if full_resync else self._load_watermarks(repo.id)
+
+        def window_query(kind, phase):
+            # Incremental: count only what changed since the watermark.
+            if phase in watermarks:
+                after = self._phase_since(watermarks, phase, since)
+                return f"repo:{owner}/{repo_name} is:{kind} updated:>={after.strftime('%Y-%m-%dT%H:%M:%SZ')}"
+            return f"repo:{owner}/{repo_name} is:{kind} created:>={since_str}"
 
         # Estimate the combined work across phases for a meaningful progress total.
         try:
             queries = [
-                self.client.search_issues(f"repo:{owner}/{repo_name} is:pr created:>={since_str}"),
-                self.client.search_issues(f"repo:{owner}/{repo_name} is:issue created:>={since_str}"),
+                self.client.search_issues(window_query("pr", "prs")),
+                self.client.search_issues(window_query("issue", "issues")),
                 self.client.search_issues(f"repo:{owner}/{repo_name} is:pr is:open"),
                 self.client.search_issues(f"repo:{owner}/{repo_name} is:issue is:open"),
             ]
@@ -81,28 +133,77 @@ class DataCollector:
         repo.sync_status = "syncing"
         repo.sync_total_items = max(1, pr_count + issue_count + 1)
         repo.sync_item_count = 0
+        repo.sync_skipped_items = 0
+        repo.sync_refreshed_items = 0
+        repo.sync_phase = None
+        repo.sync_page = None
+        repo.next_refresh_at = None  # rescheduled by the auto-refresher
         repo.last_synced_at = datetime.utcnow()
 
         self.db.commit()
+        publish_status(repo.id, lambda: repo_state(repo))
         return repo
 
     # ------------------------------------------------------------------
     # Stage 2: phased background sync
     # ------------------------------------------------------------------
-    async def execute_sync(self, repo_id: int, owner: str, repo_name: str):
+    async def execute_sync(self, repo_id: int, owner: str, repo_name: str,
+                           full_resync: bool = False):
+        """Run the sync phases. Each phase lists only what changed since its
+        stored watermark, unless `full_resync` (or no watermark yet), in which
+        case the whole WINDOW_DAYS window is reprocessed."""
         from app.database import SessionLocal
         db = SessionLocal()
+        telemetry = None
 
         try:
             repo = db.query(Repository).get(repo_id)
             if not repo:
                 return
 
-            collector = DataCollector(db)
-            since = datetime.utcnow() - timedelta(days=WINDOW_DAYS)
-            sem = asyncio.Semaphore(10)
+            # Share this instance's client so per-sync request stats cover
+            # both stages.
+            collector = DataCollector(db, client=self.client)
+            telemetry = collector.telemetry = SyncRunRecorder(
+                db, repo.id, collector.client, collector.writer, repo.ingest_mode,
+                full_resync, init_started=self._init_started,
+            )
+            window_since = datetime.utcnow() - timedelta(days=WINDOW_DAYS)
+            watermarks = {}
+            collector.identity.preload(repo.id)
+            if not full_resync:
+                collector._load_known_items(repo.id)
+                watermarks = collector._load_watermarks(repo.id)
+            pr_since = collector._phase_since(watermarks, "prs", window_since)
+            issue_since = collector._phase_since(watermarks, "issues", window_since)
+            comment_since = collector._phase_since(watermarks, "comments", window_since)
+            commit_since = collector._phase_since(watermarks, "commits", window_since)
+            if watermarks:
+                logger.info(f"Incremental sync for {owner}/{repo_name} from watermarks {watermarks}")
+            # GraphQL mode fetches reviews/labels/comments nested in each page;
+            # REST mode fetches them per item in _fetch_pr/_fetch_issue.
+            # Stream mode is REST, but takes labels from the issue listing and
+            # comments from one repo-wide listing joined by issue number.
+            use_graphql = repo.ingest_mode == "graphql"
+            use_stream = repo.ingest_mode == "stream"
+            # An interrupted attempt in the same mode left per-phase
+            # checkpoints: finished phases are skipped, the others resume
+            # after their last committed page.
+            mode = f"{repo.ingest_mode or 'rest'}{':full' if full_resync else ''}"
+            checkpoints = collector._load_checkpoints(repo.id, mode)
+            pr_cp = collector._checkpoint(repo.id, "prs", mode, checkpoints)
+            issue_cp = collector._checkpoint(repo.id, "issues", mode, checkpoints)
+            commit_cp = collector._checkpoint(repo.id, "commits", mode, checkpoints)
+            failed_phases = []
+
+            comment_stream = None
+            if use_stream and not issue_cp.done:
+                # Downloads alongside the PR phase; awaited in Phase C.
+                comment_stream = asyncio.ensure_future(
+                    collector.client.get_repo_issue_comments(owner, repo_name, since=comment_since)
+                )
 
-            progress = {"n": 0}
+            progress = {"n": pr_cp.items + issue_cp.items + (1 if commit_cp.done else 0)}
             total_items = repo.sync_total_items or 1
             commit_every = 1 if total_items <= 50 else 5
 
@@ -111,53 +212,161 @@ class DataCollector:
                 repo.sync_item_count = progress["n"]
                 if progress["n"] % commit_every == 0:
                     db.commit()
+                    publish_progress(repo_id, lambda: repo_state(repo))
+
+            # Each phase runs as a pipeline (app.services.sync_pipeline):
+            # fetch workers list pages and fetch child resources, transform
+            # workers build row sets, and a single writer applies them, so the
+            # Session is only ever used by one task. Only a bounded number of
+            # compact records (github_records) is alive at a time. Rows and
+            # the phase checkpoint are committed after every page, so an
+            # interruption loses at most one page of work.
+
+            # A phase's watermark advances to the newest updated_at it saw,
+            # but only if the phase finished and no item's child fetch failed.
+
+            def write_item(rows):
+                collector._apply_rows(repo.id, rows)
+                tick()
 
             # ---- Phase A + B: PRs and their reviews ----
-            try:
-                prs_data = await self.client.get_pull_requests(
-                    owner, repo_name, state="all", since=since
-                )
-                async def proc_pr(pr_data):
-                    async with sem:
-                        await collector._sync_pr(repo.id, pr_data, owner, repo_name, since)
-                        tick()
-                await asyncio.gather(*[proc_pr(p) for p in prs_data])
-                db.commit()
-                logger.info(f"Phase A/B done: {len(prs_data)} PRs")
-            except Exception as e:
-                logger.error(f"PR phase failed: {e}")
-                db.rollback()
+            if pr_cp.done:
+                logger.info(f"Phase A/B already done: {pr_cp.items} PRs")
+            else:
+                telemetry.phase("prs")
+                try:
+                    def pr_pages(cursor):
+                        if use_graphql:
+                            return collector.client.iter_pull_requests_graphql(
+                                owner, repo_name, since=pr_since, cursor=cursor
+                            )
+                        return collector.client.iter_pull_requests(
+                            owner, repo_name, state="all", since=pr_since, cursor=cursor
+                        )
+                    await collector._run_pages(
+                        repo, pr_cp, pr_pages,
+                        lambda pr_data: collector._fetch_pr(pr_data, owner, repo_name),
+                        lambda fetched: collector._transform_pr(repo.id, fetched),
+                        write_item,
+                        lambda page: (p.updated_at for p in page),
+                    )
+                    collector._refresh_review_wait_times(repo.id)
+                    if pr_cp.failed_items == 0:
+                        collector._save_watermark(repo.id, "prs", pr_cp.high_water)
+                    pr_cp.done = True
+                    db.commit()
+                    logger.info(f"Phase A/B done: {pr_cp.items} PRs")
+                except Exception as e:
+                    logger.error(f"PR phase failed: {e}")
+                    telemetry.phase_failed(e)
+                    failed_phases.append("prs")
+                    collector._discard_pending()
+                    db.rollback()
 
             # ---- Phase C + D: issues and their comments ----
-            try:
-                issues_data = await self.client.get_issues(
-                    owner, repo_name, state="all", since=since
-                )
-                async def proc_issue(issue_data):
-                    async with sem:
-                        await collector._sync_issue(repo.id, issue_data, owner, repo_name)
-                        tick()
-                await asyncio.gather(*[proc_issue(i) for i in issues_data])
-                db.commit()
-                logger.info(f"Phase C/D done: {len(issues_data)} issues")
-            except Exception as e:
-                logger.error(f"Issue phase failed: {e}")
-                db.rollback()
+            if issue_cp.done:
+                logger.info(f"Phase C/D already done: {issue_cp.items} issues")
+            else:
+                telemetry.phase("issues")
+                try:
+                    def issue_pages(cursor):
+                        if use_graphql:
+                            return collector.client.iter_issues_graphql(
+                                owner, repo_name, since=issue_since, cursor=cursor
+                            )
+                        return collector.client.iter_issues(
+                            owner, repo_name, state="all", since=issue_since, cursor=cursor
+                        )
+                    comments_by_issue = None
+                    if comment_stream is not None:
+                        try:
+                            comments_by_issue = await comment_stream
+                            logger.info(
+                                f"Comment stream: {sum(map(len, comments_by_issue.values()))} comments "
+                                f"on {len(comments_by_issue)} issues/PRs"
+                            )
+                        except Exception as e:
+                            logger.error(f"Comment stream failed, fetching per issue: {e}")
+                    def fetch_issue(issue_data):
+                        if use_graphql:
+                            return collector._fetch_issue(
+                                issue_data, owner, repo_name,
+                                labels=issue_data.labels, comments=issue_data.comment_list,
+                            )
+                        if use_stream:
+                            comments = None
+                            if comments_by_issue is not None:
+                                comments = comments_by_issue.get(issue_data.number, [])
+                                # The stream only holds comments updated in the
+                                # window; older ones need the per-issue listing.
+                                if len(comments) < issue_data.comments:
+                                    comments = None
+                            return collector._fetch_issue(
+                                issue_data, owner, repo_name,
+                                labels=issue_data.labels, comments=comments,
+                            )
+                        return collector._fetch_issue(issue_data, owner, repo_name)
+                    await collector._run_pages(
+                        repo, issue_cp, issue_pages, fetch_issue,
+                        lambda fetched: collector._transform_issue(repo.id, fetched),
+                        write_item,
+                        lambda page: (i.updated_at for i in page),
+                    )
+                    if issue_cp.failed_items == 0:
+                        collector._save_watermark(repo.id, "issues", issue_cp.high_water)
+                        if comments_by_issue is not None:
+                            collector._save_watermark(repo.id, "comments", _newest(None, (
+                                c.updated_at for cs in comments_by_issue.values() for c in cs
+                            )))
+                    issue_cp.done = True
+                    db.commit()
+                    logger.info(f"Phase C/D done: {issue_cp.items} issues")
+                except Exception as e:
+                    logger.error(f"Issue phase failed: {e}")
+                    telemetry.phase_failed(e)
+                    failed_phases.append("issues")
+                    collector._discard_pending()
+                    db.rollback()
+            if comment_stream is not None and not comment_stream.done():
+                comment_stream.cancel()
 
             # ---- Phase E: commits / code stats (last; guarded) ----
-            try:
-                commits = await self.client.get_commits(owner, repo_name, since=since)
-                for c in commits:
-                    collector._sync_commit(repo.id, c)
-                progress["n"] += 1
-                repo.sync_item_count = progress["n"]
-                db.commit()
-                logger.info(f"Phase E done: {len(commits)} commits")
-            except Exception as e:
-                logger.error(f"Commit phase failed (non-fatal): {e}")
-                db.rollback()
+            commits_failed = False
+            if commit_cp.done:
+                logger.info(f"Phase E already done: {commit_cp.items} commits")
+            else:
+                telemetry.phase("commits")
+                try:
+                    async def fetch_commit(commit_data):
+                        return commit_data  # listing has everything; no child fetch
+                    await collector._run_pages(
+                        repo, commit_cp,
+                        lambda cursor: collector.client.iter_commits(
+                            owner, repo_name, since=commit_since, cursor=cursor
+                        ),
+                        fetch_commit,
+                        collector._transform_commit,
+                        lambda rows: collector._apply_rows(repo.id, rows),
+                        lambda page: (c.committed_at or c.date for c in page),
+                    )
+                    collector._save_watermark(repo.id, "commits", commit_cp.high_water)
+                    commit_cp.done = True
+                    progress["n"] += 1
+                    repo.sync_item_count = progress["n"]
+                    db.commit()
+                    logger.info(f"Phase E done: {commit_cp.items} commits")
+                except Exception as e:
+                    logger.error(f"Commit phase failed (non-fatal): {e}")
+                    telemetry.phase_failed(e)
+                    commits_failed = True
+                    collector._discard_pending()
+                    db.rollback()
 
             # ---- Finalize: lifecycle dates + stats ----
+            telemetry.phase("finalize")
+            repo.sync_phase = "finalize"
+            repo.sync_page = None
+            publish_status(repo_id, lambda: repo_state(repo))
             try:
                 collector._populate_lifecycle_dates(repo.id)
                 collector._update_stats(repo.id)
@@ -165,9 +374,43 @@ class DataCollector:
                 logger.error(f"Finalize failed: {e}")
 
             repo.sync_item_count = max(progress["n"], 0)
+            repo.sync_skipped_items = collector.skipped_items
+            repo.sync_refreshed_items = collector.refreshed_items
+            if failed_phases:
+                # Keep the checkpoints; a retry resumes the failed phase.
+                repo.sync_status = "failed"
+                failed_cp = checkpoints[failed_phases[0]]
+                repo.sync_phase, repo.sync_page = failed_cp.phase, failed_cp.page
+                db.commit()
+                publish_status(repo_id, lambda: repo_state(repo))
+                publish_data_changed(repo_id, "sync")
+                logger.error(
+                    f"Sync of {owner}/{repo_name} failed in phase(s) {failed_phases}; "
+                    f"checkpoints kept for resume"
+                )
+                telemetry.finish("failed", f"failed in phase(s) {', '.join(failed_phases)}")
+                return
+            # A failed commit phase is not fatal; its checkpoint lets the
+            # next sync resume the commit listing.
+            collector._clear_checkpoints(repo.id, keep=("commits",) if commits_failed else ())
             repo.sync_status = "completed"
+            repo.sync_phase = None
+            repo.sync_page = None
             db.commit()
-            logger.info(f"Sync completed for {owner}/{repo_name}")
+            publish_status(repo_id, lambda: repo_state(repo))
+            publish_data_changed(repo_id, "sync")
+            stats = collector.client.stats
+            writer = collector.writer
+            logger.info(
+                f"Sync completed for {owner}/{repo_name}: {stats['requests']} GitHub requests, "
+                f"{stats['cache_hits']} served from cache (304), {stats['cache_misses']} cache misses, "
+                f"{collector.refreshed_items} items refreshed, {collector.skipped_items} unchanged, "
+                f"{writer.rows_written} rows upserted in {writer.batches} batches "
+                f"({writer.rate():.0f} rows/s)"
+            )
+            logger.info(f"Identity maps for {owner}/{repo_name}: {collector.identity.stats()}")
+            logger.info(f"Contributor cache: {collector.contributors.stats()}")
+            telemetry.finish("completed")
 
         except Exception as e:
             logger.error(f"Background Sync failed: {e}")
@@ -178,8 +421,12 @@ class DataCollector:
                 if repo:
                     repo.sync_status = "failed"
                     db.commit()
+                    publish_status(repo_id, lambda: repo_state(repo))
+                    publish_data_changed(repo_id, "sync")
             except Exception:
                 pass
+            if telemetry is not None:
+                telemetry.finish("failed", str(e))
         finally:
             db.close()
 
@@ -188,6 +435,19 @@ class DataCollector:
     # ------------------------------------------------------------------
     def _get_or_create_repo(self, data: dict) -> Repository:
         repo = self.db.query(Repository).filter(Repository.github_id == data["id"]).first()
+        if not repo:
+            # Placeholder row created when the first sync was enqueued.
+            repo = self.db.query(Repository).filter(
+                Repository.github_id.is_(None),
+                func.lower(Repository.full_name) == data["full_name"].lower(),
+            ).first()
+            if repo:
+                repo.github_id = data["id"]
+                repo.name = data["name"]
+                repo.full_name = data["full_name"]
+                repo.owner = data["owner"]["login"]
+                repo.url = data["html_url"]
+                repo.description = data.get("description")
         if not repo:
             repo = Repository(
                 github_id=data["id"],
@@ -201,29 +461,177 @@ class DataCollector:
             self.db.flush()
         return repo
 
-    def _sync_contributor(self, data: dict) -> Contributor:
-        if not data:
-            return None
-        github_id = data.get("id")
-        if github_id is None:
-            return None
-        if github_id in self.contributor_cache:
-            return self.contributor_cache[github_id]
+    def _load_checkpoints(self, repo_id, mode) -> dict:
+        """{phase: SyncCheckpoint} left by an interrupted sync in `mode`.
+        Checkpoints from another mode or older than CHECKPOINT_MAX_AGE are
+        dropped."""
+        cutoff = datetime.utcnow() - CHECKPOINT_MAX_AGE
+        checkpoints = {}
+        for cp in self.db.query(SyncCheckpoint).filter(SyncCheckpoint.repository_id == repo_id):
+            if cp.mode == mode and cp.updated_at is not None and cp.updated_at >= cutoff:
+                checkpoints[cp.phase] = cp
+            else:
+                self.db.delete(cp)
+        self.db.commit()
+        if checkpoints:
+            logger.info(
+                "Resuming from checkpoints: "
+                + ", ".join(f"{p} page {cp.page}{' (done)' if cp.done else ''}"
+                            for p, cp in checkpoints.items())
+            )
+        return checkpoints
+
+    def _checkpoint(self, repo_id, phase, mode, checkpoints) -> SyncCheckpoint:
+        """The phase's checkpoint, created (unsaved until its first page) if new."""
+        cp = checkpoints.get(phase)
+        if cp is None:
+            cp = SyncCheckpoint(
+                repository_id=repo_id, phase=phase, mode=mode,
+                cursor=None, page=0, items=0, failed_items=0, done=False,
+            )
+            checkpoints[phase] = cp
+        return cp
+
+    async def _run_pages(self, repo, cp, list_pages, fetch, transform, write, timestamps):
+        """Run a phase's listing from its checkpoint through a SyncPipeline.
+        `list_pages(cursor)` returns the page iterator; `fetch`, `transform`
+        and `write` are the pipeline stages and `timestamps(page)` gives the
+        values for the phase's high water. Each page's rows and the advanced
+        checkpoint are committed together, in listing order."""
+        repo.sync_phase = cp.phase
+        repo.sync_page = cp.page
+        publish_status(repo.id, lambda: repo_state(repo))
+        if cp.page and cp.cursor is None:
+            return  # listing finished in an earlier attempt
+        if cp.id is None:
+            self.db.add(cp)
+        failed_base = self.failed_items - cp.failed_items
+
+        def page_done(cursor, size, high):
+            cp.cursor = cursor
+            cp.page += 1
+            cp.items += size
+            cp.high_water = _newest(cp.high_water, (high,))
+            cp.failed_items = self.failed_items - failed_base
+            repo.sync_page = cp.page
+            self.writer.flush()
+            self.db.commit()
+            publish_progress(repo.id, lambda: repo_state(repo))
+            publish_data_changed(repo.id, "sync", throttle=True)
+            if self.telemetry is not None:
+                self.telemetry.sample()
+
+        pipeline = SyncPipeline(
+            f"{repo.full_name}:{cp.phase}", fetch, transform, write, page_done,
+            high_water=lambda page: _newest(None, timestamps(page)),
+        )
+        try:
+            await pipeline.run(list_pages(cp.cursor))
+        finally:
+            stages = pipeline.snapshot()["stages"]
+            logger.info(f"{cp.phase} pipeline: " + ", ".join(
+                f"{name} {s['items']} items ({s['items_per_sec']}/s, "
+                f"max queue {s['max_queue_depth']})"
+                for name, s in stages.items()
+            ))
+
+    def _clear_checkpoints(self, repo_id, keep=()):
+        query = self.db.query(SyncCheckpoint).filter(SyncCheckpoint.repository_id == repo_id)
+        if keep:
+            query = query.filter(SyncCheckpoint.phase.notin_(keep))
+        query.delete(synchronize_session=False)
+
+    def _load_watermarks(self, repo_id) -> dict:
+        """{phase: high_water} stored for the repository."""
+        return dict(
+            self.db.query(SyncWatermark.phase, SyncWatermark.high_water)
+            .filter(SyncWatermark.repository_id == repo_id).all()
+        )
 
-        contributor = self.db.query(Contributor).filter(
-            Contributor.github_id == github_id
+    @staticmethod
+    def _phase_since(watermarks, phase, window_since):
+        """Listing cutoff for a phase: its watermark less the overlap, never
+        older than the rolling window."""
+        high_water = watermarks.get(phase)
+        if high_water is None:
+            return window_since
+        return max(window_since, high_water - WATERMARK_OVERLAP)
+
+    def _save_watermark(self, repo_id, phase, high_water):
+        """Advance (never rewind) the phase watermark. No-op when nothing was seen."""
+        if high_water is None:
+            return
+        mark = self.db.query(SyncWatermark).filter(
+            SyncWatermark.repository_id == repo_id, SyncWatermark.phase == phase,
         ).first()
-        if not contributor:
-            contributor = Contributor(
-                github_id=github_id,
-                login=data.get("login"),
-                avatar_url=data.get("avatar_url"),
-                html_url=data.get("html_url"),
-            )
-            self.db.add(contributor)
-            self.db.flush()
-        self.contributor_cache[github_id] = contributor
-        return contributor
+        if mark is None:
+            self.db.add(SyncWatermark(repository_id=repo_id, phase=phase, high_water=high_water))
+        elif high_water > mark.high_water:
+            mark.high_water = high_water
+
+    def _load_known_items(self, repo_id):
+        """Preload stored updated_at for the repo's PRs and issues (two queries)."""
+        self._known_prs = dict(
+            self.db.query(PullRequest.github_id, PullRequest.updated_at)
+            .filter(PullRequest.repository_id == repo_id).all()
+        )
+        self._known_issues = dict(
+            self.db.query(Issue.github_id, Issue.updated_at)
+            .filter(Issue.repository_id == repo_id).all()
+        )
+
+    def _is_unchanged(self, known, data) -> bool:
+        """True (and counted) if `data` matches the stored updated_at; counts
+        a refresh otherwise."""
+        if data.updated_at is not None and known.get(data.id) == data.updated_at:
+            self.skipped_items += 1
+            return True
+        self.refreshed_items += 1
+        return False
+
+    def _refresh_review_wait_times(self, repo_id):
+        """Recompute the clock-dependent wait time of open, unreviewed PRs,
+        including ones skipped as unchanged."""
+        self.writer.flush()
+        self.db.flush()  # the session does not autoflush
+        now = datetime.utcnow()
+        open_prs = self.db.query(PullRequest).filter(
+            PullRequest.repository_id == repo_id,
+            PullRequest.state == "open",
+            PullRequest.time_to_first_review.is_(None),
+            PullRequest.created_at.isnot(None),
+        ).all()
+        for pr in open_prs:
+            pr.review_wait_time = (now - pr.created_at).total_seconds() / 3600.0
+
+    def _discard_pending(self):
+        """Drop buffered rows and cached ids before a rollback undoes them."""
+        self.writer.clear()
+        self.identity.reset()
+
+    def _sync_contributor(self, user):
+        """Contributor row id for a UserRecord, inserting it if new (None-safe)."""
+        if user is None or user.id is None:
+            return None
+        ref = self._new_contributors.get(user.id) or self.contributors.get(user.id)
+        if ref is None:
+            # Returns the existing row's id when the contributor is known.
+            contributor_id = self.writer.insert_one(Contributor, {
+                "github_id": user.id,
+                "login": user.login,
+                "avatar_url": user.avatar_url,
+                "html_url": user.html_url,
+            })
+            ref = ContributorRef(contributor_id, user.login, user.avatar_url)
+            self._new_contributors[user.id] = ref
+        return ref.id
+
+    def _publish_contributors(self, session):
+        self.contributors.put_many(self._new_contributors)
+        self._new_contributors = {}
+
+    def _forget_contributors(self, session):
+        self._new_contributors = {}
 
     def _add_event(self, repo_id, contributor_id, event_type, event_at, source_id=None, meta=None):
         if contributor_id is None or event_at is None:
@@ -231,243 +639,291 @@ class DataCollector:
         src = str(source_id) if source_id is not None else None
         key = (repo_id, contributor_id, event_type, src)
 
-        # Short-circuit events already resolved during this sync session.
+        # Short-circuit events already queued during this sync session.
         if key in self._event_seen:
             return
         self._event_seen.add(key)
 
-        existing = self.db.query(ContributionEvent).filter(
-            ContributionEvent.repository_id == repo_id,
-            ContributionEvent.contributor_id == contributor_id,
-            ContributionEvent.event_type == event_type,
-            ContributionEvent.source_id == src,
-        ).first()
-        if existing:
-            existing.event_at = event_at
-            if meta is not None:
-                existing.meta = json.dumps(meta)
+        # Upserted on the unique event key: a stored event gets the new
+        # event_at (and meta, when given).
+        row = {
+            "repository_id": repo_id,
+            "contributor_id": contributor_id,
+            "event_type": event_type,
+            "event_at": event_at,
+            "source_id": src,
+        }
+        if meta is not None:
+            row["meta"] = json.dumps(meta)
+        self.writer.add(ContributionEvent, row)
+
+    def _apply_rows(self, repo_id, rows):
+        """Write stage: queue a RowSet on `self.writer`, resolving its
+        UserRecords to contributor row ids. None (skipped item) is a no-op."""
+        if rows is None:
             return
-        self.db.add(ContributionEvent(
-            repository_id=repo_id,
-            contributor_id=contributor_id,
-            event_type=event_type,
-            event_at=event_at,
-            source_id=src,
-            meta=json.dumps(meta) if meta is not None else None,
-        ))
-
-    async def _sync_pr(self, repo_id, data, owner, repo_name, since):
-        author = self._sync_contributor(data.get("user"))
-        if not author:
-            return
-
-        pr = self.db.query(PullRequest).filter(PullRequest.github_id == data["id"]).first()
-        if not pr:
-            pr = PullRequest(github_id=data["id"])
-            self.db.add(pr)
-
-        created = _parse_dt(data.get("created_at"))
-        merged = _parse_dt(data.get("merged_at"))
-        closed = _parse_dt(data.get("closed_at"))
-
-        pr.repository_id = repo_id
-        pr.number = data["number"]
-        pr.title = data.get("title")
-        pr.state = "merged" if merged else data.get("state")
-        pr.created_at = created
-        pr.updated_at = _parse_dt(data.get("updated_at"))
-        pr.closed_at = closed
-        pr.merged_at = merged
-        pr.author_id = author.id
-        self.db.flush()
+        for user in rows.users:
+            self._sync_contributor(user)
+        for model, row, ref in rows.rows:
+            for key, value in row.items():
+                if isinstance(value, UserRecord):
+                    row[key] = self._sync_contributor(value)
+            self.writer.add(model, row, ref=ref)
+        for user, event_type, event_at, source_id, meta in rows.events:
+            self._add_event(repo_id, self._sync_contributor(user), event_type, event_at,
+                            source_id=source_id, meta=meta)
+        if rows.issue_labels is not None:
+            self.writer.set_issue_labels(*rows.issue_labels)
+        self.writer.flush_if_full()
+
+    async def _fetch_pr(self, data, owner, repo_name):
+        """Fetch stage for a PR: its reviews, unless the listing carried them
+        (GraphQL path). Returns (data, reviews, complete), or None when the
+        PR is unchanged since the stored updated_at or has no author."""
+        if self._is_unchanged(self._known_prs, data):
+            return None
+        if data.user is None or data.user.id is None:
+            return None
+        reviews = data.reviews
+        complete = True
+        if reviews is None:
+            try:
+                reviews = await self.client.get_pr_reviews(owner, repo_name, data.number)
+            except Exception as e:
+                logger.error(f"Failed to fetch reviews for PR #{data.number}: {e}")
+                reviews = []
+                complete = False
+                self.failed_items += 1
+        return data, reviews, complete
+
+    def _transform_pr(self, repo_id, fetched) -> RowSet:
+        """Transform stage for a PR: the PR row, its review rows and events.
+        updated_at is written only if the child fetch succeeded, so a failed
+        item is retried on the next sync. `reviews` None (webhook path) leaves
+        the stored review-derived fields as they are."""
+        data, reviews, complete = fetched
+        rows = RowSet()
+        author = data.user
+        rows.users.append(author)
+
+        created = data.created_at
+        merged = data.merged_at
+        closed = data.closed_at
+        state = "merged" if merged else data.state
 
         # Lifecycle events
-        self._add_event(repo_id, author.id, "pr_opened", created, source_id=pr.github_id,
-                        meta={"number": pr.number})
+        rows.event(author, "pr_opened", created, source_id=data.id, meta={"number": data.number})
         if merged:
-            self._add_event(repo_id, author.id, "pr_merged", merged, source_id=pr.github_id,
-                            meta={"number": pr.number})
+            rows.event(author, "pr_merged", merged, source_id=data.id, meta={"number": data.number})
         elif closed:
-            self._add_event(repo_id, author.id, "pr_closed", closed, source_id=pr.github_id,
-                            meta={"number": pr.number})
+            rows.event(author, "pr_closed", closed, source_id=data.id, meta={"number": data.number})
+
+        row = {
+            "github_id": data.id,
+            "repository_id": repo_id,
+            "number": data.number,
+            "title": data.title,
+            "state": state,
+            "created_at": created,
+            "closed_at": closed,
+            "merged_at": merged,
+            "author_id": author,
+        }
 
         # Reviews (Phase B)
-        try:
-            reviews = await self.client.get_pr_reviews(owner, repo_name, data["number"])
-        except Exception as e:
-            logger.error(f"Failed to fetch reviews for PR #{data['number']}: {e}")
-            reviews = []
-
-        pr.reviews_count = len(reviews)
-        pr.has_review = len(reviews) > 0
-        first_review_time = None
-
-        for r in reviews:
-            r_time = _parse_dt(r.get("submitted_at"))
-            reviewer = self._sync_contributor(r.get("user"))
-            if r_time and (first_review_time is None or r_time < first_review_time):
-                first_review_time = r_time
-            if reviewer and r_time:
-                latency = ((r_time - created).total_seconds() / 3600.0) if created else None
-                self._upsert_review(repo_id, pr.id, reviewer.id, r, r_time, latency)
-                self._add_event(repo_id, reviewer.id, "review_submitted", r_time,
-                                source_id=r.get("id"),
-                                meta={"state": r.get("state"), "pr": pr.number})
-
-        if first_review_time and created:
-            pr.time_to_first_review = (first_review_time - created).total_seconds() / 3600.0
-            pr.review_wait_time = None
-        elif created and pr.state == "open":
-            pr.review_wait_time = (datetime.utcnow() - created).total_seconds() / 3600.0
-            pr.time_to_first_review = None
-
-    def _upsert_review(self, repo_id, pr_id, reviewer_id, data, submitted_at, latency):
-        gh_id = data.get("id")
-        review = self.db.query(Review).filter(Review.github_id == gh_id).first() if gh_id else None
-        if not review:
-            review = Review(github_id=gh_id)
-            self.db.add(review)
-        review.repository_id = repo_id
-        review.pull_request_id = pr_id
-        review.reviewer_id = reviewer_id
-        review.state = (data.get("state") or "").lower()
-        review.submitted_at = submitted_at
-        review.latency_hours = latency
-
-    async def _sync_issue(self, repo_id, data, owner, repo_name):
-        author = self._sync_contributor(data.get("user"))
-        if not author:
+        if reviews is not None:
+            row["reviews_count"] = len(reviews)
+            row["has_review"] = len(reviews) > 0
+            first_review_time = None
+            for r in reviews:
+                r_time = r.submitted_at
+                if r_time and (first_review_time is None or r_time < first_review_time):
+                    first_review_time = r_time
+                self._add_review(repo_id, data, r, rows)
+
+            if first_review_time and created:
+                row["time_to_first_review"] = (first_review_time - created).total_seconds() / 3600.0
+                row["review_wait_time"] = None
+            elif created and state == "open":
+                row["review_wait_time"] = (datetime.utcnow() - created).total_seconds() / 3600.0
+                row["time_to_first_review"] = None
+
+        if complete:
+            row["updated_at"] = data.updated_at
+
+        rows.add(PullRequest, row)
+        return rows
+
+    @staticmethod
+    def _add_review(repo_id, pr, r, rows):
+        """Add review `r` of PR record `pr` (row and event) to `rows`. Reviews
+        without a reviewer or submission time only record the reviewer."""
+        rows.users.append(r.user)
+        r_time = r.submitted_at
+        if r.user is None or r.user.id is None or not r_time:
             return
-
-        issue = self.db.query(Issue).filter(Issue.github_id == data["id"]).first()
-        if not issue:
-            issue = Issue(github_id=data["id"])
-            self.db.add(issue)
-
-        created = _parse_dt(data.get("created_at"))
-        closed = _parse_dt(data.get("closed_at"))
-
-        issue.repository_id = repo_id
-        issue.number = data["number"]
-        issue.title = data.get("title")
-        issue.state = data.get("state")
-        issue.created_at = created
-        issue.updated_at = _parse_dt(data.get("updated_at"))
-        issue.closed_at = closed
-        issue.author_id = author.id
-        issue.comments_count = data.get("comments", 0)
+        created = pr.created_at
+        latency = ((r_time - created).total_seconds() / 3600.0) if created else None
+        rows.add(Review, {
+            "github_id": r.id,
+            "repository_id": repo_id,
+            "reviewer_id": r.user,
+            "state": (r.state or "").lower(),
+            "submitted_at": r_time,
+            "latency_hours": latency,
+        }, ref=("pull_request_id", PullRequest, pr.id))
+        rows.event(r.user, "review_submitted", r_time, source_id=r.id,
+                   meta={"state": r.state, "pr": pr.number})
+
+    async def _fetch_issue(self, data, owner, repo_name, labels=None, comments=None):
+        """Fetch stage for an issue: its labels and comments. `labels` /
+        `comments` may be passed pre-fetched (GraphQL and stream paths); when
+        None they are fetched over REST. Returns (data, labels, comments,
+        complete), or None when unchanged or authorless as in `_fetch_pr`.
+        Labels stay None if their fetch failed, leaving the stored ones as is."""
+        if self._is_unchanged(self._known_issues, data):
+            return None
+        if data.user is None or data.user.id is None:
+            return None
+        complete = True
+        if labels is None:
+            try:
+                labels = await self.client.get_issue_labels(owner, repo_name, data.number)
+            except Exception as e:
+                logger.error(f"Failed to fetch labels for #{data.number}: {e}")
+                complete = False
+        if data.comments > 0 and comments is None:
+            try:
+                comments = await self.client.get_issue_comments(owner, repo_name, data.number)
+            except Exception as e:
+                logger.error(f"Failed to fetch comments for #{data.number}: {e}")
+                comments = []
+                complete = False
+        if not complete:
+            self.failed_items += 1
+        return data, labels, comments, complete
+
+    def _transform_issue(self, repo_id, fetched) -> RowSet:
+        """Transform stage for an issue: the issue row with its labels,
+        comments and events. updated_at is written as in `_transform_pr`."""
+        data, labels, comments, complete = fetched
+        rows = RowSet()
+        author = data.user
+        rows.users.append(author)
+
+        created = data.created_at
+        closed = data.closed_at
+
+        row = {
+            "github_id": data.id,
+            "repository_id": repo_id,
+            "number": data.number,
+            "title": data.title,
+            "state": data.state,
+            "created_at": created,
+            "closed_at": closed,
+            "author_id": author,
+            "comments_count": data.comments,
+        }
 
         # Sync assignee from issue data (Phase 1 Analytics)
-        assignee_data = data.get("assignee")
-        if assignee_data:
-            assignee = self._sync_contributor(assignee_data)
-            issue.assignee_id = assignee.id if assignee else None
-
-        self.db.flush()
+        if data.assignee:
+            row["assignee_id"] = data.assignee
 
-        self._add_event(repo_id, author.id, "issue_opened", created, source_id=issue.github_id,
-                        meta={"number": issue.number})
+        rows.event(author, "issue_opened", created, source_id=data.id, meta={"number": data.number})
         if closed:
-            self._add_event(repo_id, author.id, "issue_closed", closed, source_id=issue.github_id,
-                            meta={"number": issue.number})
+            rows.event(author, "issue_closed", closed, source_id=data.id, meta={"number": data.number})
 
-        # Sync labels (Phase 1 Analytics) - fetch from API and store
-        try:
-            labels_data = await self.client.get_issue_labels(owner, repo_name, data["number"])
-            self._sync_issue_labels(repo_id, issue, labels_data)
-        except Exception as e:
-            logger.error(f"Failed to fetch labels for #{data['number']}: {e}")
-
-        # Comments (Phase D) + first responder tracking
-        first_responder_id = None
-        if data.get("comments", 0) > 0:
-            try:
-                comments = await self.client.get_issue_comments(owner, repo_name, data["number"])
-            except Exception as e:
-                logger.error(f"Failed to fetch comments for #{data['number']}: {e}")
-                comments = []
+        # Labels (Phase 1 Analytics)
+        label_gh_ids = None
+        if labels is not None:
+            row["labels_snapshot"], label_gh_ids = self._issue_label_rows(repo_id, labels, rows)
 
+        # Comments (Phase D) + first responder tracking. `comments` None
+        # (webhook path) leaves the stored response fields as they are.
+        if data.comments > 0 and comments is not None:
             has_response = False
             first_response_at = None
-            author_login = (data.get("user") or {}).get("login")
+            first_responder = None
+            author_login = author.login
             for c in comments:
-                commenter = self._sync_contributor(c.get("user"))
-                c_time = _parse_dt(c.get("created_at"))
-                if commenter:
-                    self._upsert_comment(repo_id, issue.number, commenter.id, c, c_time)
-                    if c_time:
-                        self._add_event(repo_id, commenter.id, "issue_comment", c_time,
-                                        source_id=c.get("id"), meta={"issue": issue.number})
-                c_login = (c.get("user") or {}).get("login")
+                c_time = c.created_at
+                self._add_comment(repo_id, data, c, rows)
+                c_login = c.user.login if c.user else None
                 if c_login and c_login != author_login:
                     has_response = True
                     if c_time and (first_response_at is None or c_time < first_response_at):
                         first_response_at = c_time
-                        first_responder_id = commenter.id if commenter else None
+                        first_responder = c.user
 
-            issue.has_maintainer_response = has_response
-            issue.first_responder_id = first_responder_id
+            row["has_maintainer_response"] = has_response
+            row["first_responder_id"] = first_responder
             if first_response_at and created:
-                issue.time_to_first_response = (first_response_at - created).total_seconds() / 3600.0
-
-    def _sync_issue_labels(self, repo_id, issue, labels_data):
-        """Sync labels for an issue: create Label records, associate, store JSON snapshot."""
-        from app.models import Label
-        label_ids = []
+                row["time_to_first_response"] = (first_response_at - created).total_seconds() / 3600.0
+
+        if complete:
+            row["updated_at"] = data.updated_at
+
+        # The writer queues the issue row before its label links, so a flush
+        # never writes the links without their issue row.
+        rows.add(Issue, row)
+        if label_gh_ids is not None:
+            rows.issue_labels = (data.id, label_gh_ids)
+        return rows
+
+    @staticmethod
+    def _add_comment(repo_id, issue, c, rows):
+        """Add comment `c` on issue record `issue` (row and event) to `rows`.
+        Comments without a resolvable commenter only record the user."""
+        rows.users.append(c.user)
+        if c.user is None or c.user.id is None:
+            return
+        rows.add(Comment, {
+            "github_id": c.id,
+            "repository_id": repo_id,
+            "issue_number": issue.number,
+            "commenter_id": c.user,
+            "created_at": c.created_at,
+        })
+        if c.created_at:
+            rows.event(c.user, "issue_comment", c.created_at, source_id=c.id,
+                       meta={"issue": issue.number})
+
+    def _issue_label_rows(self, repo_id, labels_data, rows):
+        """Add Label rows for an issue's labels to `rows`. Returns the JSON
+        snapshot of label names and the label GitHub ids to associate with
+        the issue."""
+        label_gh_ids = []
         label_names = []
         for lbl in labels_data or []:
-            gh_id = lbl.get("id")
-            name = lbl.get("name")
+            gh_id = lbl.id
+            name = lbl.name
             if not gh_id or not name:
                 continue
             label_names.append(name)
-            # Find or create Label
-            label = self.db.query(Label).filter(Label.github_id == gh_id).first()
-            if not label:
-                label = Label(
-                    github_id=gh_id,
-                    repository_id=repo_id,
-                    name=name,
-                    color=lbl.get("color") or "ffffff",
-                    description=lbl.get("description") or None,
-                )
-                self.db.add(label)
-                self.db.flush()
-            label_ids.append(label.id)
-        # Associate labels to issue
-        issue.labels = self.db.query(Label).filter(Label.id.in_(label_ids)).all() if label_ids else []
-        # Store JSON snapshot for fast queries
-        issue.labels_snapshot = json.dumps(label_names) if label_names else None
-
-    def _upsert_comment(self, repo_id, issue_number, commenter_id, data, created_at):
-        gh_id = data.get("id")
-        comment = self.db.query(Comment).filter(Comment.github_id == gh_id).first() if gh_id else None
-        if not comment:
-            comment = Comment(github_id=gh_id)
-            self.db.add(comment)
-        comment.repository_id = repo_id
-        comment.issue_number = issue_number
-        comment.commenter_id = commenter_id
-        comment.created_at = created_at
-
-    def _sync_commit(self, repo_id, data):
-        gh_author = data.get("author")  # the GitHub user object (may be None)
-        commit = data.get("commit", {})
-        commit_author = commit.get("author", {}) if commit else {}
-        date = _parse_dt(commit_author.get("date"))
-
-        contributor = self._sync_contributor(gh_author) if gh_author else None
-        if not contributor or not date:
-            return  # skip commits without a resolvable GitHub user
-
-        if _is_bot(contributor.login):
-            return
-
-        stats = data.get("stats") or {}
-        self._add_event(
-            repo_id, contributor.id, "commit", date, source_id=data.get("sha"),
-            meta={"additions": stats.get("additions"), "deletions": stats.get("deletions")},
-        )
+            # Created on first sighting; existing labels are left as they are.
+            rows.add(Label, {
+                "github_id": gh_id,
+                "repository_id": repo_id,
+                "name": name,
+                "color": lbl.color or "ffffff",
+                "description": lbl.description or None,
+            })
+            label_gh_ids.append(gh_id)
+        # JSON snapshot for fast queries
+        return (json.dumps(label_names) if label_names else None), label_gh_ids
+
+    def _transform_commit(self, data):
+        """Transform stage for a commit: its contribution event, if any."""
+        author = data.author
+        if author is None or author.id is None:
+            return None  # skip commits without a resolvable GitHub user
+        rows = RowSet()
+        rows.users.append(author)
+        if data.date and not _is_bot(author.login):
+            rows.event(author, "commit", data.date, source_id=data.sha,
+                       meta={"additions": data.additions, "deletions": data.deletions})
+        return rows
 
     # ------------------------------------------------------------------
     # Finalization
@@ -0,0 +1,155 @@
+"""
+Persistent conditional-request cache for GitHub API GETs.
+
+GitHub returns an `ETag` (and usually `Last-Modified`) on every GET. Replaying
+those validators as `If-None-Match` / `If-Modified-Since` lets GitHub answer
+`304 Not Modified` for unchanged resources, and 304s do not count against the
+rate limit. This module stores the last 200 body per URL (+ query params) in a
+small SQLite file so validators survive restarts.
+
+Entries are evicted least-recently-used once the table grows past
+`GITHUB_CACHE_MAX_ENTRIES`. Keys are scoped to the token the response was
+fetched with (see `github_client._cache_key`). The methods do blocking
+SQLite and zlib work; `GitHubClient` calls them via `asyncio.to_thread`.
+"""
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Evict down to this fraction of the cap so we don't evict on every insert.
+_EVICT_TARGET = 0.9
+# Only check the table size every N writes.
+_EVICT_CHECK_EVERY = 200
+
+
+@dataclass
+class CachedResponse:
+    etag: Optional[str]
+    last_modified: Optional[str]
+    body: bytes
+    link: Optional[str]
+
+
+class ResponseCache:
+    """SQLite-backed ETag/Last-Modified store. Thread-safe; process-wide hit/miss counters."""
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " link TEXT,"
+            " body BLOB NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_responses_accessed ON responses (accessed_at)"
+        )
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT etag, last_modified, link, body FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, link, body = row
+        return CachedResponse(etag, last_modified, zlib.decompress(body), link)
+
+    def put(self, key: str, etag: Optional[str], last_modified: Optional[str],
+            link: Optional[str], body: bytes) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, etag, last_modified, link, body, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, etag, last_modified, link, zlib.compress(body), time.time()),
+            )
+            self._writes += 1
+            if self._writes % _EVICT_CHECK_EVERY == 0:
+                self._evict_locked()
+
+    def touch(self, key: str) -> None:
+        """Mark an entry as recently used (after a 304)."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key)
+            )
+
+    def record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _evict_locked(self) -> None:
+        count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        excess = count - int(self.max_entries * _EVICT_TARGET)
+        self._conn.execute(
+            "DELETE FROM responses WHERE key IN ("
+            " SELECT key FROM responses ORDER BY accessed_at LIMIT ?)",
+            (excess,),
+        )
+        logger.info(f"GitHub response cache evicted {excess} entries")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            "enabled": True,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 4) if total else None,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Return the process-wide cache, or None when disabled via settings."""
+    global _cache
+    if not settings.GITHUB_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache(settings.GITHUB_CACHE_PATH, settings.GITHUB_CACHE_MAX_ENTRIES)
+    return _cache
+
+
+def close_response_cache() -> None:
+    global _cache
+    with _cache_lock:
+        if _cache is not None:
+            _cache.close()
+            _cache = None
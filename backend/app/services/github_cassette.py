@@ -0,0 +1,169 @@
+"""
+Record/replay cassettes for GitHub API traffic.
+
+`GITHUB_CASSETTE_MODE=record` appends every response `GitHubClient` returns
+(status, headers incl. Link and X-RateLimit-*, body) to a gzip'd JSON-lines
+file. `GITHUB_CASSETTE_MODE=replay` serves those responses back offline, with
+`GITHUB_CASSETTE_LATENCY_MS` of simulated latency per call, so
+`DataCollector.execute_sync` can be benchmarked and regression-tested without
+network access (see `bench_sync.py`).
+
+Responses are matched on method + URL + query + JSON body, ignoring `since`
+and the dates of search qualifiers such as `created:>=2024-01-01` in `q`
+(both are derived from the clock at sync time). Repeated recordings of the
+same request are replayed in order; the last one is reused once exhausted.
+Request headers (and so tokens) are never written.
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Query/variable names excluded from matching because they change every run.
+_VOLATILE_PARAMS = ("since",)
+# Date values of search qualifiers (`created:>=2024-01-01`,
+# `updated:>=2024-01-01T00:00:00Z`, ranges) in a search `q`.
+_DATE_QUALIFIER = re.compile(r"(\b\w+:[<>]?=?)\d{4}-\d{2}-\d{2}[\w:.*+-]*")
+
+
+def _stable_param(name: str, value: str) -> str:
+    return _DATE_QUALIFIER.sub(r"\1<date>", value) if name == "q" else value
+
+
+def _full_url(url: str, params: Optional[Dict]) -> httpx.URL:
+    """`url` with `params` merged into (not replacing) its existing query."""
+    full = httpx.URL(url)
+    return full.copy_merge_params(params) if params else full
+
+
+def _request_key(method: str, url: str, params: Optional[Dict], body: Optional[Dict]) -> str:
+    full = _full_url(url, params)
+    query = sorted(
+        (k, _stable_param(k, v)) for k, v in full.params.multi_items() if k not in _VOLATILE_PARAMS
+    )
+    key = f"{method} {full.copy_with(query=None)} {query}"
+    if body is not None:
+        body = dict(body)
+        if isinstance(body.get("variables"), dict):
+            body["variables"] = {
+                k: v for k, v in body["variables"].items() if k not in _VOLATILE_PARAMS
+            }
+        key += " " + hashlib.sha1(json.dumps(body, sort_keys=True).encode()).hexdigest()
+    return key
+
+
+class Cassette:
+    def __init__(self, path: str, mode: str, latency_ms: int = 0):
+        self.path = path
+        self.mode = mode
+        self.latency = latency_ms / 1000.0
+        self._lock = threading.Lock()
+        self._file = None
+        self._entries: Dict[str, List[Dict]] = defaultdict(list)
+        self._cursor: Dict[str, int] = defaultdict(int)
+        if mode == "replay":
+            self._load()
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"GitHub cassette not found: {self.path}")
+        count = 0
+        with gzip.open(self.path, "rt", encoding="utf-8") as fh:
+            for line in fh:
+                if line.strip():
+                    entry = json.loads(line)
+                    # Cassettes recorded before date qualifiers were ignored
+                    # hold them in their keys.
+                    self._entries[_DATE_QUALIFIER.sub(r"\1<date>", entry["key"])].append(entry)
+                    count += 1
+        logger.info(f"Loaded {count} recorded GitHub responses from {self.path}")
+
+    def record(self, method: str, url: str, params: Optional[Dict], body: Optional[Dict],
+               response: httpx.Response) -> None:
+        entry = {
+            "key": _request_key(method, url, params, body),
+            "status": response.status_code,
+            "headers": {
+                k: v for k, v in response.headers.items()
+                if k.lower() not in ("content-length", "content-encoding", "transfer-encoding")
+            },
+            "body": response.content.decode("utf-8", errors="replace"),
+        }
+        line = json.dumps(entry) + "\n"
+        with self._lock:
+            if self._file is None:
+                # gzip supports appending members, so successive runs accumulate.
+                self._file = gzip.open(self.path, "at", encoding="utf-8")
+            self._file.write(line)
+
+    async def replay(self, method: str, url: str, params: Optional[Dict],
+                     body: Optional[Dict]) -> httpx.Response:
+        key = _request_key(method, url, params, body)
+        with self._lock:
+            entries = self._entries.get(key)
+            entry = None
+            if entries:
+                idx = self._cursor[key]
+                entry = entries[min(idx, len(entries) - 1)]
+                self._cursor[key] = idx + 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        request = httpx.Request(method, _full_url(url, params))
+        if entry is None:
+            logger.warning(f"No recorded GitHub response for {key}")
+            return httpx.Response(404, json={"message": "Not recorded"}, request=request)
+        return httpx.Response(
+            entry["status"], headers=entry["headers"], content=entry["body"].encode("utf-8"),
+            request=request,
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+_cassette: Optional[Cassette] = None
+_cassette_lock = threading.Lock()
+
+
+def get_cassette() -> Optional[Cassette]:
+    """The process-wide cassette, or None when GITHUB_CASSETTE_MODE is 'off'."""
+    global _cassette
+    if settings.GITHUB_CASSETTE_MODE not in ("record", "replay"):
+        return None
+    if _cassette is None:
+        with _cassette_lock:
+            if _cassette is None:
+                _cassette = Cassette(
+                    settings.GITHUB_CASSETTE_PATH,
+                    settings.GITHUB_CASSETTE_MODE,
+                    settings.GITHUB_CASSETTE_LATENCY_MS,
+                )
+    return _cassette
+
+
+def close_cassette() -> None:
+    global _cassette
+    with _cassette_lock:
+        if _cassette is not None:
+            _cassette.close()
+            _cassette = None
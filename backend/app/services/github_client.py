@@ -1,10 +1,24 @@
-import requests
+import httpx
 import asyncio
+import hashlib
 import logging
 import time
-from typing import List, Dict, Any, Optional
+from collections import deque
+from typing import AsyncIterator, List, Dict, Any, Optional
 from datetime import datetime
 from app.config import get_settings
+from app.services.github_cache import get_response_cache, CachedResponse
+from app.services.github_cassette import get_cassette
+from app.services.rate_limit import get_token_pool, resource_for, SECONDARY_LIMIT_DEFAULT_WAIT
+from app.services.sync_scheduler import INTERACTIVE, get_request_scheduler
+from app.services.github_records import (
+    CommentRecord, CommitRecord, IssueRecord, LabelRecord, PullRequestRecord, ReviewRecord,
+    UserRecord, loads,
+)
+from app.services.github_graphql import (
+    GRAPHQL_PAGE_SIZE, PULL_REQUESTS_QUERY, ISSUES_QUERY,
+    normalize_pull_request, normalize_issue,
+)
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -13,183 +27,640 @@ settings = get_settings()
 MAX_PAGES = 50
 
 
+class GitHubAPIError(Exception):
+    """A failed GitHub request. `status_code` is the HTTP status GitHub
+    answered with, or None when no response was received."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+    @classmethod
+    def wrap(cls, error: httpx.HTTPError) -> "GitHubAPIError":
+        status = error.response.status_code if isinstance(error, httpx.HTTPStatusError) else None
+        return cls(f"GitHub API error: {error}", status)
+
+
+class Page(list):
+    """One page of a listing. `next_cursor` resumes the listing right after
+    this page (the next page's URL for REST, the endCursor for GraphQL); it
+    is None on the last page."""
+    __slots__ = ("next_cursor",)
+
+    def __init__(self, items=(), next_cursor: Optional[str] = None):
+        super().__init__(items)
+        self.next_cursor = next_cursor
+
+# HTTP/2 is negotiated only when the optional `h2` package is installed
+# (`httpx[http2]`); otherwise httpx falls back to HTTP/1.1 keep-alive.
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+# Process-wide pooled async client. A fresh connection per call paid a TCP+TLS
+# handshake for every review/label/comment fetch; one shared, keep-alive pool
+# lets those connections be reused, and non-blocking sockets let many requests
+# be in flight without pinning a thread each.
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared AsyncClient for the running event loop.
+
+    An AsyncClient is bound to the loop it was first used on, so a new one is
+    created if the loop changed (e.g. scripts calling `asyncio.run` twice);
+    the previous one is closed, see `_discard_client`.
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        if _client is not None and not _client.is_closed:
+            _discard_client(_client, _client_loop)
+        limits = httpx.Limits(
+            max_connections=settings.GITHUB_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.GITHUB_MAX_CONCURRENCY,
+        )
+        _client = httpx.AsyncClient(
+            limits=limits, timeout=httpx.Timeout(30.0), http2=HTTP2_AVAILABLE
+        )
+        _client_loop = loop
+    return _client
+
+
+def _discard_client(client: httpx.AsyncClient, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+    """Close a shared client bound to another event loop. Its connections can
+    only be closed on that loop: if it still runs (another thread) the close
+    is scheduled there; a closed loop's sockets are released when the pool is
+    garbage-collected."""
+    if loop is not None and loop.is_running() and not loop.is_closed():
+        asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+        return
+    logger.info("Event loop changed; dropping the HTTP connection pool bound to the previous loop")
+
+
+async def close_http_client() -> None:
+    """Close the shared AsyncClient (called on app shutdown). Safe to call twice."""
+    global _client, _client_loop
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
+
+
+def _cache_key(url: str, token: Optional[str]) -> str:
+    """ETag cache key: the full URL, scoped to the token (by fingerprint) so a
+    response cached for one token is never revalidated with or served to
+    another."""
+    scope = hashlib.sha256(token.encode()).hexdigest()[:16] if token else "anonymous"
+    return f"{scope} {url}"
+
+
 class GitHubClient:
-    def __init__(self):
-        self.base_url = "https://api.github.com"
+    def __init__(self, tenant: str = None, priority: str = INTERACTIVE):
+        self.base_url = settings.GITHUB_API_URL.rstrip("/")
         self.headers = {
             "Accept": "application/vnd.github.v3+json",
-            "Authorization": f"Bearer {settings.GITHUB_TOKEN}" if settings.GITHUB_TOKEN else ""
         }
-        if not settings.GITHUB_TOKEN:
+        if not settings.github_tokens:
             logger.warning("No GitHub token provided. Rate limits will be restricted.")
+        self.cache = get_response_cache()
+        self.cassette = get_cassette()
+        # Authorization is chosen per request from the shared token pool.
+        self.tokens = get_token_pool()
+        # Requests take a global slot, shared fairly by tenant (the repository
+        # being synced) and weighted by priority.
+        self.tenant = tenant
+        self.priority = priority
+        # Per-client counters; a sync uses one client, so these are per-sync.
+        self.stats = {
+            "requests": 0, "cache_hits": 0, "cache_misses": 0, "rate_limit_wait": 0.0,
+            # Response bytes off the wire, and summed request round-trip time
+            "bytes_received": 0, "request_seconds": 0.0,
+        }
+
+    async def _raw_request(
+        self, method: str, url: str, params: Dict = None, json: Dict = None
+    ) -> httpx.Response:
+        """Non-blocking request with rate-limit aware retry. Returns the Response."""
+        if self.cassette is not None and self.cassette.replaying:
+            # Offline replay: no network, cache or rate-limit budget involved.
+            response = await self.cassette.replay(method, url, params, json)
+            self.stats["requests"] += 1
+            self.stats["bytes_received"] += len(response.content)
+            response.raise_for_status()
+            return response
 
-    def _raw_request(self, method: str, url: str, params: Dict = None) -> requests.Response:
-        """Blocking request with rate-limit aware retry. Returns the Response."""
         attempts = 0
-        with requests.Session() as session:
-            while True:
-                attempts += 1
-                response = session.request(
-                    method, url, headers=self.headers, params=params, timeout=30
+        client = get_http_client()
+
+        # Conditional GET: replay stored validators so unchanged resources come
+        # back as 304 (free against the rate limit) and are served from disk.
+        cache_url = None
+        if method == "GET" and self.cache is not None:
+            # Merge params into the URL's own query: Link-followed page URLs
+            # carry their page number there, and httpx.URL(url, params=...)
+            # would replace it.
+            full_url = httpx.URL(url)
+            cache_url = str(full_url.copy_merge_params(params) if params else full_url)
+
+        resource = resource_for(url)
+        scheduler = get_request_scheduler()
+        while True:
+            attempts += 1
+            # Route to the token with the most budget, then wait on its
+            # shared governor instead of bursting into 403s. Re-chosen on
+            # every retry so a limited token rotates out.
+            token, governor = self.tokens.choose(resource)
+            self.stats["rate_limit_wait"] += await governor.acquire(resource)
+            request_headers = dict(self.headers)
+            if token:
+                request_headers["Authorization"] = f"Bearer {token}"
+            cache_key = cached = None
+            if cache_url is not None:
+                cache_key = _cache_key(cache_url, token)
+                cached = await asyncio.to_thread(self.cache.get, cache_key)
+                if cached is not None:
+                    if cached.etag:
+                        request_headers["If-None-Match"] = cached.etag
+                    if cached.last_modified:
+                        request_headers["If-Modified-Since"] = cached.last_modified
+            # The slot covers only the HTTP call, so a request waiting on the
+            # rate limit or the cache doesn't keep other tenants waiting.
+            async with scheduler.slot(self.tenant, self.priority):
+                sent = time.perf_counter()
+                response = await client.request(
+                    method, url, headers=request_headers, params=params, json=json
                 )
+                self.stats["request_seconds"] += time.perf_counter() - sent
+            self.stats["requests"] += 1
+            self.stats["bytes_received"] += response.num_bytes_downloaded
+            governor.observe(resource, response.headers)
 
-                # Primary rate limit: 403/429 with remaining == 0
-                remaining = response.headers.get("X-RateLimit-Remaining")
-                if response.status_code in (403, 429):
-                    retry_after = response.headers.get("Retry-After")
-                    reset = response.headers.get("X-RateLimit-Reset")
-                    wait = None
-                    if retry_after:
-                        wait = int(retry_after)
-                    elif remaining == "0" and reset:
-                        wait = max(0, int(reset) - int(time.time())) + 1
-                    if wait is not None and attempts <= 5:
-                        wait = min(wait, 60)
-                        logger.warning(
-                            f"Rate limited (status={response.status_code}). "
-                            f"Backing off {wait}s (attempt {attempts})."
-                        )
-                        time.sleep(wait)
-                        continue
+            if response.status_code in (403, 429) and attempts <= 5:
+                retry_after = response.headers.get("Retry-After")
+                if retry_after and retry_after.isdigit():
+                    # Secondary limit: pause every request on this token.
+                    governor.pause(int(retry_after))
+                    continue
+                if response.headers.get("X-RateLimit-Remaining") == "0":
+                    # Primary limit: the bucket is now empty, so the next
+                    # acquire() waits for X-RateLimit-Reset.
+                    logger.warning(f"Rate limited (status={response.status_code}), attempt {attempts}.")
+                    continue
+                if response.status_code == 429 or "secondary rate limit" in response.text.lower():
+                    governor.pause(SECONDARY_LIMIT_DEFAULT_WAIT)
+                    continue
 
-                # Proactively slow down when nearly exhausted
-                if remaining is not None and remaining.isdigit() and int(remaining) <= 2:
-                    reset = response.headers.get("X-RateLimit-Reset")
-                    if reset:
-                        wait = max(0, int(reset) - int(time.time())) + 1
-                        logger.warning(f"Rate limit nearly exhausted. Sleeping {min(wait,60)}s.")
-                        time.sleep(min(wait, 60))
+            if response.status_code == 304 and cached is not None:
+                response = await self._serve_cached(cache_key, cached, response)
+            elif cache_key is not None and response.is_success:
+                await self._store_cached(cache_key, response)
+            if self.cassette is not None:
+                self.cassette.record(method, url, params, json, response)
 
-                response.raise_for_status()
-                return response
+            response.raise_for_status()
+            return response
 
-    async def _request(self, method: str, endpoint: str, params: Dict = None) -> Any:
-        def sync_request():
-            resp = self._raw_request(method, f"{self.base_url}{endpoint}", params)
-            return resp.json()
+    async def _serve_cached(self, key: str, cached: CachedResponse,
+                            response: httpx.Response) -> httpx.Response:
+        """Rebuild a 200 Response from the cache entry, keeping the live rate-limit headers."""
+        await asyncio.to_thread(self.cache.touch, key)
+        self.cache.record(hit=True)
+        self.stats["cache_hits"] += 1
+        headers = {
+            k: v for k, v in response.headers.items()
+            if k.lower() not in ("content-length", "content-encoding", "transfer-encoding")
+        }
+        if cached.link:
+            headers["Link"] = cached.link
+        return httpx.Response(200, headers=headers, content=cached.body, request=response.request)
 
+    async def _store_cached(self, key: str, response: httpx.Response) -> None:
+        self.cache.record(hit=False)
+        self.stats["cache_misses"] += 1
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            await asyncio.to_thread(
+                self.cache.put, key, etag, last_modified, response.headers.get("Link"),
+                response.content,
+            )
+
+    async def _request(self, method: str, endpoint: str, params: Dict = None) -> Any:
         try:
-            return await asyncio.to_thread(sync_request)
-        except requests.RequestException as e:
+            resp = await self._raw_request(method, f"{self.base_url}{endpoint}", params)
+            return loads(resp.content)
+        except httpx.HTTPError as e:
             logger.error(f"GitHub API error: {e}")
-            raise Exception(f"GitHub API error: {e}")
+            raise GitHubAPIError.wrap(e)
 
-    async def _paginate(
+    @staticmethod
+    def _before_since(raw: Optional[str], since: datetime) -> bool:
+        """True if the ISO timestamp `raw` predates `since` (unparseable -> False)."""
+        if not raw:
+            return False
+        try:
+            return datetime.fromisoformat(raw.replace("Z", "+00:00")).replace(tzinfo=None) < since
+        except (ValueError, AttributeError):
+            return False
+
+    @staticmethod
+    def _links(resp: httpx.Response) -> Dict[str, str]:
+        """Parse the Link header into {rel: url}."""
+        links = {}
+        link = resp.headers.get("Link")
+        if link:
+            for part in link.split(","):
+                segs = part.split(";")
+                if len(segs) >= 2 and "rel=" in segs[1]:
+                    rel = segs[1].split("=", 1)[1].strip().strip('"')
+                    links[rel] = segs[0].strip().strip("<>")
+        return links
+
+    @classmethod
+    def _next_link(cls, resp: httpx.Response) -> Optional[str]:
+        """URL of the rel="next" page from the Link header, if any."""
+        return cls._links(resp).get("next")
+
+    @classmethod
+    def _remaining_page_urls(cls, resp: httpx.Response, max_pages: Optional[int],
+                             first_page: int = 1) -> List[str]:
+        """URLs for the pages after `first_page` up to last when the Link
+        header gives a page-numbered rel="last"; empty for single-page or
+        cursor-paginated listings."""
+        links = cls._links(resp)
+        if "next" not in links or "last" not in links:
+            return []
+        last = httpx.URL(links["last"])
+        page = last.params.get("page")
+        if not page or not page.isdigit():
+            return []
+        last_page = int(page) if max_pages is None else min(int(page), max_pages)
+        return [str(last.copy_set_param("page", n)) for n in range(first_page + 1, last_page + 1)]
+
+    async def _iter_pages(
         self,
         endpoint: str,
         params: Dict = None,
         since: Optional[datetime] = None,
         date_key: str = "updated_at",
-        max_pages: int = MAX_PAGES,
-    ) -> List[Dict]:
+        max_pages: Optional[int] = MAX_PAGES,
+        cursor: Optional[str] = None,
+    ) -> AsyncIterator[Page]:
         """
-        Follow Link headers and accumulate results.
+        Follow Link headers, yielding each page as it arrives. `cursor` (a
+        page's `next_cursor`) resumes an earlier walk of the same listing.
+        Stops after `max_pages` pages (None: no cap).
         If `since` is provided, stops paginating once items predate the window.
         Assumes the caller sorts by `updated`/`created` descending so older items
         appear on later pages.
+
+        The next page is requested before the current one is yielded, so the
+        caller's processing overlaps the following fetch while at most two
+        pages are held in memory.
+
+        Listings with no early-stop cutoff that advertise a page-numbered
+        rel="last" are fanned out instead: the remaining pages up to last are
+        fetched concurrently and still yielded in order.
         """
         params = dict(params or {})
         params.setdefault("per_page", 100)
+        early_stop = since is not None and bool(date_key)
 
-        def sync_paginate():
-            results: List[Dict] = []
-            url = f"{self.base_url}{endpoint}"
-            page_params = params
-            pages = 0
-            while url and pages < max_pages:
-                resp = self._raw_request("GET", url, page_params)
-                batch = resp.json()
+        first_page = 1
+        if cursor:
+            # The cursor is a Link URL, which already carries the query.
+            page_param = httpx.URL(cursor).params.get("page", "")
+            first_page = int(page_param) if page_param.isdigit() else 1
+            pending = asyncio.ensure_future(self._raw_request("GET", cursor))
+        else:
+            pending = asyncio.ensure_future(
+                self._raw_request("GET", f"{self.base_url}{endpoint}", params)
+            )
+        # Page numbers count from the start of the listing, resumed or not.
+        pages = first_page - 1
+        try:
+            while pending is not None:
+                resp = await pending
+                pending = None
+                batch = loads(resp.content)
                 if not isinstance(batch, list):
-                    return batch
+                    logger.warning(f"Expected a list from {endpoint}, got {type(batch).__name__}")
+                    return
                 pages += 1
 
                 stop = False
+                items = []
                 for item in batch:
-                    if since is not None and date_key:
-                        raw = item.get(date_key)
-                        if raw:
-                            try:
-                                dt = datetime.fromisoformat(
-                                    raw.replace("Z", "+00:00")
-                                ).replace(tzinfo=None)
-                                if dt < since:
-                                    stop = True
-                                    continue
-                            except (ValueError, AttributeError):
-                                pass
-                    results.append(item)
-
-                if stop:
-                    break
-
-                # Follow Link header for next page
-                next_url = None
-                link = resp.headers.get("Link")
-                if link:
-                    for part in link.split(","):
-                        segs = part.split(";")
-                        if len(segs) >= 2 and 'rel="next"' in segs[1]:
-                            next_url = segs[0].strip().strip("<>")
-                            break
-                url = next_url
-                page_params = None  # next_url already carries query params
-            return results
+                    if early_stop and self._before_since(item.get(date_key), since):
+                        stop = True
+                        continue
+                    items.append(item)
 
-        try:
-            return await asyncio.to_thread(sync_paginate)
-        except requests.RequestException as e:
+                if pages == first_page and not early_stop:
+                    page_urls = self._remaining_page_urls(resp, max_pages, first_page)
+                    if page_urls:
+                        if items:
+                            yield Page(items, page_urls[0])
+                        async for page in self._fan_out_pages(page_urls):
+                            yield page
+                        return
+
+                capped = max_pages is not None and pages >= max_pages
+                next_url = None if stop or capped else self._next_link(resp)
+                if next_url:
+                    # next_url already carries query params
+                    pending = asyncio.ensure_future(self._raw_request("GET", next_url))
+                if items:
+                    yield Page(items, next_url)
+        except httpx.HTTPError as e:
             logger.error(f"GitHub API pagination error: {e}")
-            raise Exception(f"GitHub API error: {e}")
+            raise GitHubAPIError.wrap(e)
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    async def _fan_out_pages(self, urls: List[str]) -> AsyncIterator[Page]:
+        """Fetch `urls` concurrently and yield their pages in order. At most
+        GITHUB_MAX_CONCURRENCY pages are in flight or waiting to be yielded
+        (each request still waits on the rate-limit governor); the next one is
+        requested once the oldest has been yielded, so memory stays bounded
+        however many pages the listing has."""
+        window = max(1, settings.GITHUB_MAX_CONCURRENCY)
+        pending = deque()
+        scheduled = 0
+        try:
+            while scheduled < len(urls) or pending:
+                while scheduled < len(urls) and len(pending) < window:
+                    pending.append(asyncio.ensure_future(self._raw_request("GET", urls[scheduled])))
+                    scheduled += 1
+                i = scheduled - len(pending)
+                batch = loads((await pending.popleft()).content)
+                if isinstance(batch, list) and batch:
+                    yield Page(batch, urls[i + 1] if i + 1 < len(urls) else None)
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _paginate(
+        self,
+        endpoint: str,
+        params: Dict = None,
+        since: Optional[datetime] = None,
+        date_key: str = "updated_at",
+        max_pages: int = MAX_PAGES,
+    ) -> List[Dict]:
+        """Accumulate every page from `_iter_pages` into one list."""
+        results: List[Dict] = []
+        async for page in self._iter_pages(endpoint, params, since, date_key, max_pages):
+            results.extend(page)
+        return results
+
+    async def _graphql(self, query: str, variables: Dict) -> Dict:
+        """POST a GraphQL query and return its `data`, raising on GraphQL errors."""
+        try:
+            resp = await self._raw_request(
+                "POST", f"{self.base_url}/graphql", json={"query": query, "variables": variables}
+            )
+            payload = loads(resp.content)
+            governor = self.tokens.governor_for(resp.request.headers.get("Authorization"))
+        except httpx.HTTPError as e:
+            logger.error(f"GitHub GraphQL error: {e}")
+            raise GitHubAPIError.wrap(e)
+        if payload.get("errors"):
+            messages = "; ".join(err.get("message", "") for err in payload["errors"])
+            logger.error(f"GitHub GraphQL error: {messages}")
+            raise Exception(f"GitHub GraphQL error: {messages}")
+        data = payload.get("data") or {}
+        # Cost-based throttling: the governor paces later queries by their cost.
+        governor.observe_graphql(data.get("rateLimit"))
+        return data
+
+    async def _iter_graphql_pages(
+        self,
+        query: str,
+        variables: Dict,
+        connection: str,
+        since: Optional[datetime] = None,
+        max_pages: int = MAX_PAGES * 100 // GRAPHQL_PAGE_SIZE,
+        cursor: Optional[str] = None,
+    ) -> AsyncIterator[Page]:
+        """Walk a `repository.<connection>` cursor, yielding raw nodes per page.
+        Like `_iter_pages`, stops once nodes (ordered UPDATED_AT desc) predate
+        `since`, prefetches the next page while the caller works and resumes
+        after `cursor` when given."""
+        def fetch(after):
+            return asyncio.ensure_future(self._graphql(
+                query, {**variables, "first": GRAPHQL_PAGE_SIZE, "after": after}
+            ))
+
+        pages = 0
+        pending = fetch(cursor)
+        try:
+            while pending is not None:
+                data = await pending
+                pending = None
+                pages += 1
+                conn = ((data.get("repository") or {}).get(connection)) or {}
+                stop = False
+                nodes = []
+                for node in conn.get("nodes") or []:
+                    if node is None:
+                        continue
+                    if since is not None and self._before_since(node.get("updatedAt"), since):
+                        stop = True
+                        continue
+                    nodes.append(node)
+                page_info = conn.get("pageInfo") or {}
+                next_cursor = None
+                if not stop and pages < max_pages and page_info.get("hasNextPage"):
+                    next_cursor = page_info.get("endCursor")
+                    pending = fetch(next_cursor)
+                if nodes:
+                    yield Page(nodes, next_cursor)
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    async def iter_pull_requests_graphql(
+        self, owner: str, repo: str, since: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+    ) -> AsyncIterator[Page]:
+        """Pages of PRs with nested `reviews`, one GraphQL query per page."""
+        async for nodes in self._iter_graphql_pages(
+            PULL_REQUESTS_QUERY, {"owner": owner, "name": repo}, "pullRequests",
+            since=since, cursor=cursor,
+        ):
+            yield Page(
+                (normalize_pull_request(n) for n in nodes if n.get("databaseId") is not None),
+                nodes.next_cursor,
+            )
+
+    async def iter_issues_graphql(
+        self, owner: str, repo: str, since: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+    ) -> AsyncIterator[Page]:
+        """Pages of issues with nested `labels`, `assignee` and `comment_list`."""
+        labels = await self.get_repo_labels(owner, repo)
+        label_ids = {lbl.name: lbl.id for lbl in labels if lbl.name}
+        variables = {"owner": owner, "name": repo}
+        if since is not None:
+            variables["since"] = since.replace(microsecond=0).isoformat() + "Z"
+        async for nodes in self._iter_graphql_pages(
+            ISSUES_QUERY, variables, "issues", since=since, cursor=cursor
+        ):
+            yield Page(
+                (normalize_issue(n, label_ids) for n in nodes if n.get("databaseId") is not None),
+                nodes.next_cursor,
+            )
+
+    async def get_pull_requests_graphql(
+        self, owner: str, repo: str, since: Optional[datetime] = None
+    ) -> List[PullRequestRecord]:
+        return [pr async for page in self.iter_pull_requests_graphql(owner, repo, since) for pr in page]
+
+    async def get_issues_graphql(
+        self, owner: str, repo: str, since: Optional[datetime] = None
+    ) -> List[IssueRecord]:
+        return [i async for page in self.iter_issues_graphql(owner, repo, since) for i in page]
+
+    async def get_repo_labels(self, owner: str, repo: str) -> List[LabelRecord]:
+        return [LabelRecord.from_api(lbl) for lbl in await self._paginate(f"/repos/{owner}/{repo}/labels")]
 
     async def get_repository(self, owner: str, repo: str) -> Dict:
         return await self._request("GET", f"/repos/{owner}/{repo}")
 
+    @staticmethod
+    def _pull_request_params(state: str) -> Dict:
+        return {"state": state, "per_page": 100, "sort": "updated", "direction": "desc"}
+
+    @staticmethod
+    def _issue_params(state: str, since: Optional[datetime]) -> Dict:
+        params = {"state": state, "per_page": 100, "sort": "updated", "direction": "desc"}
+        if since is not None:
+            params["since"] = since.replace(microsecond=0).isoformat() + "Z"
+        return params
+
+    @staticmethod
+    def _commit_params(since: Optional[datetime]) -> Dict:
+        params = {"per_page": 100}
+        if since is not None:
+            params["since"] = since.replace(microsecond=0).isoformat() + "Z"
+        return params
+
     async def get_pull_requests(
         self, owner: str, repo: str, state: str = "all", since: Optional[datetime] = None
-    ) -> List[Dict]:
-        params = {"state": state, "per_page": 100, "sort": "updated", "direction": "desc"}
-        return await self._paginate(
-            f"/repos/{owner}/{repo}/pulls", params=params, since=since, date_key="updated_at"
+    ) -> List[PullRequestRecord]:
+        prs = await self._paginate(
+            f"/repos/{owner}/{repo}/pulls", params=self._pull_request_params(state),
+            since=since, date_key="updated_at",
         )
+        return [PullRequestRecord.from_api(pr) for pr in prs]
+
+    async def iter_pull_requests(
+        self, owner: str, repo: str, state: str = "all", since: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+    ) -> AsyncIterator[Page]:
+        """Like `get_pull_requests`, but yields one page at a time, optionally
+        resuming after an earlier page's `next_cursor`."""
+        async for page in self._iter_pages(
+            f"/repos/{owner}/{repo}/pulls", params=self._pull_request_params(state),
+            since=since, date_key="updated_at", cursor=cursor,
+        ):
+            yield Page(map(PullRequestRecord.from_api, page), page.next_cursor)
 
     async def get_issues(
         self, owner: str, repo: str, state: str = "all", since: Optional[datetime] = None
-    ) -> List[Dict]:
+    ) -> List[IssueRecord]:
         # Excludes PRs (GitHub API returns PRs as issues)
-        params = {"state": state, "per_page": 100, "sort": "updated", "direction": "desc"}
-        if since is not None:
-            params["since"] = since.replace(microsecond=0).isoformat() + "Z"
         issues = await self._paginate(
-            f"/repos/{owner}/{repo}/issues", params=params, since=since, date_key="updated_at"
+            f"/repos/{owner}/{repo}/issues", params=self._issue_params(state, since),
+            since=since, date_key="updated_at",
         )
-        return [i for i in issues if "pull_request" not in i]
+        return [IssueRecord.from_api(i) for i in issues if "pull_request" not in i]
+
+    async def iter_issues(
+        self, owner: str, repo: str, state: str = "all", since: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+    ) -> AsyncIterator[Page]:
+        """Like `get_issues` (PRs excluded), but yields one page at a time,
+        optionally resuming after an earlier page's `next_cursor`. A page
+        holding only PRs is yielded empty so its cursor is not lost."""
+        async for page in self._iter_pages(
+            f"/repos/{owner}/{repo}/issues", params=self._issue_params(state, since),
+            since=since, date_key="updated_at", cursor=cursor,
+        ):
+            yield Page(
+                (IssueRecord.from_api(i) for i in page if "pull_request" not in i),
+                page.next_cursor,
+            )
 
-    async def get_pr_reviews(self, owner: str, repo: str, pr_number: int) -> List[Dict]:
-        return await self._paginate(f"/repos/{owner}/{repo}/pulls/{pr_number}/reviews")
+    async def get_pr_reviews(self, owner: str, repo: str, pr_number: int) -> List[ReviewRecord]:
+        reviews = await self._paginate(f"/repos/{owner}/{repo}/pulls/{pr_number}/reviews")
+        return [ReviewRecord.from_api(r) for r in reviews]
 
-    async def get_issue_comments(self, owner: str, repo: str, issue_number: int) -> List[Dict]:
-        return await self._paginate(f"/repos/{owner}/{repo}/issues/{issue_number}/comments")
+    async def get_issue_comments(self, owner: str, repo: str, issue_number: int) -> List[CommentRecord]:
+        comments = await self._paginate(f"/repos/{owner}/{repo}/issues/{issue_number}/comments")
+        return [CommentRecord.from_api(c) for c in comments]
+
+    async def get_repo_issue_comments(
+        self, owner: str, repo: str, since: Optional[datetime] = None
+    ) -> Dict[int, List[CommentRecord]]:
+        """Every issue/PR comment in the repo updated since `since`, from the
+        repo-wide listing (100 per page), grouped by issue number."""
+        params = {"per_page": 100, "sort": "updated", "direction": "asc"}
+        if since is not None:
+            params["since"] = since.replace(microsecond=0).isoformat() + "Z"
+        # `since` is applied server-side and the order is ascending, so there
+        # is no early stop; the Link rel="last" fan-out applies. Not capped at
+        # MAX_PAGES: ascending order would drop the newest comments.
+        by_issue: Dict[int, List[CommentRecord]] = {}
+        async for page in self._iter_pages(
+            f"/repos/{owner}/{repo}/issues/comments", params=params, date_key=None,
+            max_pages=None,
+        ):
+            for raw in page:
+                comment = CommentRecord.from_api(raw)
+                if comment.issue_number is not None:
+                    by_issue.setdefault(comment.issue_number, []).append(comment)
+        return by_issue
 
-    async def get_issue_labels(self, owner: str, repo: str, issue_number: int) -> List[Dict]:
+    async def get_issue_labels(self, owner: str, repo: str, issue_number: int) -> List[LabelRecord]:
         """Fetch labels for a specific issue."""
-        return await self._paginate(f"/repos/{owner}/{repo}/issues/{issue_number}/labels")
+        labels = await self._paginate(f"/repos/{owner}/{repo}/issues/{issue_number}/labels")
+        return [LabelRecord.from_api(lbl) for lbl in labels]
 
     async def get_issue_events(self, owner: str, repo: str, issue_number: int) -> List[Dict]:
         """Fetch timeline events (assigned, labeled, etc.) for an issue."""
         return await self._paginate(f"/repos/{owner}/{repo}/issues/{issue_number}/events")
 
-    async def get_contributors(self, owner: str, repo: str) -> List[Dict]:
-        return await self._paginate(f"/repos/{owner}/{repo}/contributors", params={"per_page": 100})
+    async def get_contributors(self, owner: str, repo: str) -> List[UserRecord]:
+        users = await self._paginate(f"/repos/{owner}/{repo}/contributors", params={"per_page": 100})
+        return [u for u in map(UserRecord.from_api, users) if u is not None]
 
     async def get_commits(
         self, owner: str, repo: str, since: Optional[datetime] = None
-    ) -> List[Dict]:
-        params = {"per_page": 100}
-        if since is not None:
-            params["since"] = since.replace(microsecond=0).isoformat() + "Z"
-        return await self._paginate(
-            f"/repos/{owner}/{repo}/commits", params=params, since=since, date_key=None
+    ) -> List[CommitRecord]:
+        commits = await self._paginate(
+            f"/repos/{owner}/{repo}/commits", params=self._commit_params(since),
+            since=since, date_key=None,
         )
+        return [CommitRecord.from_api(c) for c in commits]
+
+    async def iter_commits(
+        self, owner: str, repo: str, since: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+    ) -> AsyncIterator[Page]:
+        """Like `get_commits`, but yields one page at a time, optionally
+        resuming after an earlier page's `next_cursor`."""
+        async for page in self._iter_pages(
+            f"/repos/{owner}/{repo}/commits", params=self._commit_params(since),
+            since=since, date_key=None, cursor=cursor,
+        ):
+            yield Page(map(CommitRecord.from_api, page), page.next_cursor)
 
     async def search_issues(self, query: str) -> Dict:
         """Use Search API to get counts and items"""
@@ -0,0 +1,157 @@
+"""
+GraphQL queries and REST-shape normalizers for bulk ingestion.
+
+The REST path needs one extra pagination per PR (reviews) and up to two per
+issue (labels, comments). The GraphQL path fetches PRs/issues in pages with
+those children nested, then builds the same records (`github_records`) the
+REST path produces so `DataCollector._fetch_pr` / `_fetch_issue` consume it
+unchanged.
+
+Nested connections are capped (see *_FIRST below). When a node has more
+children than were fetched, the normalizer sets that child list to None and
+the collector falls back to the per-item REST call for just that item.
+"""
+from typing import Dict, List, Optional
+
+from app.services.github_records import (
+    CommentRecord, IssueRecord, LabelRecord, PullRequestRecord, ReviewRecord, UserRecord,
+    parse_dt,
+)
+
+# Items per top-level page. Nested connections multiply query cost, so this is
+# lower than the REST page size.
+GRAPHQL_PAGE_SIZE = 50
+REVIEWS_FIRST = 50
+LABELS_FIRST = 20
+COMMENTS_FIRST = 20
+
+_ACTOR_FIELDS = """
+    __typename login avatarUrl url
+    ... on User { databaseId }
+    ... on Bot { databaseId }
+    ... on Mannequin { databaseId }
+"""
+
+PULL_REQUESTS_QUERY = """
+query($owner: String!, $name: String!, $first: Int!, $after: String) {
+  rateLimit { cost remaining resetAt }
+  repository(owner: $owner, name: $name) {
+    pullRequests(first: $first, after: $after, orderBy: {field: UPDATED_AT, direction: DESC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        databaseId number title state createdAt updatedAt closedAt mergedAt
+        author { %(actor)s }
+        reviews(first: %(reviews)d) {
+          totalCount
+          nodes { databaseId state submittedAt author { %(actor)s } }
+        }
+      }
+    }
+  }
+}
+""" % {"actor": _ACTOR_FIELDS, "reviews": REVIEWS_FIRST}
+
+ISSUES_QUERY = """
+query($owner: String!, $name: String!, $first: Int!, $after: String, $since: DateTime) {
+  rateLimit { cost remaining resetAt }
+  repository(owner: $owner, name: $name) {
+    issues(first: $first, after: $after, orderBy: {field: UPDATED_AT, direction: DESC},
+           filterBy: {since: $since}) {
+      pageInfo { hasNextPage endCursor }
+      nodes {
+        databaseId number title state createdAt updatedAt closedAt
+        author { %(actor)s }
+        assignees(first: 1) { nodes { %(actor)s } }
+        labels(first: %(labels)d) { totalCount nodes { name color description } }
+        comments(first: %(comments)d) {
+          totalCount
+          nodes { databaseId createdAt author { %(actor)s } }
+        }
+      }
+    }
+  }
+}
+""" % {"actor": _ACTOR_FIELDS, "labels": LABELS_FIRST, "comments": COMMENTS_FIRST}
+
+
+def _user(actor: Optional[Dict]) -> Optional[UserRecord]:
+    """GraphQL Actor -> UserRecord. Bots get the REST-style `[bot]` suffix."""
+    if not actor or actor.get("databaseId") is None:
+        return None
+    login = actor.get("login")
+    if actor.get("__typename") == "Bot" and login and not login.endswith("[bot]"):
+        login = f"{login}[bot]"
+    return UserRecord(actor["databaseId"], login, actor.get("avatarUrl"), actor.get("url"))
+
+
+def normalize_pull_request(node: Dict) -> PullRequestRecord:
+    """GraphQL PullRequest -> PullRequestRecord with nested `reviews`
+    (None when the PR has more reviews than were fetched)."""
+    reviews_conn = node.get("reviews") or {}
+    review_nodes = reviews_conn.get("nodes") or []
+    reviews = None
+    if reviews_conn.get("totalCount", 0) <= len(review_nodes):
+        reviews = [
+            ReviewRecord(
+                r.get("databaseId"), r.get("state"), parse_dt(r.get("submittedAt")),
+                _user(r.get("author")),
+            )
+            for r in review_nodes
+        ]
+    return PullRequestRecord(
+        node["databaseId"],
+        node["number"],
+        node.get("title"),
+        "open" if node.get("state") == "OPEN" else "closed",
+        parse_dt(node.get("createdAt")),
+        parse_dt(node.get("updatedAt")),
+        parse_dt(node.get("closedAt")),
+        parse_dt(node.get("mergedAt")),
+        _user(node.get("author")),
+        reviews=reviews,
+    )
+
+
+def normalize_issue(node: Dict, label_ids: Dict[str, int]) -> IssueRecord:
+    """GraphQL Issue -> IssueRecord with nested `labels` / `comment_list`.
+
+    GraphQL labels carry no REST database id, so they are resolved by name via
+    `label_ids` (from the repo label listing). Unresolvable or truncated
+    children are set to None so the collector refetches them over REST.
+    """
+    assignees = (node.get("assignees") or {}).get("nodes") or []
+
+    labels_conn = node.get("labels") or {}
+    label_nodes = labels_conn.get("nodes") or []
+    labels: Optional[List[LabelRecord]] = None
+    if labels_conn.get("totalCount", 0) <= len(label_nodes) and all(
+        lbl.get("name") in label_ids for lbl in label_nodes
+    ):
+        labels = [
+            LabelRecord(label_ids[lbl["name"]], lbl["name"], lbl.get("color"), lbl.get("description"))
+            for lbl in label_nodes
+        ]
+
+    comments_conn = node.get("comments") or {}
+    comment_nodes = comments_conn.get("nodes") or []
+    comments = None
+    if comments_conn.get("totalCount", 0) <= len(comment_nodes):
+        comments = [
+            CommentRecord(c.get("databaseId"), parse_dt(c.get("createdAt")), _user(c.get("author")))
+            for c in comment_nodes
+        ]
+
+    return IssueRecord(
+        node["databaseId"],
+        node["number"],
+        node.get("title"),
+        (node.get("state") or "").lower(),
+        parse_dt(node.get("createdAt")),
+        parse_dt(node.get("updatedAt")),
+        parse_dt(node.get("closedAt")),
+        _user(node.get("author")),
+        _user(assignees[0]) if assignees else None,
+        comments_conn.get("totalCount", 0),
+        labels=labels,
+        comment_list=comments,
+    )
@@ -0,0 +1,203 @@
+"""
+Compact, field-projected records for GitHub payloads.
+
+A REST PR or issue object carries nested head/base repositories, full user
+blobs and dozens of URLs, but the collector reads fewer than 15 fields. The
+client projects each item into one of these `__slots__` records as soon as a
+page is decoded, so the raw dicts can be freed straight away. Timestamps are
+parsed once here into naive UTC datetimes.
+
+`loads` decodes with orjson (a requirement; several times faster than the
+stdlib on large pages). The stdlib fallback only keeps an environment
+missing it working, and logs a warning.
+"""
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+try:
+    import orjson
+
+    def loads(data: bytes):
+        return orjson.loads(data)
+except ImportError:  # pragma: no cover - safety net; orjson is in requirements.txt
+    logging.getLogger(__name__).warning("orjson is not installed; decoding GitHub payloads with json")
+
+    def loads(data: bytes):
+        return json.loads(data)
+
+
+def parse_dt(value) -> Optional[datetime]:
+    """Parse a GitHub ISO timestamp into a naive datetime (UTC). Offsets other
+    than Z (e.g. webhook push commit timestamps) are converted to UTC."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (ValueError, AttributeError):
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+class UserRecord:
+    __slots__ = ("id", "login", "avatar_url", "html_url")
+
+    def __init__(self, id, login, avatar_url=None, html_url=None):
+        self.id = id
+        self.login = login
+        self.avatar_url = avatar_url
+        self.html_url = html_url
+
+    @classmethod
+    def from_api(cls, data: Optional[Dict]) -> Optional["UserRecord"]:
+        if not data or data.get("id") is None:
+            return None
+        return cls(data["id"], data.get("login"), data.get("avatar_url"), data.get("html_url"))
+
+
+class LabelRecord:
+    __slots__ = ("id", "name", "color", "description")
+
+    def __init__(self, id, name, color=None, description=None):
+        self.id = id
+        self.name = name
+        self.color = color
+        self.description = description
+
+    @classmethod
+    def from_api(cls, data: Dict) -> "LabelRecord":
+        return cls(data.get("id"), data.get("name"), data.get("color"), data.get("description"))
+
+
+class ReviewRecord:
+    __slots__ = ("id", "state", "submitted_at", "user")
+
+    def __init__(self, id, state, submitted_at, user):
+        self.id = id
+        self.state = state
+        self.submitted_at = submitted_at
+        self.user = user
+
+    @classmethod
+    def from_api(cls, data: Dict) -> "ReviewRecord":
+        return cls(
+            data.get("id"), data.get("state"), parse_dt(data.get("submitted_at")),
+            UserRecord.from_api(data.get("user")),
+        )
+
+
+class CommentRecord:
+    # `issue_number` is set for comments from the repo-wide stream, which must
+    # be joined back to their issue; per-issue listings leave it None.
+    __slots__ = ("id", "created_at", "user", "issue_number", "updated_at")
+
+    def __init__(self, id, created_at, user, issue_number=None, updated_at=None):
+        self.id = id
+        self.created_at = created_at
+        self.user = user
+        self.issue_number = issue_number
+        self.updated_at = updated_at
+
+    @classmethod
+    def from_api(cls, data: Dict) -> "CommentRecord":
+        issue_url = data.get("issue_url") or ""
+        tail = issue_url.rsplit("/", 1)[-1]
+        return cls(
+            data.get("id"), parse_dt(data.get("created_at")), UserRecord.from_api(data.get("user")),
+            int(tail) if tail.isdigit() else None, parse_dt(data.get("updated_at")),
+        )
+
+
+class PullRequestRecord:
+    # `reviews` is filled only when the listing already nested them (GraphQL);
+    # None means "fetch separately".
+    __slots__ = (
+        "id", "number", "title", "state", "created_at", "updated_at",
+        "closed_at", "merged_at", "user", "reviews",
+    )
+
+    def __init__(self, id, number, title, state, created_at, updated_at,
+                 closed_at, merged_at, user, reviews=None):
+        self.id = id
+        self.number = number
+        self.title = title
+        self.state = state
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.closed_at = closed_at
+        self.merged_at = merged_at
+        self.user = user
+        self.reviews: Optional[List[ReviewRecord]] = reviews
+
+    @classmethod
+    def from_api(cls, data: Dict) -> "PullRequestRecord":
+        return cls(
+            data["id"], data["number"], data.get("title"), data.get("state"),
+            parse_dt(data.get("created_at")), parse_dt(data.get("updated_at")),
+            parse_dt(data.get("closed_at")), parse_dt(data.get("merged_at")),
+            UserRecord.from_api(data.get("user")),
+        )
+
+
+class IssueRecord:
+    # `labels` comes with every listing; `comment_list` only when nested
+    # (GraphQL), None otherwise. `comments` is the comment count.
+    __slots__ = (
+        "id", "number", "title", "state", "created_at", "updated_at", "closed_at",
+        "user", "assignee", "comments", "labels", "comment_list",
+    )
+
+    def __init__(self, id, number, title, state, created_at, updated_at, closed_at,
+                 user, assignee, comments, labels=None, comment_list=None):
+        self.id = id
+        self.number = number
+        self.title = title
+        self.state = state
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.closed_at = closed_at
+        self.user = user
+        self.assignee = assignee
+        self.comments = comments
+        self.labels: Optional[List[LabelRecord]] = labels
+        self.comment_list: Optional[List[CommentRecord]] = comment_list
+
+    @classmethod
+    def from_api(cls, data: Dict) -> "IssueRecord":
+        return cls(
+            data["id"], data["number"], data.get("title"), data.get("state"),
+            parse_dt(data.get("created_at")), parse_dt(data.get("updated_at")),
+            parse_dt(data.get("closed_at")),
+            UserRecord.from_api(data.get("user")), UserRecord.from_api(data.get("assignee")),
+            data.get("comments", 0) or 0,
+            [LabelRecord.from_api(lbl) for lbl in data.get("labels") or []],
+        )
+
+
+class CommitRecord:
+    # `date` is the author date (when the work was done); `committed_at` is the
+    # committer date, which the listing's `since` filter applies to.
+    __slots__ = ("sha", "author", "date", "additions", "deletions", "committed_at")
+
+    def __init__(self, sha, author, date, additions=None, deletions=None, committed_at=None):
+        self.sha = sha
+        self.author = author
+        self.date = date
+        self.additions = additions
+        self.deletions = deletions
+        self.committed_at = committed_at
+
+    @classmethod
+    def from_api(cls, data: Dict) -> "CommitRecord":
+        commit = data.get("commit") or {}
+        stats = data.get("stats") or {}
+        return cls(
+            data.get("sha"),
+            UserRecord.from_api(data.get("author")),  # the GitHub user (may be None)
+            parse_dt((commit.get("author") or {}).get("date")),
+            stats.get("additions"), stats.get("deletions"),
+            parse_dt((commit.get("committer") or {}).get("date")),
+        )
@@ -0,0 +1,119 @@
+"""
+Preloaded `github_id -> primary key` maps for the collector.
+
+Resolving existing rows one `SELECT ... WHERE github_id = ?` at a time was
+the collector's main source of database round trips. At sync start each map
+is loaded with one query (PRs, issues and labels of the repository being
+synced) into a plain dict of ints, so existence checks are in-memory lookups.
+Contributors are shared across repositories and live in the process-wide
+`contributor_cache` instead.
+
+Maps are bounded by `SYNC_IDENTITY_MAP_MAX`. A table larger than that is not
+preloaded; misses are then resolved with batched `IN (...)` queries and
+cached until the bound is reached.
+"""
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models import Issue, Label, PullRequest
+
+settings = get_settings()
+
+# Max ids per IN (...) lookup, below SQLite's bound-parameter limit.
+LOOKUP_CHUNK = 500
+
+
+class IdentityMap:
+    """github_id -> primary key for one model."""
+
+    def __init__(self, db: Session, model, max_entries: int = None):
+        self.db = db
+        self.model = model
+        self.max_entries = max_entries or settings.SYNC_IDENTITY_MAP_MAX
+        self.ids: Dict[int, int] = {}
+        # True when every row of the table is in `ids`, so a miss means the
+        # row does not exist and needs no query.
+        self.complete = False
+        self.hits = 0
+        self.queries = 0
+
+    def preload(self, *criteria) -> None:
+        """Load the map with one query, unless the matching rows exceed the bound.
+        With no `criteria` the map covers the whole table."""
+        count_q = select(func.count()).select_from(self.model)
+        rows_q = select(self.model.github_id, self.model.id).where(self.model.github_id.isnot(None))
+        if criteria:
+            count_q = count_q.where(*criteria)
+            rows_q = rows_q.where(*criteria)
+        self.queries += 1
+        if self.db.execute(count_q).scalar() > self.max_entries:
+            return
+        self.queries += 1
+        self.ids = dict(self.db.execute(rows_q).all())
+        self.complete = not criteria
+
+    def add(self, github_id: int, pk: int) -> None:
+        if github_id in self.ids or len(self.ids) < self.max_entries:
+            self.ids[github_id] = pk
+        else:
+            self.complete = False
+
+    def get(self, github_id: int) -> Optional[int]:
+        return self.get_many((github_id,)).get(github_id)
+
+    def get_many(self, github_ids: Iterable[int]) -> Dict[int, int]:
+        """{github_id: pk} for the rows that exist; misses are queried in batches."""
+        found = {}
+        missing = []
+        for gh_id in github_ids:
+            pk = self.ids.get(gh_id)
+            if pk is not None:
+                found[gh_id] = pk
+            else:
+                missing.append(gh_id)
+        self.hits += len(found)
+        if missing and not self.complete:
+            missing = list(dict.fromkeys(missing))
+            for i in range(0, len(missing), LOOKUP_CHUNK):
+                self.queries += 1
+                rows = self.db.execute(
+                    select(self.model.github_id, self.model.id)
+                    .where(self.model.github_id.in_(missing[i:i + LOOKUP_CHUNK]))
+                ).all()
+                for gh_id, pk in rows:
+                    found[gh_id] = pk
+                    self.add(gh_id, pk)
+        return found
+
+
+class IdentityMaps:
+    """The collector's maps, one per model it resolves by GitHub id."""
+
+    def __init__(self, db: Session):
+        self.by_model = {
+            PullRequest: IdentityMap(db, PullRequest),
+            Issue: IdentityMap(db, Issue),
+            Label: IdentityMap(db, Label),
+        }
+
+    def preload(self, repo_id: int) -> None:
+        for model in (PullRequest, Issue, Label):
+            self.by_model[model].preload(model.repository_id == repo_id)
+
+    def reset(self) -> None:
+        """Forget everything (after a rollback may have undone recorded inserts)."""
+        for id_map in self.by_model.values():
+            id_map.ids = {}
+            id_map.complete = False
+
+    def get(self, model) -> Optional[IdentityMap]:
+        return self.by_model.get(model)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            model.__tablename__: {"size": len(m.ids), "hits": m.hits, "queries": m.queries}
+            for model, m in self.by_model.items()
+        }
@@ -0,0 +1,272 @@
+"""
+Process-wide GitHub rate-limit governor.
+
+One `RateLimitGovernor` exists per token and is shared by every `GitHubClient`
+using that token, so concurrent syncs draw from a single view of the budget
+instead of each discovering the limit by hitting 403s.
+
+GitHub meters three independent budgets, reported via `X-RateLimit-Resource`:
+`core` (REST, 5,000/h), `search` (30/min) and `graphql` (5,000 points/h).
+Each is tracked as its own bucket:
+
+- While a bucket is comfortably above its low-water mark, permits are handed
+  out immediately.
+- Below the low-water mark, permits are paced evenly over the time left until
+  reset, so the remaining budget is spread out rather than burst through.
+- At the reserve floor, callers wait for the reset.
+
+A secondary-limit `Retry-After` pauses every bucket for that token.
+
+With several tokens configured (`GITHUB_TOKENS`), `TokenPool` routes each
+request to the token with the most remaining budget for that resource; tokens
+that are exhausted or paused are parked until their reset.
+"""
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Start pacing once a bucket drops below this fraction of its limit.
+LOW_WATER_FRACTION = 0.1
+# Never spend the last N units of a bucket; wait for reset instead.
+RESERVE = 2
+# Re-check at least this often while waiting, so fresher headers can release us.
+_MAX_SLEEP_SLICE = 30.0
+# GitHub asks clients to wait at least a minute on a secondary limit without Retry-After.
+SECONDARY_LIMIT_DEFAULT_WAIT = 60
+
+
+def resource_for(url: str) -> str:
+    """Which rate-limit bucket a request URL draws from."""
+    if "/search/" in url:
+        return "search"
+    if url.rstrip("/").endswith("/graphql"):
+        return "graphql"
+    return "core"
+
+
+class _Bucket:
+    __slots__ = ("limit", "remaining", "reset", "next_at", "cost")
+
+    def __init__(self):
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset: Optional[float] = None  # epoch seconds
+        self.next_at = 0.0  # earliest time the next paced permit may be issued
+        self.cost = 1  # units one request consumes (GraphQL queries cost more)
+
+    def observe(self, limit: Optional[int], remaining: int, reset: float) -> None:
+        # Headers from concurrent responses can arrive out of order; within the
+        # same window keep the lower count, a new window replaces it.
+        if self.reset is not None and reset == self.reset and self.remaining is not None:
+            remaining = min(remaining, self.remaining)
+        self.remaining = remaining
+        self.reset = reset
+        if limit:
+            self.limit = limit
+
+    def delay(self, now: float) -> float:
+        """Seconds to wait before a permit can be issued (0 = go now)."""
+        if self.remaining is None or self.reset is None:
+            return 0.0
+        if self.reset <= now:
+            # Window rolled over; budget is unknown until the next response.
+            self.remaining = None
+            return 0.0
+        if self.remaining - self.cost < RESERVE:
+            return self.reset - now + 1
+        low_water = max(RESERVE + self.cost, int((self.limit or 0) * LOW_WATER_FRACTION))
+        if self.remaining > low_water:
+            return 0.0
+        return max(self.next_at - now, 0.0)
+
+    def take(self, now: float) -> None:
+        if self.remaining is None or self.reset is None:
+            return
+        low_water = max(RESERVE + self.cost, int((self.limit or 0) * LOW_WATER_FRACTION))
+        if self.remaining <= low_water:
+            interval = (self.reset - now) / max(1, (self.remaining - RESERVE) // self.cost)
+            self.next_at = max(self.next_at, now) + interval
+        self.remaining -= self.cost
+
+
+class RateLimitGovernor:
+    """Shared budget for one token. Call `acquire` before and `observe` after each request."""
+
+    def __init__(self, token_label: str):
+        self.token_label = token_label
+        self._buckets: Dict[str, _Bucket] = {}
+        self._paused_until = 0.0
+        self.waiting = 0
+        self.waits = 0
+        self.total_wait = 0.0
+        self.requests = 0
+
+    def _bucket(self, resource: str) -> _Bucket:
+        bucket = self._buckets.get(resource)
+        if bucket is None:
+            bucket = self._buckets[resource] = _Bucket()
+        return bucket
+
+    def delay(self, resource: str) -> float:
+        now = time.time()
+        return max(self._paused_until - now, self._bucket(resource).delay(now), 0.0)
+
+    async def acquire(self, resource: str = "core") -> float:
+        """Wait until a permit is available, then take it. Returns seconds waited."""
+        waited = 0.0
+        bucket = self._bucket(resource)
+        while True:
+            wait = self.delay(resource)
+            if wait <= 0:
+                bucket.take(time.time())
+                break
+            if waited == 0.0:
+                self.waits += 1
+                if wait >= 5:
+                    logger.warning(
+                        f"GitHub {resource} budget low for token {self.token_label}; "
+                        f"waiting {wait:.0f}s"
+                    )
+            slice_ = min(wait, _MAX_SLEEP_SLICE)
+            self.waiting += 1
+            try:
+                await asyncio.sleep(slice_)
+            finally:
+                self.waiting -= 1
+            waited += slice_
+        self.total_wait += waited
+        self.requests += 1
+        return waited
+
+    def headroom(self, resource: str) -> float:
+        """Remaining units for `resource`; unknown budgets rank as full."""
+        bucket = self._bucket(resource)
+        if bucket.remaining is None:
+            return float(bucket.limit or 5000)
+        return float(bucket.remaining)
+
+    def observe(self, resource: str, headers) -> None:
+        """Update a bucket from a response's `X-RateLimit-*` headers."""
+        resource = headers.get("X-RateLimit-Resource") or resource
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+        limit = headers.get("X-RateLimit-Limit")
+        if remaining is not None and remaining.isdigit() and reset and reset.isdigit():
+            self._bucket(resource).observe(
+                int(limit) if limit and limit.isdigit() else None, int(remaining), float(reset)
+            )
+
+    def observe_graphql(self, rate: Optional[Dict]) -> None:
+        """Update the GraphQL bucket from a query's `rateLimit {cost remaining resetAt}`."""
+        if not rate or rate.get("remaining") is None:
+            return
+        bucket = self._bucket("graphql")
+        reset = bucket.reset or time.time() + 3600
+        if rate.get("resetAt"):
+            reset = datetime.fromisoformat(rate["resetAt"].replace("Z", "+00:00")).timestamp()
+        bucket.observe(None, int(rate["remaining"]), float(int(reset)))
+        bucket.cost = max(1, int(rate.get("cost") or 1))
+
+    def pause(self, seconds: float) -> None:
+        until = time.time() + seconds
+        if until > self._paused_until:
+            logger.warning(f"GitHub secondary rate limit for token {self.token_label}; pausing {seconds}s")
+            self._paused_until = until
+
+    def snapshot(self) -> Dict:
+        now = time.time()
+        resources = {}
+        for name, b in self._buckets.items():
+            resources[name] = {
+                "limit": b.limit,
+                "remaining": b.remaining,
+                "reset_at": datetime.utcfromtimestamp(b.reset).isoformat() + "Z" if b.reset else None,
+                "reset_in_seconds": max(0, round(b.reset - now)) if b.reset else None,
+                "wait_seconds": round(self.delay(name), 2),
+            }
+        paused_for = max(self._paused_until - now, 0.0)
+        return {
+            "token": self.token_label,
+            "parked": any(self.delay(name) > 0 for name in self._buckets) or paused_for > 0,
+            "requests": self.requests,
+            "resources": resources,
+            "paused_for_seconds": round(paused_for, 2),
+            "waiting_requests": self.waiting,
+            "waits": self.waits,
+            "total_wait_seconds": round(self.total_wait, 2),
+        }
+
+
+_governors: Dict[str, RateLimitGovernor] = {}
+_governors_lock = threading.Lock()
+
+
+def _token_label(token: str) -> str:
+    return f"...{token[-4:]}" if token and len(token) > 4 else "anonymous"
+
+
+def get_governor(token: str) -> RateLimitGovernor:
+    """The shared governor for `token` (created on first use)."""
+    key = token or ""
+    governor = _governors.get(key)
+    if governor is None:
+        with _governors_lock:
+            governor = _governors.get(key)
+            if governor is None:
+                governor = _governors[key] = RateLimitGovernor(_token_label(token))
+    return governor
+
+
+def governor_snapshots():
+    with _governors_lock:
+        governors = list(_governors.values())
+    return [g.snapshot() for g in governors]
+
+
+class TokenPool:
+    """Routes requests across several tokens by remaining budget."""
+
+    def __init__(self, tokens: List[str]):
+        self.tokens = list(tokens) or [""]
+        self.governors = [get_governor(t) for t in self.tokens]
+
+    def choose(self, resource: str) -> Tuple[str, RateLimitGovernor]:
+        """Pick the token to use next for `resource`.
+
+        Tokens that can issue a permit now are preferred, highest headroom
+        first; if every token is parked, the one that frees up soonest wins.
+        """
+        best = None
+        best_key = None
+        for token, governor in zip(self.tokens, self.governors):
+            delay = governor.delay(resource)
+            key = (delay > 0, delay, -governor.headroom(resource))
+            if best_key is None or key < best_key:
+                best, best_key = (token, governor), key
+        return best
+
+    def governor_for(self, authorization: Optional[str]) -> RateLimitGovernor:
+        """The governor of the token a request was sent with (its Authorization header)."""
+        token = (authorization or "").removeprefix("Bearer ").strip()
+        return get_governor(token)
+
+
+_pool: Optional[TokenPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_token_pool() -> TokenPool:
+    """The process-wide pool built from `Settings.github_tokens`."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = TokenPool(get_settings().github_tokens)
+    return _pool
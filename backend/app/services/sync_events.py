@@ -0,0 +1,300 @@
+"""
+In-process event bus behind `GET /api/events` (server-sent events).
+
+Dashboards used to poll `/repositories` every 2s while anything was syncing
+and the analytics endpoints on a timer. Instead, the code that changes
+repository state publishes here and each open stream receives:
+
+- `sync_status`: a sync was queued, started, moved to another phase,
+  completed or failed.
+- `sync_progress`: item/page counters of a running sync, at most every
+  EVENTS_PROGRESS_MIN_SECONDS per repository.
+- `data_changed`: analytics rows of a repository were committed (sync pages,
+  at most every EVENTS_DATA_CHANGED_MIN_SECONDS, and always at the end of a
+  sync; webhook batches), so views showing it should refetch.
+
+State events carry the repository's `sync_*` columns under their column
+names, so clients merge them straight into the repository they hold.
+
+Every event has an id (`<process epoch>-<sequence>`) and the last
+EVENTS_REPLAY_SIZE are kept, so a client reconnecting with `Last-Event-ID`
+is sent what it missed. When that is no longer possible (events dropped, the
+buffer moved on, another process) it gets a `resync` event instead and
+reloads what it shows.
+
+Publishing stops once nobody has been subscribed for EVENTS_REPLAY_SECONDS.
+Each subscriber has a bounded queue; a client too slow to keep up loses its
+oldest events and is sent a `resync`. When
+syncs run in a separate worker process (SYNC_WORKER_EMBEDDED off) their
+events never reach this process, so `watch_repositories` polls the
+repository rows once per EVENTS_WATCH_POLL_SECONDS instead (one query for
+all streams, not one per client).
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from app.config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+SYNC_STATUS = "sync_status"
+SYNC_PROGRESS = "sync_progress"
+DATA_CHANGED = "data_changed"
+RESYNC = "resync"
+
+# Repository columns carried by state events.
+STATE_COLUMNS = ("sync_status", "sync_phase", "sync_page", "sync_item_count", "sync_total_items")
+
+
+class Subscription:
+    """One stream's queue of events, optionally for a single repository."""
+
+    def __init__(self, repo_id: Optional[int], queue_size: int):
+        self.repo_id = repo_id
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self.dropped = 0
+        # Set when events were dropped since the stream last sent a resync.
+        self.overflowed = False
+
+    def put(self, message: Dict) -> None:
+        if self.repo_id is not None and message["repo_id"] != self.repo_id:
+            return
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+            self.overflowed = True
+        self.queue.put_nowait(message)
+
+    async def next(self, timeout: float) -> Optional[Dict]:
+        """The next event, or None after `timeout` seconds without one."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBus:
+    def __init__(self, queue_size: int = None):
+        self.queue_size = queue_size or settings.EVENTS_QUEUE_SIZE
+        self._subscriptions = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # (event type, repo_id) -> monotonic time last published, for throttling
+        self._last_published: Dict = {}
+        self.published = 0
+        self.throttled = 0
+        # Event ids: a sequence number per process epoch. Events not sent for
+        # want of subscribers still take a number, so replay sees the gap.
+        self.epoch = uuid.uuid4().hex[:8]
+        self._seq = 0
+        self._replay: deque = deque(maxlen=settings.EVENTS_REPLAY_SIZE)  # (seq, message)
+        self._seq_lock = threading.Lock()
+        self._idle_since = float("-inf")
+
+    def subscribe(self, repo_id: Optional[int] = None) -> Subscription:
+        """Register a stream; call from the event loop serving it."""
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(repo_id, self.queue_size)
+        self._subscriptions.add(subscription)
+        return subscription
+
+    @property
+    def has_subscribers(self) -> bool:
+        return bool(self._subscriptions)
+
+    @property
+    def active(self) -> bool:
+        """True while events are published: a stream is open, or one closed
+        recently enough that its client may reconnect and replay them."""
+        return self.has_subscribers or (
+            time.monotonic() - self._idle_since < settings.EVENTS_REPLAY_SECONDS
+        )
+
+    @property
+    def last_id(self) -> str:
+        with self._seq_lock:
+            return f"{self.epoch}-{self._seq}"
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscriptions.discard(subscription)
+        if not self._subscriptions:
+            self._last_published.clear()
+            self._idle_since = time.monotonic()
+
+    def replay(self, last_event_id: Optional[str], repo_id: Optional[int] = None) -> Optional[List[Dict]]:
+        """Events after `last_event_id` (for `repo_id`, if given), or None if
+        some of them can't be replayed: dropped, no longer buffered, or the
+        id is from another process."""
+        epoch, _, seq = (last_event_id or "").partition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        last = int(seq)
+        with self._seq_lock:
+            missed = [message for number, message in self._replay if number > last]
+            current = self._seq
+        if last > current or len(missed) != current - last:
+            return None
+        return [m for m in missed if repo_id is None or m["repo_id"] == repo_id]
+
+    def publish(self, event_type: str, repo_id: int, data=None,
+                min_interval: float = 0.0) -> None:
+        """Send an event to every matching stream. Events of the same type
+        for the same repository within `min_interval` seconds are dropped.
+        `data` may be a callable, called only if the event is sent. Safe to
+        call from any thread."""
+        if not self.active or self._loop is None:
+            with self._seq_lock:
+                self._seq += 1
+            return
+        now = time.monotonic()
+        key = (event_type, repo_id)
+        if min_interval and now - self._last_published.get(key, float("-inf")) < min_interval:
+            self.throttled += 1
+            return
+        self._last_published[key] = now
+        self.published += 1
+        if callable(data):
+            data = data()
+        message = {"type": event_type, "repo_id": repo_id, **(data or {}),
+                   "at": datetime.utcnow().isoformat()}
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._deliver(message)
+        elif not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._deliver, message)
+
+    def _deliver(self, message: Dict) -> None:
+        with self._seq_lock:
+            self._seq += 1
+            message["id"] = f"{self.epoch}-{self._seq}"
+            self._replay.append((self._seq, message))
+        for subscription in list(self._subscriptions):
+            subscription.put(message)
+
+    def stats(self) -> Dict:
+        return {
+            "subscribers": len(self._subscriptions),
+            "published": self.published,
+            "throttled": self.throttled,
+            "dropped": sum(s.dropped for s in self._subscriptions),
+            "last_id": self.last_id,
+        }
+
+
+_bus: Optional[EventBus] = None
+
+
+def get_event_bus() -> EventBus:
+    global _bus
+    if _bus is None:
+        _bus = EventBus()
+    return _bus
+
+
+def publish_status(repo_id: int, state) -> None:
+    """`sync_status` event; `state` is a dict of repository columns or a
+    callable returning one (e.g. `lambda: repo_state(repo)`)."""
+    get_event_bus().publish(SYNC_STATUS, repo_id, state)
+
+
+def publish_progress(repo_id: int, state) -> None:
+    """Throttled `sync_progress` event; `state` as in `publish_status`."""
+    get_event_bus().publish(SYNC_PROGRESS, repo_id, state,
+                            min_interval=settings.EVENTS_PROGRESS_MIN_SECONDS)
+
+
+def publish_data_changed(repo_id: int, source: str, throttle: bool = False) -> None:
+    """`data_changed` event; `throttle` for intermediate commits of a sync."""
+    get_event_bus().publish(
+        DATA_CHANGED, repo_id, {"source": source},
+        min_interval=settings.EVENTS_DATA_CHANGED_MIN_SECONDS if throttle else 0.0,
+    )
+
+
+def repo_state(repo) -> Dict:
+    """A repository's STATE_COLUMNS (reloads the row if expired by a commit)."""
+    return {column: getattr(repo, column) for column in STATE_COLUMNS}
+
+
+def resync_message() -> Dict:
+    """Tells a client it missed events and should reload what it shows."""
+    return {"type": RESYNC, "at": datetime.utcnow().isoformat()}
+
+
+def format_sse(message: Dict) -> str:
+    """One event in text/event-stream framing."""
+    event_id = f"id: {message['id']}\n" if "id" in message else ""
+    return f"{event_id}event: {message['type']}\ndata: {json.dumps(message, default=str)}\n\n"
+
+
+async def watch_repositories(poll_seconds: float = None) -> None:
+    """Publish repository state changes made by other processes (a separate
+    sync worker); runs until cancelled."""
+    from app.database import SessionLocal
+    from app.models import Repository
+
+    poll_seconds = poll_seconds or settings.EVENTS_WATCH_POLL_SECONDS
+    bus = get_event_bus()
+    columns = [getattr(Repository, c) for c in STATE_COLUMNS]
+    previous: Dict[int, tuple] = {}
+    while True:
+        await asyncio.sleep(poll_seconds)
+        if not bus.active:
+            previous = {}
+            continue
+        try:
+            with SessionLocal() as db:
+                rows = db.query(Repository.id, *columns).all()
+        except Exception as e:
+            logger.warning(f"Repository watch failed: {e}")
+            continue
+        current = {}
+        for repo_id, *values in rows:
+            current[repo_id] = tuple(values)
+            before = previous.get(repo_id)
+            if before is None:
+                continue  # first sighting; clients load it themselves
+            state = dict(zip(STATE_COLUMNS, values))
+            if before[:2] != tuple(values[:2]):  # status or phase moved
+                publish_status(repo_id, state)
+                if before[0] == "syncing" and state["sync_status"] != "syncing":
+                    publish_data_changed(repo_id, "sync")
+            elif before != tuple(values):
+                publish_progress(repo_id, state)
+                if before[2] != state["sync_page"]:
+                    publish_data_changed(repo_id, "sync", throttle=True)
+        previous = current
+
+
+_watch_task: Optional[asyncio.Task] = None
+
+
+def start_repository_watch() -> None:
+    """Start `watch_repositories` (API lifespan) if syncs run in a separate
+    worker process."""
+    global _watch_task
+    if settings.SYNC_WORKER_EMBEDDED or _watch_task is not None:
+        return
+    _watch_task = asyncio.create_task(watch_repositories())
+
+
+async def stop_repository_watch() -> None:
+    global _watch_task
+    if _watch_task is None:
+        return
+    _watch_task.cancel()
+    try:
+        await _watch_task
+    except asyncio.CancelledError:
+        pass
+    _watch_task = None
@@ -0,0 +1,327 @@
+"""
+Durable queue of repository syncs backed by the `sync_jobs` table.
+
+`POST /repositories/sync` only enqueues; workers (`app.worker`) claim jobs
+with a time-limited lease, renew it while the sync runs and record the
+outcome. Claiming is a conditional UPDATE on the job row, so two workers (or
+two processes) can never both win the same job. A job whose lease expired
+because its worker died is claimable again; every claim counts as an attempt.
+
+Due interactive jobs are claimed before background ones. `queue_estimates`
+reports each active job's queue position and an ETA from recent sync
+durations.
+"""
+import heapq
+import logging
+import os
+import random
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import and_, case, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models import Repository, SyncJob
+from app.services.sync_events import publish_status, repo_state
+from app.services.sync_scheduler import BACKGROUND, INTERACTIVE
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+ACTIVE_STATUSES = ("queued", "running")
+# Cap on the exponential retry delay.
+MAX_RETRY_DELAY = timedelta(hours=1)
+# ETA basis while no sync has finished yet.
+DEFAULT_SYNC_SECONDS = 120.0
+# Finished jobs averaged for the ETA of repositories never synced before.
+ETA_SAMPLE_SIZE = 20
+
+
+def new_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def enqueue_sync(db: Session, owner: str, name: str, ingest_mode: str = None,
+                 full_resync: bool = False, priority: str = INTERACTIVE) -> Repository:
+    """Queue a sync of owner/name and return its repository row.
+
+    A repository seen for the first time gets a placeholder row (no
+    github_id yet) that the worker's `init_sync` fills in. A repository with
+    a job already queued or running is not queued twice; a full resync or
+    interactive request upgrades the pending job instead."""
+    full_name = f"{owner}/{name}"
+    repo = db.query(Repository).filter(func.lower(Repository.full_name) == full_name.lower()).first()
+    if repo is None:
+        repo = Repository(
+            name=name,
+            owner=owner,
+            full_name=full_name,
+            url=f"https://github.com/{full_name}",
+            sync_item_count=0,
+            sync_total_items=0,
+        )
+        db.add(repo)
+        db.flush()
+
+    job = db.query(SyncJob).filter(
+        SyncJob.repository_id == repo.id, SyncJob.status.in_(ACTIVE_STATUSES)
+    ).first()
+    if job is None:
+        db.add(SyncJob(
+            repository_id=repo.id,
+            owner=owner,
+            name=name,
+            ingest_mode=ingest_mode,
+            full_resync=full_resync,
+            priority=priority,
+            status="queued",
+            attempts=0,
+            max_attempts=settings.SYNC_JOB_MAX_ATTEMPTS,
+            run_after=datetime.utcnow(),
+        ))
+        repo.sync_status = "queued"
+    elif job.status == "queued":
+        job.full_resync = job.full_resync or full_resync
+        job.ingest_mode = ingest_mode or job.ingest_mode
+        if priority == INTERACTIVE:
+            job.priority = INTERACTIVE
+    if ingest_mode:
+        repo.ingest_mode = ingest_mode
+    db.commit()
+    publish_status(repo.id, lambda: repo_state(repo))
+    return repo
+
+
+def _claimable(now: datetime):
+    return or_(
+        and_(SyncJob.status == "queued", SyncJob.run_after <= now),
+        and_(SyncJob.status == "running", SyncJob.lease_expires_at < now),
+    )
+
+
+def _priority_rank():
+    return case((SyncJob.priority == BACKGROUND, 1), else_=0)
+
+
+def claim_next_job(db: Session, worker_id: str) -> Optional[SyncJob]:
+    """Lease the next due job (or one whose lease expired) to `worker_id`."""
+    while True:
+        now = datetime.utcnow()
+        candidate = db.execute(
+            select(SyncJob.id, SyncJob.status, SyncJob.attempts, SyncJob.max_attempts)
+            .where(_claimable(now))
+            .order_by(_priority_rank(), SyncJob.run_after, SyncJob.id)
+            .limit(1)
+        ).first()
+        if candidate is None:
+            db.rollback()
+            return None
+        job_id, status, attempts, max_attempts = candidate
+        if status == "running" and attempts >= max_attempts:
+            # Its last attempt died with the worker; nothing left to retry.
+            logger.warning(f"Sync job {job_id} lease expired on its final attempt")
+            _finish(db, job_id, None, "failed", "lease expired (worker lost)")
+            continue
+        claimed = db.execute(
+            update(SyncJob)
+            .where(SyncJob.id == job_id, _claimable(now))
+            .values(
+                status="running",
+                attempts=SyncJob.attempts + 1,
+                lease_owner=worker_id,
+                lease_expires_at=now + timedelta(seconds=settings.SYNC_JOB_LEASE_SECONDS),
+                started_at=now,
+            )
+        ).rowcount
+        db.commit()
+        if claimed:
+            if status == "running":
+                logger.warning(f"Recovered sync job {job_id} from an expired lease")
+            return db.query(SyncJob).get(job_id)
+        # Another worker won the race; look again.
+
+
+def renew_lease(db: Session, job_id: int, worker_id: str) -> bool:
+    """Extend the lease; False if this worker no longer holds it."""
+    renewed = db.execute(
+        update(SyncJob)
+        .where(SyncJob.id == job_id, SyncJob.lease_owner == worker_id, SyncJob.status == "running")
+        .values(lease_expires_at=datetime.utcnow() + timedelta(seconds=settings.SYNC_JOB_LEASE_SECONDS))
+    ).rowcount
+    db.commit()
+    return bool(renewed)
+
+
+def complete_job(db: Session, job_id: int, worker_id: str) -> None:
+    _finish(db, job_id, worker_id, "succeeded", None)
+
+
+def fail_job(db: Session, job_id: int, worker_id: str, error: str) -> None:
+    """Requeue the job with exponential backoff, or fail it for good once
+    it has used all its attempts."""
+    job = db.query(SyncJob).get(job_id)
+    if job is None or job.lease_owner != worker_id:
+        db.rollback()
+        return
+    if job.attempts >= job.max_attempts:
+        _finish(db, job_id, worker_id, "failed", error)
+        return
+    delay = timedelta(seconds=settings.SYNC_JOB_RETRY_BASE_SECONDS * 2 ** (job.attempts - 1))
+    delay = min(delay, MAX_RETRY_DELAY) * random.uniform(0.75, 1.25)
+    job.status = "queued"
+    job.run_after = datetime.utcnow() + delay
+    job.lease_owner = None
+    job.lease_expires_at = None
+    job.last_error = error
+    repo = db.query(Repository).get(job.repository_id)
+    if repo is not None:
+        repo.sync_status = "queued"
+    db.commit()
+    if repo is not None:
+        publish_status(job.repository_id, lambda: repo_state(repo))
+    logger.warning(
+        f"Sync job {job_id} attempt {job.attempts}/{job.max_attempts} failed; "
+        f"retrying in {delay.total_seconds():.0f}s: {error}"
+    )
+
+
+def abandon_job(db: Session, job_id: int, worker_id: str, error: str) -> None:
+    """Fail the job without retrying (GitHub refused the repository: not
+    found or not accessible). A placeholder repository that never synced is
+    dropped together with its jobs, so a mistyped name doesn't stay listed."""
+    job = db.query(SyncJob).get(job_id)
+    if job is None or job.lease_owner != worker_id:
+        db.rollback()
+        return
+    repo = db.query(Repository).get(job.repository_id)
+    if repo is None or repo.github_id is not None:
+        _finish(db, job_id, worker_id, "failed", error)
+        return
+    repo_id, full_name = repo.id, repo.full_name
+    state = {**repo_state(repo), "sync_status": "failed"}
+    db.query(SyncJob).filter(SyncJob.repository_id == repo_id).delete(synchronize_session=False)
+    db.delete(repo)
+    db.commit()
+    publish_status(repo_id, state)
+    logger.warning(f"Dropped repository {full_name}: {error}")
+
+
+def release_job(db: Session, job_id: int, worker_id: str) -> None:
+    """Hand a job back without counting the attempt (worker shutting down)."""
+    job = db.query(SyncJob).get(job_id)
+    if job is None or job.lease_owner != worker_id or job.status != "running":
+        db.rollback()
+        return
+    job.status = "queued"
+    job.attempts = max(job.attempts - 1, 0)
+    job.run_after = datetime.utcnow()
+    job.lease_owner = None
+    job.lease_expires_at = None
+    repo = db.query(Repository).get(job.repository_id)
+    if repo is not None:
+        repo.sync_status = "queued"
+    db.commit()
+    if repo is not None:
+        publish_status(job.repository_id, lambda: repo_state(repo))
+
+
+def _finish(db: Session, job_id: int, worker_id: Optional[str], status: str,
+            error: Optional[str]) -> None:
+    job = db.query(SyncJob).get(job_id)
+    if job is None or (worker_id is not None and job.lease_owner != worker_id):
+        db.rollback()
+        return
+    job.status = status
+    job.finished_at = datetime.utcnow()
+    job.lease_owner = None
+    job.lease_expires_at = None
+    job.last_error = error
+    repo = None
+    if status == "failed":
+        repo = db.query(Repository).get(job.repository_id)
+        if repo is not None:
+            repo.sync_status = "failed"
+    db.commit()
+    if repo is not None:
+        publish_status(job.repository_id, lambda: repo_state(repo))
+
+
+def _recent_durations(db: Session):
+    """({repository_id: seconds of its last successful sync}, mean seconds
+    over the last ETA_SAMPLE_SIZE successful syncs)."""
+    rows = db.execute(
+        select(SyncJob.repository_id, SyncJob.started_at, SyncJob.finished_at)
+        .where(SyncJob.status == "succeeded", SyncJob.started_at.isnot(None),
+               SyncJob.finished_at.isnot(None))
+        .order_by(SyncJob.finished_at.desc())
+        .limit(ETA_SAMPLE_SIZE)
+    ).all()
+    by_repo = {}
+    for repo_id, started, finished in rows:
+        by_repo.setdefault(repo_id, max((finished - started).total_seconds(), 1.0))
+    if not by_repo:
+        return {}, DEFAULT_SYNC_SECONDS
+    samples = [max((f - s).total_seconds(), 1.0) for _, s, f in rows]
+    return by_repo, sum(samples) / len(samples)
+
+
+def queue_estimates(db: Session) -> Dict[int, Dict]:
+    """{repository_id: position and ETA} for every queued or running job.
+
+    Replays the queue in claim order over SYNC_WORKER_CONCURRENCY slots: a
+    running job holds its slot for its expected remaining time (from sync
+    progress, else its last duration), each queued job takes the first slot
+    to free up. `queue_position` is 1-based among queued jobs; ETAs are
+    seconds from now and only as good as the duration history."""
+    now = datetime.utcnow()
+    jobs = db.execute(
+        select(SyncJob, Repository)
+        .join(Repository, Repository.id == SyncJob.repository_id)
+        .where(SyncJob.status.in_(ACTIVE_STATUSES))
+        .order_by(_priority_rank(), SyncJob.run_after, SyncJob.id)
+    ).all()
+    if not jobs:
+        return {}
+    last_duration, mean_duration = _recent_durations(db)
+
+    estimates = {}
+    slots = []  # seconds from now until each worker slot frees up
+    for job, repo in jobs:
+        if job.status != "running":
+            continue
+        expected = last_duration.get(repo.id, mean_duration)
+        elapsed = (now - job.started_at).total_seconds() if job.started_at else 0.0
+        done = (repo.sync_item_count or 0) / repo.sync_total_items if repo.sync_total_items else 0.0
+        if 0.05 <= done < 1:
+            remaining = elapsed / done - elapsed
+        else:
+            remaining = max(expected - elapsed, 0.0)
+        slots.append(remaining)
+        estimates[repo.id] = {
+            "job_id": job.id, "status": job.status, "priority": job.priority,
+            "queue_position": None, "eta_start_seconds": 0.0,
+            "eta_seconds": round(remaining, 1),
+        }
+    slots.sort()
+    slots = slots[: settings.SYNC_WORKER_CONCURRENCY]
+    slots += [0.0] * (settings.SYNC_WORKER_CONCURRENCY - len(slots))
+    heapq.heapify(slots)
+
+    position = 0
+    for job, repo in jobs:
+        if job.status == "running":
+            continue
+        position += 1
+        due_in = max((job.run_after - now).total_seconds(), 0.0) if job.run_after else 0.0
+        start = max(heapq.heappop(slots), due_in)
+        finish = start + last_duration.get(repo.id, mean_duration)
+        heapq.heappush(slots, finish)
+        estimates[repo.id] = {
+            "job_id": job.id, "status": job.status, "priority": job.priority,
+            "queue_position": position, "eta_start_seconds": round(start, 1),
+            "eta_seconds": round(finish, 1),
+        }
+    return estimates
@@ -0,0 +1,257 @@
+"""
+Staged fetch -> transform -> write pipeline for one sync phase.
+
+`execute_sync` used to `asyncio.gather` a coroutine per item of a page, each
+interleaving GitHub I/O with synchronous writes on the shared Session. A
+phase now runs as three stages joined by bounded queues:
+
+- fetch: `GITHUB_MAX_CONCURRENCY` workers take listing items and fetch their
+  child resources (reviews, labels, comments). No database access.
+- transform: one worker turns a fetched item into a `RowSet` of plain row
+  dicts. No I/O. Transforms are synchronous Python on the event loop, so
+  more workers would add no parallelism; the stage is separate so fetches
+  never wait on row building and the writer never waits on either.
+- write: one writer collects row sets per listing page; once a page is
+  complete and all earlier pages are written, it applies the page's rows to
+  the Session (the only stage that touches it) and commits, with no await
+  in between. Several syncs share one SQLite database, and a write
+  transaction left open across an await would hold its lock while another
+  sync's writer blocks the event loop waiting for it.
+
+Full queues block the stage feeding them, so at most about
+`SYNC_PIPELINE_QUEUE_SIZE` items per stage are in flight however large the
+listing. Per-stage throughput and queue depth are exposed by
+`pipeline_snapshots()`.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from app.config import get_settings
+
+settings = get_settings()
+
+# End-of-input marker passed down each queue.
+_DONE = object()
+# Snapshots of finished pipelines kept for the stats endpoint.
+_RECENT_MAX = 50
+
+_active: Dict[str, "SyncPipeline"] = {}
+_recent: "OrderedDict[str, Dict]" = OrderedDict()
+
+
+class RowSet:
+    """Transform-stage output for one item: the rows, events and label links
+    the writer applies. Contributor columns (and event actors) hold
+    UserRecords until the writer resolves them to row ids; `users` lists
+    contributors to record even when no row references them."""
+    __slots__ = ("users", "rows", "events", "issue_labels")
+
+    def __init__(self):
+        self.users = []
+        self.rows = []
+        self.events = []
+        self.issue_labels = None
+
+    def add(self, model, row: Dict, ref=None) -> None:
+        self.rows.append((model, row, ref))
+
+    def event(self, user, event_type, event_at, source_id=None, meta=None) -> None:
+        self.events.append((user, event_type, event_at, source_id, meta))
+
+
+class StageStats:
+    __slots__ = ("workers", "queue", "items", "busy_seconds", "max_depth")
+
+    def __init__(self, workers: int, queue: Optional[asyncio.Queue]):
+        self.workers = workers
+        self.queue = queue
+        self.items = 0
+        self.busy_seconds = 0.0
+        self.max_depth = 0
+
+    def snapshot(self, elapsed: float) -> Dict:
+        return {
+            "workers": self.workers,
+            "items": self.items,
+            "items_per_sec": round(self.items / elapsed, 1) if elapsed else 0.0,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "queue_depth": self.queue.qsize() if self.queue is not None else 0,
+            "max_queue_depth": self.max_depth,
+        }
+
+
+class SyncPipeline:
+    """Runs one phase's listing through fetch, transform and write stages.
+
+    `fetch(item)` is a coroutine; `transform(fetched)` and `write(rows)` are
+    plain functions. `page_done(cursor, size, high)` is called by the writer,
+    in listing order, right after the page's items are written (it is
+    expected to commit); `high` is `high_water(page)` computed when the
+    page was listed."""
+
+    def __init__(
+        self,
+        name: str,
+        fetch: Callable,
+        transform: Callable,
+        write: Callable,
+        page_done: Callable,
+        high_water: Callable = lambda page: None,
+        fetch_workers: int = None,
+        queue_size: int = None,
+    ):
+        self.name = name
+        self.fetch = fetch
+        self.transform = transform
+        self.write = write
+        self.page_done = page_done
+        self.high_water = high_water
+        queue_size = queue_size or settings.SYNC_PIPELINE_QUEUE_SIZE
+        self.fetch_q = asyncio.Queue(queue_size)
+        self.transform_q = asyncio.Queue(queue_size)
+        self.write_q = asyncio.Queue(queue_size)
+        self.stages = {
+            "fetch": StageStats(fetch_workers or settings.GITHUB_MAX_CONCURRENCY, self.fetch_q),
+            "transform": StageStats(1, self.transform_q),
+            "write": StageStats(1, self.write_q),
+        }
+        self.pages_listed = 0
+        self.pages_written = 0
+        self.started = None
+        self.finished = None
+        # page seq -> [items not yet transformed, next cursor, high water, size, row sets]
+        self._pages: Dict[int, List[Any]] = {}
+        self._next_page = 0
+        self._live_fetchers = 0
+        self._listing_error = None
+
+    async def run(self, pages: AsyncIterator) -> None:
+        self.started = time.perf_counter()
+        _active[self.name] = self
+        self._live_fetchers = self.stages["fetch"].workers
+        tasks = [asyncio.ensure_future(self._produce(pages))]
+        tasks += [asyncio.ensure_future(self._fetch_worker())
+                  for _ in range(self.stages["fetch"].workers)]
+        tasks.append(asyncio.ensure_future(self._transformer()))
+        tasks.append(asyncio.ensure_future(self._writer()))
+        try:
+            await asyncio.gather(*tasks)
+            if self._listing_error is not None:
+                raise self._listing_error
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            self.finished = time.perf_counter()
+            _active.pop(self.name, None)
+            _recent[self.name] = self.snapshot()
+            _recent.move_to_end(self.name)
+            while len(_recent) > _RECENT_MAX:
+                _recent.popitem(last=False)
+
+    def snapshot(self) -> Dict:
+        end = self.finished or time.perf_counter()
+        elapsed = end - self.started if self.started else 0.0
+        return {
+            "running": self.finished is None,
+            "elapsed_seconds": round(elapsed, 3),
+            "pages_listed": self.pages_listed,
+            "pages_written": self.pages_written,
+            "stages": {name: stage.snapshot(elapsed) for name, stage in self.stages.items()},
+        }
+
+    @staticmethod
+    async def _put(queue: asyncio.Queue, stage: StageStats, value) -> None:
+        await queue.put(value)
+        stage.max_depth = max(stage.max_depth, queue.qsize())
+
+    async def _produce(self, pages) -> None:
+        try:
+            async for page in pages:
+                seq = self.pages_listed
+                self.pages_listed += 1
+                self._pages[seq] = [len(page), page.next_cursor, self.high_water(page), len(page), []]
+                for item in page:
+                    await self._put(self.fetch_q, self.stages["fetch"], (seq, item))
+        except Exception as e:
+            # Pages already listed still drain and commit, so a retry resumes
+            # after them; run() raises the listing error afterwards.
+            self._listing_error = e
+        finally:
+            aclose = getattr(pages, "aclose", None)
+            if aclose is not None:
+                await aclose()
+        for _ in range(self.stages["fetch"].workers):
+            await self.fetch_q.put(_DONE)
+
+    async def _fetch_worker(self) -> None:
+        stage = self.stages["fetch"]
+        while True:
+            entry = await self.fetch_q.get()
+            if entry is _DONE:
+                break
+            seq, item = entry
+            start = time.perf_counter()
+            fetched = await self.fetch(item)
+            stage.busy_seconds += time.perf_counter() - start
+            stage.items += 1
+            await self._put(self.transform_q, self.stages["transform"], (seq, fetched))
+        self._live_fetchers -= 1
+        if self._live_fetchers == 0:
+            await self.transform_q.put(_DONE)
+
+    async def _transformer(self) -> None:
+        stage = self.stages["transform"]
+        while True:
+            entry = await self.transform_q.get()
+            if entry is _DONE:
+                break
+            seq, fetched = entry
+            start = time.perf_counter()
+            rows = self.transform(fetched) if fetched is not None else None
+            stage.busy_seconds += time.perf_counter() - start
+            stage.items += 1
+            await self._put(self.write_q, self.stages["write"], (seq, rows))
+            # Transforms never await; yield so a full transform queue can't
+            # starve the fetch workers.
+            await asyncio.sleep(0)
+        await self.write_q.put(_DONE)
+
+    async def _writer(self) -> None:
+        stage = self.stages["write"]
+        while True:
+            entry = await self.write_q.get()
+            if entry is _DONE:
+                break
+            seq, rows = entry
+            page = self._pages[seq]
+            page[4].append(rows)
+            page[0] -= 1
+            self._complete_pages()
+        # Pages with no items (or only the last ones) complete here.
+        self._complete_pages()
+
+    def _complete_pages(self) -> None:
+        stage = self.stages["write"]
+        while self._pages.get(self._next_page, (None,))[0] == 0:
+            _, cursor, high, size, row_sets = self._pages.pop(self._next_page)
+            self._next_page += 1
+            start = time.perf_counter()
+            for rows in row_sets:
+                self.write(rows)
+            self.page_done(cursor, size, high)
+            stage.busy_seconds += time.perf_counter() - start
+            stage.items += len(row_sets)
+            self.pages_written += 1
+
+
+def pipeline_snapshots() -> Dict[str, Dict]:
+    """Running pipelines and the most recently finished ones, by name."""
+    return {
+        "active": {name: p.snapshot() for name, p in _active.items()},
+        "recent": dict(_recent),
+    }
@@ -0,0 +1,174 @@
+"""
+Process-wide fair scheduler for GitHub requests made by concurrent syncs.
+
+Each sync caps its own fan-out at `GITHUB_MAX_CONCURRENCY`, so total
+concurrency used to grow with the number of syncs running, and a large
+repository's listing could fill the connection pool and the rate-limit budget
+ahead of every smaller one. Every request now takes one of
+`GITHUB_GLOBAL_MAX_CONCURRENCY` slots for its HTTP call. The rate-limit
+governor permit is acquired before the slot, so a request waiting for a
+rate-limit reset never holds a slot that requests on another token or
+resource could use.
+
+Slots are granted per tenant (the repository being synced) by smooth
+weighted round-robin: while several tenants wait, each is served in
+proportion to its priority's weight, regardless of how many requests it has
+queued. Interactive syncs (a user pressed sync) outweigh background refreshes.
+"""
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+from app.config import get_settings
+
+settings = get_settings()
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+PRIORITY_WEIGHTS = {INTERACTIVE: 4, BACKGROUND: 1}
+# Requests not made on behalf of a sync (e.g. ad hoc API lookups).
+DEFAULT_TENANT = "-"
+# Idle tenants kept for stats before the oldest are dropped.
+_MAX_IDLE_TENANTS = 200
+
+
+class _Tenant:
+    __slots__ = ("name", "priority", "weight", "waiters", "in_flight", "granted",
+                 "wait_seconds", "current", "last_used")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.priority = INTERACTIVE
+        self.weight = PRIORITY_WEIGHTS[INTERACTIVE]
+        self.waiters = deque()
+        self.in_flight = 0
+        self.granted = 0
+        self.wait_seconds = 0.0
+        # Smooth weighted round-robin credit.
+        self.current = 0
+        self.last_used = time.monotonic()
+
+
+class FairRequestScheduler:
+    """Global request slots shared fairly across tenants. Single event loop."""
+
+    def __init__(self, slots: int):
+        self.slots = slots
+        self.in_use = 0
+        self._tenants: Dict[str, _Tenant] = {}
+
+    @asynccontextmanager
+    async def slot(self, tenant: Optional[str] = None, priority: str = INTERACTIVE):
+        """Hold one request slot for the duration of the block."""
+        t = self._tenant(tenant or DEFAULT_TENANT, priority)
+        start = time.monotonic()
+        if self.in_use < self.slots and not self._waiting():
+            self.in_use += 1
+        else:
+            granted = asyncio.get_running_loop().create_future()
+            t.waiters.append(granted)
+            try:
+                await granted
+            except asyncio.CancelledError:
+                if granted.done() and not granted.cancelled():
+                    # The slot was handed over as we were cancelled; pass it on.
+                    self._release()
+                elif granted in t.waiters:
+                    # Not yet skipped by a `_release` in the same loop tick.
+                    t.waiters.remove(granted)
+                raise
+        t.wait_seconds += time.monotonic() - start
+        t.granted += 1
+        t.in_flight += 1
+        try:
+            yield
+        finally:
+            t.in_flight -= 1
+            t.last_used = time.monotonic()
+            self._release()
+
+    def _tenant(self, name: str, priority: str) -> _Tenant:
+        t = self._tenants.get(name)
+        if t is None:
+            if len(self._tenants) >= _MAX_IDLE_TENANTS:
+                self._prune()
+            t = self._tenants[name] = _Tenant(name)
+        t.priority = priority if priority in PRIORITY_WEIGHTS else INTERACTIVE
+        t.weight = PRIORITY_WEIGHTS[t.priority]
+        t.last_used = time.monotonic()
+        return t
+
+    def _prune(self) -> None:
+        idle = sorted(
+            (t for t in self._tenants.values() if not t.in_flight and not t.waiters),
+            key=lambda t: t.last_used,
+        )
+        for t in idle[: max(1, len(idle) // 2)]:
+            del self._tenants[t.name]
+
+    def _waiting(self) -> bool:
+        return any(t.waiters for t in self._tenants.values())
+
+    def _release(self) -> None:
+        """Hand the freed slot to the next tenant in weighted round-robin
+        order, or return it to the pool when nobody waits."""
+        while True:
+            contenders = [t for t in self._tenants.values() if t.waiters]
+            if not contenders:
+                self.in_use -= 1
+                return
+            total = 0
+            chosen = None
+            for t in contenders:
+                t.current += t.weight
+                total += t.weight
+                if chosen is None or t.current > chosen.current:
+                    chosen = t
+            chosen.current -= total
+            granted = chosen.waiters.popleft()
+            if not granted.done():
+                granted.set_result(None)
+                return
+            # Cancelled waiter that has not removed itself yet; try the next.
+
+    def stats(self) -> Dict:
+        tenants = {
+            t.name: {
+                "priority": t.priority,
+                "weight": t.weight,
+                "in_flight": t.in_flight,
+                "waiting": len(t.waiters),
+                "granted": t.granted,
+                "avg_wait_ms": round(1000 * t.wait_seconds / t.granted, 1) if t.granted else None,
+            }
+            for t in sorted(self._tenants.values(), key=lambda t: -t.last_used)
+        }
+        return {
+            "slots": self.slots,
+            "in_use": self.in_use,
+            "waiting": sum(len(t.waiters) for t in self._tenants.values()),
+            "tenants": tenants,
+        }
+
+
+_scheduler: Optional[FairRequestScheduler] = None
+_scheduler_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_request_scheduler() -> FairRequestScheduler:
+    """The scheduler for the running event loop. Like the shared HTTP client,
+    it is rebuilt if the loop changed (waiter futures are bound to a loop)."""
+    global _scheduler, _scheduler_loop
+    loop = asyncio.get_running_loop()
+    if _scheduler is None or _scheduler_loop is not loop:
+        _scheduler = FairRequestScheduler(settings.GITHUB_GLOBAL_MAX_CONCURRENCY)
+        _scheduler_loop = loop
+    return _scheduler
+
+
+def scheduler_stats() -> Dict:
+    if _scheduler is None:
+        return {"slots": settings.GITHUB_GLOBAL_MAX_CONCURRENCY, "in_use": 0, "waiting": 0, "tenants": {}}
+    return _scheduler.stats()
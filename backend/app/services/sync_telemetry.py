@@ -0,0 +1,253 @@
+"""
+Per-sync performance telemetry, stored in `sync_runs`.
+
+`SyncRunRecorder` snapshots a sync's counters at every phase boundary and
+records the differences per phase:
+
+- GitHub: requests, 304s served from the ETag cache, bytes received, summed
+  round-trip time, and time waiting on the rate-limit governor (all from
+  the sync's `GitHubClient.stats`).
+- Database: time in batched upserts (`BulkUpserter.write_seconds`), rows
+  inserted (growth of the repository's rows and label links, plus the
+  contributors this sync inserted) and rows updated (the remaining upserted
+  rows).
+- Memory: the highest process RSS sampled at phase boundaries, after every
+  committed page and when the run finishes, raised to the process's peak
+  RSS (`getrusage` ru_maxrss) where that is within the phase. It is
+  process-wide, so concurrent syncs share it.
+
+Recording never fails a sync: errors are logged and the run is dropped, as
+is the run of a repository deleted while it synced.
+`GET /repositories/{id}/sync-runs` returns the latest runs, so slow phases
+and regressions show up over time.
+"""
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.models import (
+    Comment, ContributionEvent, Issue, Label, PullRequest, Repository, Review, SyncRun,
+    issue_labels,
+)
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Tables whose rows a sync writes for one repository.
+REPO_TABLES = (PullRequest, Issue, Review, Comment, Label, ContributionEvent)
+# Counters snapshotted at phase boundaries.
+COUNTERS = (
+    "api_calls", "cache_hits", "bytes_received", "request_seconds",
+    "rate_limit_wait_seconds", "write_seconds", "rows_written", "new_contributors",
+    "stored_rows",
+)
+
+_sysconf = getattr(os, "sysconf", None)
+try:
+    _PAGE_SIZE = _sysconf("SC_PAGE_SIZE") if _sysconf else None
+except (ValueError, OSError):
+    _PAGE_SIZE = None
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Highest resident set size of this process so far; None without
+    `resource` (Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def current_rss_bytes() -> Optional[int]:
+    """Resident set size of this process; the peak so far where the current
+    value is unavailable (no /proc), None on platforms without either."""
+    if _PAGE_SIZE:
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * _PAGE_SIZE
+        except (OSError, ValueError, IndexError):
+            pass
+    return peak_rss_bytes()
+
+
+def stored_rows(db: Session, repo_id: int) -> int:
+    """Rows of `repo_id` a sync can insert, counted in one query. Contributors
+    are shared by all repositories (and concurrent syncs), so they are
+    counted from the sync's own inserts instead."""
+    counts = [
+        select(func.count()).select_from(model)
+        .where(model.repository_id == repo_id).scalar_subquery()
+        for model in REPO_TABLES
+    ]
+    counts.append(
+        select(func.count()).select_from(issue_labels)
+        .where(issue_labels.c.issue_id.in_(select(Issue.id).where(Issue.repository_id == repo_id)))
+        .scalar_subquery()
+    )
+    return sum(db.execute(select(*counts)).one())
+
+
+def _max(a: Optional[int], b: Optional[int]) -> Optional[int]:
+    return b if a is None else a if b is None else max(a, b)
+
+
+class SyncRunRecorder:
+    """Collects per-phase counters of one sync run and saves them as a SyncRun."""
+
+    def __init__(self, db: Session, repo_id: int, client, writer, ingest_mode: str = None,
+                 full_resync: bool = False, init_started: float = None):
+        """`init_started` is the perf_counter() at which `init_sync` began on
+        the same client; its requests are then recorded as phase "init"."""
+        self.db = db
+        self.repo_id = repo_id
+        self.client = client
+        self.writer = writer
+        self.ingest_mode = ingest_mode
+        self.full_resync = full_resync
+        self.phases: Dict[str, Dict] = {}
+        self._phase: Optional[str] = None
+        self._phase_started = 0.0
+        self._baseline: Dict = {}
+        self._peak: Optional[int] = None
+        # Process peak RSS when the phase started; a higher peak at its end
+        # was reached during the phase.
+        self._peak_before: Optional[int] = None
+        self._errors: Dict[str, str] = {}
+
+        now = time.perf_counter()
+        self._run_started = init_started if init_started is not None else now
+        self.started_at = datetime.utcnow() - timedelta(seconds=now - self._run_started)
+        if init_started is not None:
+            try:
+                counters = self._counters()
+                before = dict.fromkeys(COUNTERS, 0)
+                before["stored_rows"] = counters["stored_rows"]
+                self._phase, self._phase_started, self._baseline = "init", init_started, before
+                self._peak = current_rss_bytes()
+                self._close(now, counters)
+            except Exception as e:
+                self._phase = None
+                logger.warning(f"Sync telemetry: could not record phase init: {e}")
+
+    def _counters(self) -> Dict:
+        stats = self.client.stats
+        return {
+            "api_calls": stats["requests"],
+            "cache_hits": stats["cache_hits"],
+            "bytes_received": stats["bytes_received"],
+            "request_seconds": stats["request_seconds"],
+            "rate_limit_wait_seconds": stats["rate_limit_wait"],
+            "write_seconds": self.writer.write_seconds,
+            "rows_written": self.writer.rows_written,
+            "new_contributors": self.writer.rows_inserted_one,
+            "stored_rows": stored_rows(self.db, self.repo_id),
+        }
+
+    def phase(self, name: str) -> None:
+        """End the current phase (if any) and start `name`."""
+        try:
+            now = time.perf_counter()
+            counters = self._counters()
+            if self._phase is not None:
+                self._close(now, counters)
+            self._phase, self._phase_started, self._baseline = name, now, counters
+            self._peak = current_rss_bytes()
+            self._peak_before = peak_rss_bytes()
+        except Exception as e:
+            logger.warning(f"Sync telemetry: could not start phase {name}: {e}")
+
+    def sample(self) -> None:
+        """Sample memory (after each committed page)."""
+        self._peak = _max(self._peak, current_rss_bytes())
+
+    def phase_failed(self, error) -> None:
+        if self._phase is not None:
+            self._errors[self._phase] = str(error)
+
+    def _close(self, now: float, after: Dict) -> None:
+        peak = _max(self._peak, current_rss_bytes())
+        process_peak = peak_rss_bytes()
+        if None not in (self._peak_before, process_peak) and process_peak > self._peak_before:
+            peak = max(peak or 0, process_peak)
+        before = self._baseline
+        delta = {key: after[key] - before[key] for key in COUNTERS}
+        inserted = max(delta["stored_rows"], 0) + delta["new_contributors"]
+        metrics = {
+            "wall_seconds": round(now - self._phase_started, 3),
+            "api_calls": delta["api_calls"],
+            "cache_hits": delta["cache_hits"],
+            "bytes_received": delta["bytes_received"],
+            "request_seconds": round(delta["request_seconds"], 3),
+            "rate_limit_wait_seconds": round(delta["rate_limit_wait_seconds"], 3),
+            "write_seconds": round(delta["write_seconds"], 3),
+            "rows_inserted": inserted,
+            "rows_updated": max(delta["rows_written"] - inserted, 0),
+            "peak_rss_bytes": peak,
+        }
+        if self._phase in self._errors:
+            metrics["error"] = self._errors[self._phase]
+        self.phases[self._phase] = metrics
+        self._phase = None
+
+    def finish(self, status: str, error: str = None) -> Optional[SyncRun]:
+        """End the current phase and save the run (committing it). Keeps the
+        latest SYNC_RUNS_KEEP runs per repository."""
+        try:
+            now = time.perf_counter()
+            if self._phase is not None:
+                self._close(now, self._counters())
+            if self.db.query(Repository.id).filter(Repository.id == self.repo_id).first() is None:
+                return None
+            totals = {
+                key: sum(p[key] for p in self.phases.values())
+                for key in ("api_calls", "cache_hits", "bytes_received", "rows_inserted", "rows_updated")
+            }
+            run = SyncRun(
+                repository_id=self.repo_id,
+                status=status,
+                ingest_mode=self.ingest_mode,
+                full_resync=self.full_resync,
+                started_at=self.started_at,
+                finished_at=datetime.utcnow(),
+                wall_seconds=round(now - self._run_started, 3),
+                request_seconds=round(sum(p["request_seconds"] for p in self.phases.values()), 3),
+                rate_limit_wait_seconds=round(
+                    sum(p["rate_limit_wait_seconds"] for p in self.phases.values()), 3
+                ),
+                write_seconds=round(sum(p["write_seconds"] for p in self.phases.values()), 3),
+                peak_rss_bytes=max(
+                    (p["peak_rss_bytes"] for p in self.phases.values() if p["peak_rss_bytes"]),
+                    default=None,
+                ),
+                phases=json.dumps(self.phases),
+                error=error,
+                **totals,
+            )
+            self.db.add(run)
+            self.db.flush()
+            stale = (
+                select(SyncRun.id).where(SyncRun.repository_id == self.repo_id)
+                .order_by(SyncRun.id.desc()).offset(settings.SYNC_RUNS_KEEP)
+            )
+            self.db.query(SyncRun).filter(SyncRun.id.in_(stale)).delete(synchronize_session=False)
+            self.db.commit()
+            logger.info("Sync phases: " + ", ".join(
+                f"{name} {p['wall_seconds']:.1f}s ({p['api_calls']} calls, "
+                f"{p['rate_limit_wait_seconds']:.1f}s rate-limited, {p['write_seconds']:.1f}s writing)"
+                for name, p in self.phases.items()
+            ))
+            return run
+        except Exception as e:
+            self.db.rollback()
+            logger.warning(f"Sync telemetry: could not record run: {e}")
+            return None
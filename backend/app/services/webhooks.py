@@ -0,0 +1,413 @@
+"""
+GitHub webhook ingestion.
+
+`POST /api/webhooks/github` checks the delivery's `X-Hub-Signature-256`
+against `GITHUB_WEBHOOK_SECRET` and queues it here; the API answers as soon
+as the delivery is queued. `WebhookApplier` drains the queue in batches (up
+to `WEBHOOK_BATCH_SIZE` deliveries, at least every `WEBHOOK_FLUSH_SECONDS`)
+and applies each batch in one transaction through the collector's own
+transform and write path (`DataCollector._transform_*` / `_apply_rows`),
+so rows, events and contributors come out exactly as a sync would write
+them.
+
+Applied events, for tracked repositories only:
+
+- `pull_request`, `issues`: the item's row, labels and lifecycle events.
+- `pull_request_review`: the review row and event; reviews_count, has_review,
+  time_to_first_review and review_wait_time are updated from stored reviews.
+- `issue_comment` (on issues): the comment row and event;
+  has_maintainer_response, first_responder_id and time_to_first_response are
+  updated if the comment is an earlier response than the stored one.
+- `push` to the default branch: a commit event per commit whose author
+  resolves to a known (or the pushing) GitHub user.
+
+Items keep their stored updated_at (none for new ones): a payload carries
+no reviews or comments, so the next sync must still fetch the item's
+children rather than skip it as unchanged. The queue lives in memory:
+deliveries still queued when the process dies are lost (GitHub can redeliver
+them; the next sync catches up in any case).
+"""
+import asyncio
+import hashlib
+import hmac
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models import Contributor, Issue, PullRequest, Repository, Review
+from app.services.data_collector import DataCollector
+from app.services.sync_events import publish_data_changed
+from app.services.github_records import (
+    CommentRecord, CommitRecord, IssueRecord, PullRequestRecord, ReviewRecord, UserRecord, parse_dt,
+)
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+SUPPORTED_EVENTS = ("pull_request", "pull_request_review", "issues", "issue_comment", "push")
+# Actions that remove or move an item; syncs never delete rows, so neither do webhooks.
+IGNORED_ACTIONS = ("deleted", "transferred")
+
+
+def verify_signature(secret: str, body: bytes, signature: Optional[str]) -> bool:
+    """True if `signature` (X-Hub-Signature-256) is the HMAC-SHA256 of `body`."""
+    if not secret or not signature or not signature.startswith("sha256="):
+        return False
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(signature[len("sha256="):], expected)
+
+
+class WebhookDelivery:
+    __slots__ = ("event", "delivery_id", "payload", "received_at")
+
+    def __init__(self, event: str, delivery_id: Optional[str], payload: Dict):
+        self.event = event
+        self.delivery_id = delivery_id
+        self.payload = payload
+        self.received_at = time.monotonic()
+
+
+class _Derived:
+    """Derived fields to bring up to date once a batch's rows are written."""
+
+    def __init__(self):
+        self.prs = defaultdict(set)  # repo_id -> PR github_ids
+        self.responses = []  # (repo_id, issue github_id, CommentRecord)
+
+
+def apply_deliveries(db: Session, deliveries: List[WebhookDelivery]) -> Dict[str, int]:
+    """Apply `deliveries` in one transaction. Returns applied/ignored counts."""
+    repo_ids = _tracked_repositories(db, deliveries)
+    collector = DataCollector(db)
+    derived = _Derived()
+    changed = set()
+    applied = ignored = 0
+    for delivery in deliveries:
+        repo_id = repo_ids.get((delivery.payload.get("repository") or {}).get("id"))
+        handler = _HANDLERS.get(delivery.event)
+        if (repo_id is None or handler is None
+                or delivery.payload.get("action") in IGNORED_ACTIONS
+                or not handler(collector, repo_id, delivery.payload, derived)):
+            ignored += 1
+            continue
+        applied += 1
+        changed.add(repo_id)
+    collector.writer.flush()
+    now = datetime.utcnow()
+    for repo_id, github_ids in derived.prs.items():
+        _refresh_pr_reviews(db, repo_id, github_ids, now)
+    for repo_id, issue_github_id, comment in derived.responses:
+        _record_response(collector, repo_id, issue_github_id, comment)
+    db.commit()
+    for repo_id in changed:
+        publish_data_changed(repo_id, "webhook")
+    return {"applied": applied, "ignored": ignored}
+
+
+def _tracked_repositories(db: Session, deliveries) -> Dict[int, int]:
+    """{repository github_id: row id} for the repositories in `deliveries`."""
+    github_ids = {
+        (d.payload.get("repository") or {}).get("id") for d in deliveries
+    } - {None}
+    if not github_ids:
+        return {}
+    return dict(
+        db.query(Repository.github_id, Repository.id)
+        .filter(Repository.github_id.in_(github_ids)).all()
+    )
+
+
+# ----------------------------------------------------------------------
+# Event handlers: queue rows on the collector; True if anything applied.
+# ----------------------------------------------------------------------
+def _pr_rows(collector, repo_id, pr):
+    """(record, RowSet) for a payload PR; None if it has no author. Reviews
+    are left to pull_request_review deliveries.
+
+    The row is written as an incomplete item: the stored updated_at is kept
+    (NULL for a new PR), so the next incremental sync doesn't skip the PR as
+    unchanged and backfills reviews the payload doesn't carry."""
+    data = PullRequestRecord.from_api(pr)
+    if data.user is None:
+        return None
+    return data, collector._transform_pr(repo_id, (data, None, False))
+
+
+def _issue_rows(collector, repo_id, issue):
+    """(record, RowSet) for a payload issue; None if it has no author or is
+    a PR conversation (PRs come from pull_request deliveries). Like
+    `_pr_rows`, it leaves updated_at to the sync that fetches the comments."""
+    if "pull_request" in issue:
+        return None
+    data = IssueRecord.from_api(issue)
+    if data.user is None:
+        return None
+    return data, collector._transform_issue(repo_id, (data, data.labels, None, False))
+
+
+def _apply_pull_request(collector, repo_id, payload, derived) -> bool:
+    item = _pr_rows(collector, repo_id, payload["pull_request"])
+    if item is None:
+        return False
+    data, rows = item
+    collector._apply_rows(repo_id, rows)
+    derived.prs[repo_id].add(data.id)
+    return True
+
+
+def _apply_pull_request_review(collector, repo_id, payload, derived) -> bool:
+    item = _pr_rows(collector, repo_id, payload["pull_request"])
+    if item is None:
+        return False
+    data, rows = item
+    review = dict(payload["review"])
+    # Webhooks send the state lower-case; the REST listing upper-case.
+    review["state"] = (review.get("state") or "").upper()
+    collector._add_review(repo_id, data, ReviewRecord.from_api(review), rows)
+    collector._apply_rows(repo_id, rows)
+    derived.prs[repo_id].add(data.id)
+    return True
+
+
+def _apply_issue(collector, repo_id, payload, derived) -> bool:
+    item = _issue_rows(collector, repo_id, payload["issue"])
+    if item is None:
+        return False
+    collector._apply_rows(repo_id, item[1])
+    return True
+
+
+def _apply_issue_comment(collector, repo_id, payload, derived) -> bool:
+    item = _issue_rows(collector, repo_id, payload["issue"])
+    if item is None:
+        return False
+    data, rows = item
+    comment = CommentRecord.from_api(payload["comment"])
+    collector._add_comment(repo_id, data, comment, rows)
+    collector._apply_rows(repo_id, rows)
+    derived.responses.append((repo_id, data.id, comment))
+    return True
+
+
+def _apply_push(collector, repo_id, payload, derived) -> bool:
+    repository = payload.get("repository") or {}
+    branch = repository.get("default_branch") or repository.get("master_branch")
+    if not branch or payload.get("ref") != f"refs/heads/{branch}":
+        return False
+    sender = UserRecord.from_api(payload.get("sender"))
+    applied = False
+    for commit in payload.get("commits") or []:
+        if not commit.get("distinct", True):
+            continue  # already pushed to another branch
+        author = _commit_author(collector.db, (commit.get("author") or {}).get("username"), sender)
+        record = CommitRecord(commit.get("id"), author, parse_dt(commit.get("timestamp")))
+        rows = collector._transform_commit(record)
+        if rows is not None:
+            collector._apply_rows(repo_id, rows)
+            applied = True
+    return applied
+
+
+def _commit_author(db: Session, username: Optional[str], sender: Optional[UserRecord]):
+    """UserRecord for a push commit's author. Push payloads carry only the
+    author's login, so it must be the pusher or an already known contributor."""
+    if not username:
+        return None
+    if sender is not None and sender.login and sender.login.lower() == username.lower():
+        return sender
+    known = db.query(Contributor).filter(func.lower(Contributor.login) == username.lower()).first()
+    if known is None or known.github_id is None:
+        return None
+    return UserRecord(known.github_id, known.login, known.avatar_url, known.html_url)
+
+
+_HANDLERS = {
+    "pull_request": _apply_pull_request,
+    "pull_request_review": _apply_pull_request_review,
+    "issues": _apply_issue,
+    "issue_comment": _apply_issue_comment,
+    "push": _apply_push,
+}
+
+
+# ----------------------------------------------------------------------
+# Derived fields
+# ----------------------------------------------------------------------
+def _refresh_pr_reviews(db: Session, repo_id: int, github_ids, now: datetime) -> None:
+    """Bring review-derived PR fields up to date with the stored reviews.
+    Counts and first-review times only move forward, as reviews outside the
+    stored set (e.g. without a submission time) still count."""
+    prs = db.query(PullRequest).filter(
+        PullRequest.repository_id == repo_id, PullRequest.github_id.in_(github_ids)
+    ).all()
+    stats = {
+        pr_id: (count, first)
+        for pr_id, count, first in db.query(
+            Review.pull_request_id, func.count(Review.id), func.min(Review.submitted_at)
+        ).filter(Review.pull_request_id.in_([pr.id for pr in prs])).group_by(Review.pull_request_id)
+    }
+    for pr in prs:
+        count, first = stats.get(pr.id, (0, None))
+        pr.reviews_count = max(pr.reviews_count or 0, count)
+        pr.has_review = pr.reviews_count > 0
+        if first and pr.created_at:
+            hours = (first - pr.created_at).total_seconds() / 3600.0
+            if pr.time_to_first_review is None or hours < pr.time_to_first_review:
+                pr.time_to_first_review = hours
+        if pr.time_to_first_review is not None:
+            pr.review_wait_time = None
+        elif pr.state == "open" and pr.created_at:
+            pr.review_wait_time = (now - pr.created_at).total_seconds() / 3600.0
+
+
+def _record_response(collector, repo_id: int, issue_github_id: int, comment: CommentRecord) -> None:
+    """Update the issue's response fields if `comment` is a response (not by
+    the author) earlier than the stored first response."""
+    issue = collector.db.query(Issue).filter(
+        Issue.repository_id == repo_id, Issue.github_id == issue_github_id
+    ).first()
+    commenter_id = collector._sync_contributor(comment.user)
+    if issue is None or commenter_id is None or commenter_id == issue.author_id:
+        return
+    issue.has_maintainer_response = True
+    if not comment.created_at or not issue.created_at:
+        return
+    hours = (comment.created_at - issue.created_at).total_seconds() / 3600.0
+    if issue.time_to_first_response is None or hours < issue.time_to_first_response:
+        issue.time_to_first_response = hours
+        issue.first_responder_id = commenter_id
+
+
+# ----------------------------------------------------------------------
+# Queue
+# ----------------------------------------------------------------------
+class WebhookApplier:
+    """In-memory delivery queue drained in batches by `run()`."""
+
+    def __init__(self, batch_size: int = None, flush_seconds: float = None, max_queued: int = None):
+        self.batch_size = batch_size or settings.WEBHOOK_BATCH_SIZE
+        self.flush_seconds = flush_seconds or settings.WEBHOOK_FLUSH_SECONDS
+        self.queue: asyncio.Queue = asyncio.Queue(max_queued or settings.WEBHOOK_QUEUE_MAX)
+        self.received = 0
+        self.rejected = 0
+        self.applied = 0
+        self.ignored = 0
+        self.failed = 0
+        self.batches = 0
+        self.max_lag_seconds = 0.0
+        # Batch being collected by `run()`: taken off the queue but not yet
+        # applied, so `drain()` must apply it if the loop is cancelled.
+        self._pending: List[WebhookDelivery] = []
+
+    def submit(self, event: str, delivery_id: Optional[str], payload: Dict) -> bool:
+        """Queue a verified delivery; False if the queue is full."""
+        try:
+            self.queue.put_nowait(WebhookDelivery(event, delivery_id, payload))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return False
+        self.received += 1
+        return True
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            self._pending = [await self.queue.get()]
+            deadline = loop.time() + self.flush_seconds
+            while len(self._pending) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    self._pending.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            batch, self._pending = self._pending, []
+            self.apply(batch)
+
+    def drain(self) -> None:
+        """Apply the batch `run()` was collecting and everything still queued
+        (shutdown)."""
+        if self._pending:
+            batch, self._pending = self._pending, []
+            self.apply(batch)
+        while not self.queue.empty():
+            batch = []
+            while len(batch) < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            self.apply(batch)
+
+    def apply(self, batch: List[WebhookDelivery]) -> None:
+        with SessionLocal() as db:
+            try:
+                counts = apply_deliveries(db, batch)
+            except Exception as e:
+                db.rollback()
+                logger.warning(f"Webhook batch of {len(batch)} failed ({e}); applying one by one")
+                counts = {"applied": 0, "ignored": 0}
+                for delivery in batch:
+                    try:
+                        for key, n in apply_deliveries(db, [delivery]).items():
+                            counts[key] += n
+                    except Exception as e:  # noqa: BLE001
+                        db.rollback()
+                        self.failed += 1
+                        logger.error(
+                            f"Webhook delivery {delivery.delivery_id} ({delivery.event}) failed: {e}"
+                        )
+        self.applied += counts["applied"]
+        self.ignored += counts["ignored"]
+        self.batches += 1
+        lag = time.monotonic() - min(d.received_at for d in batch)
+        self.max_lag_seconds = max(self.max_lag_seconds, lag)
+
+    def stats(self) -> Dict:
+        return {
+            "queued": self.queue.qsize() + len(self._pending),
+            "received": self.received,
+            "rejected": self.rejected,
+            "applied": self.applied,
+            "ignored": self.ignored,
+            "failed": self.failed,
+            "batches": self.batches,
+            "max_lag_seconds": round(self.max_lag_seconds, 3),
+        }
+
+
+_applier: Optional[WebhookApplier] = None
+_applier_task: Optional[asyncio.Task] = None
+
+
+def get_webhook_applier() -> WebhookApplier:
+    global _applier
+    if _applier is None:
+        _applier = WebhookApplier()
+    return _applier
+
+
+def start_webhook_applier() -> None:
+    """Start draining the delivery queue (API lifespan)."""
+    global _applier_task
+    if _applier_task is None:
+        _applier_task = asyncio.create_task(get_webhook_applier().run())
+
+
+async def stop_webhook_applier() -> None:
+    """Stop the drain loop and apply whatever is still queued."""
+    global _applier_task
+    if _applier_task is None:
+        return
+    _applier_task.cancel()
+    try:
+        await _applier_task
+    except asyncio.CancelledError:
+        pass
+    _applier_task = None
+    get_webhook_applier().drain()
@@ -0,0 +1,227 @@
+"""
+Sync worker pool.
+
+Runs queued `sync_jobs` (see `app.services.sync_jobs`), up to
+`SYNC_WORKER_CONCURRENCY` at a time. By default the API process starts one
+pool in its lifespan; with `SYNC_WORKER_EMBEDDED=false` the API only enqueues
+and syncs run in a separate process:
+
+    cd backend && python -m app.worker
+
+Any number of worker processes may share the database. A job's lease is
+renewed while it runs, so a job whose worker crashed is picked up again once
+its lease expires. Each pool also runs the auto-refresher
+(`app.services.auto_refresh`) unless `AUTO_REFRESH_ENABLED` is false.
+"""
+import asyncio
+import logging
+from typing import Dict, Optional
+
+from app.config import get_settings
+from app.database import SessionLocal
+from app.models import Repository, SyncJob
+from app.services import sync_jobs
+from app.services.auto_refresh import run_auto_refresh
+from app.services.data_collector import DataCollector
+from app.services.github_client import GitHubAPIError, GitHubClient
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# GitHub answers that fail a job without retries.
+PERMANENT_STATUSES = (401, 404)
+
+
+class SyncWorker:
+    def __init__(self, concurrency: int = None, poll_seconds: float = None):
+        self.worker_id = sync_jobs.new_worker_id()
+        self.concurrency = concurrency or settings.SYNC_WORKER_CONCURRENCY
+        self.poll_seconds = poll_seconds or settings.SYNC_WORKER_POLL_SECONDS
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._running: Dict[int, asyncio.Task] = {}
+        self._stopping = False
+
+    async def run(self) -> None:
+        """Claim and run jobs until `stop()`."""
+        logger.info(f"Sync worker {self.worker_id} started ({self.concurrency} slots)")
+        while not self._stopping:
+            await self._slots.acquire()
+            try:
+                job = self._claim()
+            except Exception as e:
+                logger.error(f"Sync worker could not claim a job: {e}")
+                job = None
+            if job is None:
+                self._slots.release()
+                await asyncio.sleep(self.poll_seconds)
+                continue
+            task = asyncio.create_task(self._run_job(job))
+            self._running[job.id] = task
+            task.add_done_callback(lambda _t, job_id=job.id: self._done(job_id))
+
+    async def stop(self) -> None:
+        """Stop claiming, cancel running syncs and hand their jobs back."""
+        self._stopping = True
+        tasks = list(self._running.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _done(self, job_id: int) -> None:
+        self._running.pop(job_id, None)
+        self._slots.release()
+
+    def _claim(self) -> Optional[SyncJob]:
+        db = SessionLocal()
+        try:
+            job = sync_jobs.claim_next_job(db, self.worker_id)
+            if job is not None:
+                db.expunge(job)
+            return job
+        finally:
+            db.close()
+
+    async def _run_job(self, job: SyncJob) -> None:
+        heartbeat = asyncio.create_task(self._heartbeat(job.id, asyncio.current_task()))
+        try:
+            await self._sync(job)
+        except asyncio.CancelledError:
+            self._record(sync_jobs.release_job, job.id)
+            raise
+        except Exception as e:
+            logger.error(f"Sync job {job.id} ({job.owner}/{job.name}) failed: {e}")
+            # Retrying won't make a missing or unreadable repository appear.
+            permanent = isinstance(e, GitHubAPIError) and e.status_code in PERMANENT_STATUSES
+            self._record(sync_jobs.abandon_job if permanent else sync_jobs.fail_job, job.id, str(e))
+        else:
+            self._record(sync_jobs.complete_job, job.id)
+        finally:
+            heartbeat.cancel()
+
+    async def _sync(self, job: SyncJob) -> None:
+        db = SessionLocal()
+        try:
+            if db.query(Repository).get(job.repository_id) is None:
+                raise RuntimeError("repository no longer tracked")
+            # Requests are scheduled fairly per repository, by job priority.
+            client = GitHubClient(tenant=f"{job.owner}/{job.name}", priority=job.priority)
+            collector = DataCollector(db, client=client)
+            repo = await collector.init_sync(
+                job.owner, job.name, job.ingest_mode, full_resync=job.full_resync
+            )
+            if repo.id != job.repository_id:
+                # Enqueued under a name GitHub resolved to an already tracked
+                # (e.g. renamed) repository; drop the unused placeholder.
+                placeholder = db.query(Repository).get(job.repository_id)
+                if placeholder is not None and placeholder.github_id is None:
+                    db.query(SyncJob).filter(SyncJob.repository_id == placeholder.id).update(
+                        {SyncJob.repository_id: repo.id}
+                    )
+                    db.delete(placeholder)
+                    db.commit()
+            await collector.execute_sync(repo.id, job.owner, job.name, full_resync=job.full_resync)
+            # execute_sync reports failure through the repository row.
+            db.expire_all()
+            if repo.sync_status != "completed":
+                raise RuntimeError(f"sync ended with status {repo.sync_status!r}")
+        finally:
+            db.close()
+
+    async def _heartbeat(self, job_id: int, sync_task: asyncio.Task) -> None:
+        """Renew the job's lease; cancel the sync once the lease is lost (the
+        job was deleted with its repository, or another worker took it)."""
+        interval = settings.SYNC_JOB_LEASE_SECONDS / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                held = self._record(sync_jobs.renew_lease, job_id)
+            except Exception as e:
+                # e.g. the database is busy; the lease has slack for a retry.
+                logger.warning(f"Could not renew lease of sync job {job_id}: {e}")
+                continue
+            if not held:
+                logger.warning(f"Sync job {job_id} lease lost; cancelling its sync")
+                sync_task.cancel()
+                return
+
+    def _record(self, fn, job_id: int, *args):
+        db = SessionLocal()
+        try:
+            return fn(db, job_id, self.worker_id, *args)
+        finally:
+            db.close()
+
+
+_worker: Optional[SyncWorker] = None
+_worker_task: Optional[asyncio.Task] = None
+_refresh_task: Optional[asyncio.Task] = None
+
+
+def _start_auto_refresh() -> Optional[asyncio.Task]:
+    if not settings.AUTO_REFRESH_ENABLED:
+        return None
+    return asyncio.create_task(run_auto_refresh())
+
+
+async def _cancel(task: Optional[asyncio.Task]) -> None:
+    if task is None:
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
+def start_embedded_worker() -> None:
+    """Start the in-process worker pool and auto-refresher (API lifespan),
+    unless disabled."""
+    global _worker, _worker_task, _refresh_task
+    if not settings.SYNC_WORKER_EMBEDDED or _worker is not None:
+        return
+    _worker = SyncWorker()
+    _worker_task = asyncio.create_task(_worker.run())
+    _refresh_task = _start_auto_refresh()
+
+
+async def stop_embedded_worker() -> None:
+    global _worker, _worker_task, _refresh_task
+    if _worker is None:
+        return
+    await _cancel(_refresh_task)
+    await _worker.stop()
+    await _cancel(_worker_task)
+    _worker = _worker_task = _refresh_task = None
+
+
+async def main() -> None:
+    from app.database import Base, engine
+    from app.migrations import run_additive_migrations
+    from app.services.contributor_cache import warm_contributor_cache
+    from app.services.github_cache import close_response_cache
+    from app.services.github_cassette import close_cassette
+    from app.services.github_client import close_http_client
+
+    Base.metadata.create_all(bind=engine)
+    run_additive_migrations()
+    with SessionLocal() as db:
+        warm_contributor_cache(db)
+
+    worker = SyncWorker()
+    refresh_task = _start_auto_refresh()
+    try:
+        await worker.run()
+    finally:
+        await _cancel(refresh_task)
+        await worker.stop()
+        await close_http_client()
+        close_response_cache()
+        close_cassette()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,98 @@
+"""
+Offline sync benchmark / regression check.
+
+Runs DataCollector.init_sync + execute_sync for one repository against a
+scratch SQLite database, with GitHub traffic served from a recorded cassette
+(see app/services/github_cassette.py), and reports wall time, request counts
+and row counts. Exits non-zero if the sync does not complete.
+
+Usage (from backend/):
+    # 1. Record once, with network access and a GITHUB_TOKEN in .env
+    python bench_sync.py octocat/Hello-World --record
+    # 2. Replay offline, as often as you like
+    python bench_sync.py octocat/Hello-World --latency-ms 50 --runs 3
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("repo", help="owner/name")
+    parser.add_argument("--cassette", default=os.path.join(BACKEND_DIR, "github_cassette.jsonl.gz"))
+    parser.add_argument("--record", action="store_true", help="hit the live API and record a cassette")
+    parser.add_argument("--latency-ms", type=int, default=0, help="simulated latency per replayed call")
+    parser.add_argument("--runs", type=int, default=1)
+    parser.add_argument("--db", default=os.path.join(BACKEND_DIR, "bench.db"))
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if "/" not in args.repo:
+        sys.exit("Repository must be in format 'owner/name'")
+    owner, name = args.repo.split("/", 1)
+
+    # Configure before any app module reads settings.
+    os.environ["GITHUB_CASSETTE_MODE"] = "record" if args.record else "replay"
+    os.environ["GITHUB_CASSETTE_PATH"] = args.cassette
+    os.environ["GITHUB_CASSETTE_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["DATABASE_URL"] = f"sqlite:///{args.db}"
+    # Every run must see the same responses, not 304s from a warm ETag cache.
+    os.environ["GITHUB_CACHE_ENABLED"] = "false"
+    if not args.record:
+        os.environ.setdefault("GITHUB_TOKEN", "replay")
+    sys.path.append(BACKEND_DIR)
+
+    from app.database import engine, Base, SessionLocal
+    from app import models
+    from app.migrations import run_additive_migrations
+    from app.services.contributor_cache import get_contributor_cache
+    from app.services.data_collector import DataCollector
+    from app.services.github_cassette import close_cassette
+
+    async def run_once():
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+        run_additive_migrations()
+        # Cached contributor ids point at the rows just dropped.
+        get_contributor_cache().clear()
+        db = SessionLocal()
+        try:
+            collector = DataCollector(db)
+            start = time.perf_counter()
+            repo = await collector.init_sync(owner, name)
+            await collector.execute_sync(repo.id, owner, name)
+            elapsed = time.perf_counter() - start
+        finally:
+            db.close()
+
+        db = SessionLocal()
+        try:
+            repo = db.query(models.Repository).filter(models.Repository.full_name == args.repo).first()
+            counts = {
+                m.__tablename__: db.query(m).count()
+                for m in (models.PullRequest, models.Issue, models.Review, models.Comment,
+                          models.Contributor, models.ContributionEvent)
+            }
+            return elapsed, collector.client.stats, repo.sync_status if repo else None, counts
+        finally:
+            db.close()
+
+    failed = False
+    for i in range(args.runs):
+        elapsed, stats, status, counts = asyncio.run(run_once())
+        print(f"run {i + 1}: {elapsed:.2f}s status={status} requests={stats['requests']}")
+        print("  " + ", ".join(f"{k}={v}" for k, v in counts.items()))
+        failed = failed or status != "completed"
+    close_cassette()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Test setup: a scratch SQLite database and GitHub served by `FakeGitHub`.
+
+Settings are read once at import, so the environment is fixed here before
+anything from `app` is imported. Run from backend/: `python -m pytest`.
+"""
+import asyncio
+import os
+import shutil
+import tempfile
+
+import pytest
+
+_TMP = tempfile.mkdtemp(prefix="repo-health-tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{_TMP}/test.db",
+    "GITHUB_TOKEN": "test-token",
+    "GITHUB_TOKENS": "",
+    "GITHUB_CACHE_PATH": f"{_TMP}/github_cache.db",
+    "GITHUB_CASSETTE_MODE": "off",
+    "GITHUB_WEBHOOK_SECRET": "test-secret",
+    "AUTO_REFRESH_ENABLED": "false",
+    "SYNC_WORKER_EMBEDDED": "false",
+})
+
+from fake_github import API_URL, FakeGitHub  # noqa: E402
+
+os.environ["GITHUB_API_URL"] = API_URL
+
+from sqlalchemy import text  # noqa: E402
+
+from app.database import Base, SessionLocal, engine  # noqa: E402
+import app.models  # noqa: E402,F401
+from app.migrations import run_additive_migrations  # noqa: E402
+from app.services import contributor_cache, github_cache, github_client, rate_limit  # noqa: E402
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_TMP, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def fresh_state():
+    """Empty database and process-wide caches for every test."""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    run_additive_migrations()
+    with engine.connect() as connection:
+        connection.execute(text("PRAGMA journal_mode=WAL;"))
+        connection.commit()
+    github_cache.close_response_cache()
+    for suffix in ("", "-wal", "-shm"):
+        path = os.environ["GITHUB_CACHE_PATH"] + suffix
+        if os.path.exists(path):
+            os.remove(path)
+    contributor_cache._cache = None
+    rate_limit._governors.clear()
+    rate_limit._pool = None
+    yield
+    github_cache.close_response_cache()
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def github(monkeypatch):
+    """A FakeGitHub that every GitHubClient talks to."""
+    fake = FakeGitHub()
+    monkeypatch.setattr(github_client, "get_http_client", fake.http_client)
+    return fake
+
+
+@pytest.fixture
+def sync(github):
+    """sync(owner, name, **init_kwargs): run init_sync + execute_sync to the
+    end on a fresh session; returns the repository id."""
+    from app.services.data_collector import DataCollector
+
+    def run(owner: str, name: str, **kwargs) -> int:
+        async def main():
+            with SessionLocal() as session:
+                collector = DataCollector(session)
+                repo = await collector.init_sync(owner, name, **kwargs)
+                await collector.execute_sync(
+                    repo.id, owner, name, full_resync=kwargs.get("full_resync", False)
+                )
+                return repo.id
+        return asyncio.run(main())
+    return run
@@ -0,0 +1,186 @@
+"""
+In-process stand-in for the GitHub REST API, served through
+`httpx.MockTransport`.
+
+Each repository `owner/name` added with `add_repo` gets generated PRs (with
+reviews), issues (with labels and comments) and commits. Listings honour
+`per_page`/`page` and return Link headers with rel="next"/"last"; every 200
+carries an ETag, and a matching `If-None-Match` gets a 304. `calls` counts
+requests by path (`pages` by path and page number), `fail` makes a path, or
+one page of it ("path?page=2"), answer 500, and `latency` delays every
+response, so concurrent syncs interleave as they would against the real API.
+"""
+import asyncio
+import hashlib
+import json
+from collections import Counter
+from datetime import datetime, timedelta
+
+import httpx
+
+API_URL = "https://api.github.test"
+
+
+def iso(value: datetime) -> str:
+    return value.replace(microsecond=0).isoformat() + "Z"
+
+
+def user(i: int) -> dict:
+    return {"id": 1000 + i, "login": f"user{i}", "avatar_url": f"https://a/{i}",
+            "html_url": f"https://github.com/user{i}", "type": "User"}
+
+
+class FakeRepo:
+    def __init__(self, github_id: int, owner: str, name: str, prs: int, issues: int, commits: int):
+        now = datetime.utcnow().replace(microsecond=0)
+        self.github_id = github_id
+        self.owner = owner
+        self.name = name
+        self.prs = []
+        self.reviews = {}
+        for n in range(1, prs + 1):
+            created = now - timedelta(days=n)
+            merged = iso(created + timedelta(hours=20)) if n % 2 == 0 else None
+            self.prs.append({
+                "id": github_id * 100000 + n, "number": n, "title": f"PR {n}",
+                "state": "closed" if merged else "open",
+                "created_at": iso(created), "updated_at": iso(created + timedelta(hours=n % 24 + 1)),
+                "closed_at": merged, "merged_at": merged, "user": user(github_id * 1000 + n),
+            })
+            self.reviews[n] = [{
+                "id": github_id * 1000000 + n * 10 + k, "user": user((n + k + 1) % 7),
+                "state": "APPROVED", "submitted_at": iso(created + timedelta(hours=2 + k)),
+            } for k in range(n % 3)]
+        self.issues = []
+        self.comments = {}
+        for k in range(issues):
+            n = prs + 1 + k
+            created = now - timedelta(days=k + 1, hours=3)
+            self.issues.append({
+                "id": github_id * 100000 + n, "number": n, "title": f"Issue {n}",
+                "state": "open" if k % 2 else "closed",
+                "created_at": iso(created), "updated_at": iso(created + timedelta(hours=5)),
+                "closed_at": None if k % 2 else iso(created + timedelta(days=1)),
+                "user": user(github_id * 1000 + 500 + k), "assignee": None, "comments": k % 3,
+                "labels": [{"id": github_id * 100 + k % 2, "name": ["bug", "question"][k % 2],
+                            "color": "fff", "description": None}],
+            })
+            self.comments[n] = [{
+                "id": github_id * 1000000 + n * 10 + c, "user": user((k + c) % 5),
+                "created_at": iso(created + timedelta(hours=1 + c)),
+                "updated_at": iso(created + timedelta(hours=1 + c)),
+                "issue_url": f"{API_URL}/repos/{owner}/{name}/issues/{n}",
+            } for c in range(k % 3)]
+        self.commits = [{
+            "sha": f"{github_id:08x}{c:032x}", "author": user(c % 4),
+            "commit": {"author": {"date": iso(now - timedelta(days=c, hours=1))}},
+        } for c in range(commits)]
+        for pr in self.prs:
+            pr["updated_at"] = max(pr["updated_at"], pr["created_at"])
+        self.prs.sort(key=lambda p: p["updated_at"], reverse=True)
+        self.issues.sort(key=lambda i: i["updated_at"], reverse=True)
+
+    def metadata(self) -> dict:
+        return {"id": self.github_id, "name": self.name, "full_name": f"{self.owner}/{self.name}",
+                "owner": {"login": self.owner}, "html_url": f"https://github.com/{self.owner}/{self.name}",
+                "description": "fake", "open_issues_count": len(self.issues)}
+
+
+class FakeGitHub:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.repos = {}
+        self.calls = Counter()
+        self.pages = Counter()  # (path, page) of listing requests
+        self.not_modified = 0
+        self.fail = {}  # path or "path?page=N" -> remaining failures (status 500)
+        self._clients = {}
+
+    def add_repo(self, owner: str, name: str, prs: int = 12, issues: int = 8,
+                 commits: int = 5) -> FakeRepo:
+        repo = FakeRepo(len(self.repos) + 1, owner, name, prs, issues, commits)
+        self.repos[f"{owner}/{name}"] = repo
+        return repo
+
+    def http_client(self) -> httpx.AsyncClient:
+        """Replacement for `github_client.get_http_client` (one client per loop)."""
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._clients[loop] = httpx.AsyncClient(transport=httpx.MockTransport(self.handle))
+        return client
+
+    # ------------------------------------------------------------------
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        path = request.url.path
+        params = request.url.params
+        self.calls[path] += 1
+        self.pages[path, int(params.get("page", 1))] += 1
+        for key in (path, f"{path}?page={params.get('page', 1)}"):
+            if self.fail.get(key):
+                self.fail[key] -= 1
+                return httpx.Response(500, json={"message": "boom"})
+        parts = path.strip("/").split("/")
+        if parts[0] == "search":
+            return self._search(request, params.get("q", ""))
+        if parts[0] != "repos" or len(parts) < 3 or f"{parts[1]}/{parts[2]}" not in self.repos:
+            return httpx.Response(404, json={"message": "Not Found"})
+        repo = self.repos[f"{parts[1]}/{parts[2]}"]
+        rest = parts[3:]
+        since = params.get("since")
+        if not rest:
+            return self._respond(request, repo.metadata())
+        if rest == ["pulls"]:
+            return self._paged(request, repo.prs)
+        if rest[0] == "pulls" and rest[2:] == ["reviews"]:
+            return self._paged(request, repo.reviews.get(int(rest[1]), []))
+        if rest == ["issues"]:
+            items = repo.issues + [{**p, "pull_request": {}, "comments": 0, "labels": []} for p in repo.prs]
+            items = [i for i in items if not since or i["updated_at"] >= since]
+            return self._paged(request, sorted(items, key=lambda i: i["updated_at"], reverse=True))
+        if rest == ["issues", "comments"]:
+            items = [c for cs in repo.comments.values() for c in cs if not since or c["updated_at"] >= since]
+            return self._paged(request, sorted(items, key=lambda c: c["updated_at"]))
+        if rest[0] == "issues" and rest[2:] == ["labels"]:
+            issue = next((i for i in repo.issues if i["number"] == int(rest[1])), None)
+            return self._paged(request, issue["labels"] if issue else [])
+        if rest[0] == "issues" and rest[2:] == ["comments"]:
+            return self._paged(request, repo.comments.get(int(rest[1]), []))
+        if rest == ["commits"]:
+            items = [c for c in repo.commits if not since or c["commit"]["author"]["date"] >= since]
+            return self._paged(request, items)
+        return httpx.Response(404, json={"message": "Not Found"})
+
+    def _search(self, request: httpx.Request, q: str) -> httpx.Response:
+        repo = next((r for key, r in self.repos.items() if f"repo:{key}" in q), None)
+        count = 0
+        if repo is not None:
+            count = len(repo.prs) if "is:pr" in q else len(repo.issues)
+        return self._respond(request, {"total_count": count, "items": []})
+
+    def _paged(self, request: httpx.Request, items: list) -> httpx.Response:
+        page = int(request.url.params.get("page", 1))
+        per_page = int(request.url.params.get("per_page", 30))
+        last = max(1, -(-len(items) // per_page))
+        headers = {}
+        if page < last:
+            def url(n):
+                return str(request.url.copy_set_param("page", str(n)))
+            headers["Link"] = f'<{url(page + 1)}>; rel="next", <{url(last)}>; rel="last"'
+        return self._respond(request, items[(page - 1) * per_page:page * per_page], headers)
+
+    def _respond(self, request: httpx.Request, body, headers=None) -> httpx.Response:
+        data = json.dumps(body).encode()
+        etag = '"' + hashlib.md5(data).hexdigest() + '"'
+        headers = {
+            "ETag": etag, "X-RateLimit-Limit": "5000", "X-RateLimit-Remaining": "4999",
+            "X-RateLimit-Reset": "9999999999",
+            "X-RateLimit-Resource": "search" if request.url.path.startswith("/search") else "core",
+            **(headers or {}),
+        }
+        if request.headers.get("If-None-Match") == etag:
+            self.not_modified += 1
+            return httpx.Response(304, headers=headers)
+        return httpx.Response(200, content=data, headers={**headers, "Content-Type": "application/json"})
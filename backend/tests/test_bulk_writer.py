@@ -0,0 +1,47 @@
+from datetime import datetime
+
+from app.models import ContributionEvent, Contributor, PullRequest, Repository, Review
+from app.services.bulk_writer import BulkUpserter
+
+
+def _write(db, title, updated_at=None):
+    writer = BulkUpserter(db)
+    pr = {"github_id": 10, "repository_id": 1, "number": 1, "title": title, "state": "open",
+          "created_at": datetime(2024, 1, 1), "author_id": 1}
+    if updated_at is not None:
+        pr["updated_at"] = updated_at
+    writer.add(PullRequest, pr)
+    writer.add(Review, {"github_id": 20, "repository_id": 1, "reviewer_id": 1, "state": "approved",
+                        "submitted_at": datetime(2024, 1, 2)},
+               ref=("pull_request_id", PullRequest, 10))
+    writer.add(ContributionEvent, {"repository_id": 1, "contributor_id": 1, "event_type": "pr_opened",
+                                   "event_at": datetime(2024, 1, 1), "source_id": "10"})
+    writer.flush()
+    db.commit()
+    return writer
+
+
+def test_upserting_the_same_items_again_updates_in_place(db):
+    db.add(Repository(id=1, github_id=1, name="a", owner="o", full_name="o/a", url="u"))
+    db.add(Contributor(id=1, github_id=1001, login="user1"))
+    db.commit()
+
+    _write(db, "first", updated_at=datetime(2024, 1, 3))
+    _write(db, "second")
+
+    assert [(pr.title, pr.updated_at) for pr in db.query(PullRequest)] == [("second", datetime(2024, 1, 3))]
+    review = db.query(Review).one()
+    assert review.pull_request_id == db.query(PullRequest.id).scalar()
+    assert db.query(ContributionEvent).count() == 1
+
+
+def test_insert_one_returns_the_existing_row(db):
+    writer = BulkUpserter(db)
+    row = {"github_id": 1001, "login": "user1"}
+    first = writer.insert_one(Contributor, row)
+    second = writer.insert_one(Contributor, row)
+    db.commit()
+
+    assert first == second
+    assert writer.rows_inserted_one == 1
+    assert db.query(Contributor).count() == 1
@@ -0,0 +1,21 @@
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models import Repository, SyncJob
+
+
+def test_sync_rejects_repository_missing_on_github(github, db):
+    client = TestClient(app)
+    response = client.post("/api/repositories/sync", json={"owner": "o", "name": "missing"})
+    assert response.status_code == 404
+    assert db.query(Repository).count() == 0
+    assert db.query(SyncJob).count() == 0
+
+
+def test_sync_queues_existing_repository(github, db):
+    github.add_repo("o", "a")
+    client = TestClient(app)
+    response = client.post("/api/repositories/sync", json={"owner": "o", "name": "a"})
+    assert response.status_code == 200
+    assert response.json()["sync_status"] == "queued"
+    assert db.query(SyncJob).filter(SyncJob.status == "queued").count() == 1
@@ -0,0 +1,42 @@
+import asyncio
+import time
+
+from app.services.github_client import GitHubClient
+from app.services.rate_limit import get_governor
+from app.services.sync_scheduler import get_request_scheduler
+
+
+def test_rate_limited_request_does_not_hold_a_slot(github):
+    github.add_repo("o", "a")
+
+    async def main():
+        get_request_scheduler().slots = 1
+        # The search budget is spent until just after now; core is untouched.
+        get_governor("test-token")._bucket("search").observe(30, 0, time.time() + 0.2)
+        started = time.perf_counter()
+        search = asyncio.ensure_future(GitHubClient(tenant="o/b").search_issues("repo:o/a is:pr"))
+        await asyncio.sleep(0.05)  # the search is now waiting on the governor
+        await GitHubClient(tenant="o/a").get_repository("o", "a")
+        core_done = time.perf_counter() - started
+        await search
+        return core_done, time.perf_counter() - started
+
+    core_done, search_done = asyncio.run(main())
+    assert search_done >= 1.0
+    assert core_done < 0.5
+
+
+def test_unchanged_resource_is_revalidated_and_served_from_cache(github):
+    github.add_repo("o", "a")
+
+    async def main():
+        client = GitHubClient()
+        first = await client.get_repository("o", "a")
+        second = await client.get_repository("o", "a")
+        return client.stats, first, second
+
+    stats, first, second = asyncio.run(main())
+    assert github.calls["/repos/o/a"] == 2
+    assert github.not_modified == 1
+    assert stats["cache_hits"] == 1
+    assert second == first
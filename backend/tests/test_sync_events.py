@@ -0,0 +1,38 @@
+import asyncio
+
+from app.services.sync_events import EventBus, format_sse
+
+
+def test_reconnect_replays_missed_events():
+    async def main():
+        bus = EventBus()
+        first = bus.subscribe()
+        bus.publish("sync_status", 1, {"sync_status": "queued"})
+        seen = bus.last_id
+        bus.unsubscribe(first)  # the stream closed; the client reconnects
+        bus.publish("sync_status", 1, {"sync_status": "syncing"})
+        bus.publish("data_changed", 2, {"source": "sync"})
+        return bus, seen
+
+    bus, seen = asyncio.run(main())
+    missed = bus.replay(seen)
+    assert [(m["type"], m["repo_id"]) for m in missed] == [("sync_status", 1), ("data_changed", 2)]
+    assert [m["repo_id"] for m in bus.replay(seen, repo_id=2)] == [2]
+    assert bus.replay(bus.last_id) == []
+    assert format_sse(missed[-1]).startswith(f"id: {bus.last_id}\n")
+
+
+def test_reconnect_after_a_gap_needs_resync():
+    async def main():
+        bus = EventBus()
+        subscription = bus.subscribe()
+        bus.publish("sync_status", 1, {"sync_status": "queued"})
+        seen = bus.last_id
+        bus.unsubscribe(subscription)
+        bus._idle_since = float("-inf")  # no stream for longer than the replay window
+        bus.publish("sync_status", 1, {"sync_status": "completed"})
+        return bus, seen
+
+    bus, seen = asyncio.run(main())
+    assert bus.replay(seen) is None
+    assert bus.replay("another-process-1") is None
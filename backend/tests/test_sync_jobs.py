@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+from app.models import Repository, SyncJob
+from app.services.sync_jobs import (
+    claim_next_job, complete_job, enqueue_sync, fail_job, renew_lease,
+)
+
+
+def _expire_lease(db, job_id):
+    db.query(SyncJob).filter(SyncJob.id == job_id).update(
+        {SyncJob.lease_expires_at: datetime.utcnow() - timedelta(seconds=1)}
+    )
+    db.commit()
+
+
+def test_expired_lease_is_reclaimed_by_another_worker(db):
+    enqueue_sync(db, "o", "a")
+    job = claim_next_job(db, "w1")
+    assert (job.status, job.attempts, job.lease_owner) == ("running", 1, "w1")
+    assert claim_next_job(db, "w2") is None  # leased
+
+    _expire_lease(db, job.id)  # w1 died
+    reclaimed = claim_next_job(db, "w2")
+
+    assert (reclaimed.id, reclaimed.attempts, reclaimed.lease_owner) == (job.id, 2, "w2")
+    # The old worker lost the lease: it can neither renew nor record an outcome.
+    assert not renew_lease(db, job.id, "w1")
+    complete_job(db, job.id, "w1")
+    db.expire_all()
+    assert db.query(SyncJob).get(job.id).status == "running"
+
+
+def test_lease_expiring_on_the_final_attempt_fails_the_job(db):
+    enqueue_sync(db, "o", "a")
+    job = claim_next_job(db, "w1")
+    db.query(SyncJob).filter(SyncJob.id == job.id).update({SyncJob.attempts: job.max_attempts})
+    db.commit()
+    _expire_lease(db, job.id)
+
+    assert claim_next_job(db, "w2") is None
+    db.expire_all()
+    job = db.query(SyncJob).get(job.id)
+    assert (job.status, job.last_error) == ("failed", "lease expired (worker lost)")
+    assert db.query(Repository).get(job.repository_id).sync_status == "failed"
+
+
+def test_failed_attempts_back_off_then_fail_for_good(db):
+    enqueue_sync(db, "o", "a")
+    job = claim_next_job(db, "w1")
+    base = datetime.utcnow()
+
+    fail_job(db, job.id, "w1", "boom")
+    db.expire_all()
+    job = db.query(SyncJob).get(job.id)
+    assert (job.status, job.last_error, job.lease_owner) == ("queued", "boom", None)
+    assert job.run_after > base + timedelta(seconds=20)  # 30s base delay, +-25% jitter
+    assert claim_next_job(db, "w1") is None  # not due yet
+
+    for attempt in range(2, job.max_attempts + 1):
+        db.query(SyncJob).filter(SyncJob.id == job.id).update({SyncJob.run_after: datetime.utcnow()})
+        db.commit()
+        job = claim_next_job(db, "w1")
+        assert job.attempts == attempt
+        fail_job(db, job.id, "w1", f"boom {attempt}")
+
+    db.expire_all()
+    job = db.query(SyncJob).get(job.id)
+    assert (job.status, job.attempts, job.last_error) == ("failed", job.max_attempts, f"boom {job.max_attempts}")
+    assert claim_next_job(db, "w1") is None
@@ -0,0 +1,26 @@
+from app.models import Issue, Repository, SyncCheckpoint
+
+
+def test_failed_sync_resumes_from_its_checkpoint(github, sync, db):
+    github.add_repo("o", "a", prs=10, issues=150, commits=5)
+    github.fail["/repos/o/a/issues?page=2"] = 1
+
+    repo_id = sync("o", "a")
+
+    repo = db.query(Repository).get(repo_id)
+    assert repo.sync_status == "failed"
+    checkpoint = db.query(SyncCheckpoint).filter(SyncCheckpoint.phase == "issues").one()
+    assert (checkpoint.page, checkpoint.done) == (1, False)
+    assert checkpoint.cursor.endswith("page=2")
+    first_page_issue = db.query(Issue).order_by(Issue.updated_at.desc()).first().number
+
+    sync("o", "a")
+
+    db.expire_all()
+    assert db.query(Repository).get(repo_id).sync_status == "completed"
+    assert db.query(Issue).filter(Issue.repository_id == repo_id).count() == 150
+    assert db.query(SyncCheckpoint).count() == 0
+    # Neither the first page nor its items' children were fetched again.
+    assert github.pages["/repos/o/a/issues", 1] == 1
+    assert github.pages["/repos/o/a/pulls", 1] == 1
+    assert github.calls[f"/repos/o/a/issues/{first_page_issue}/labels"] == 1
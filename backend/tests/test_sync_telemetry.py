@@ -0,0 +1,41 @@
+from app.services import sync_telemetry
+from app.services.sync_telemetry import SyncRunRecorder
+
+
+class _Client:
+    stats = {"requests": 0, "cache_hits": 0, "bytes_received": 0,
+             "request_seconds": 0.0, "rate_limit_wait": 0.0}
+
+
+class _Writer:
+    write_seconds = 0.0
+    rows_written = 0
+    rows_inserted_one = 0
+
+
+def test_failing_counters_do_not_abort_the_sync(db, monkeypatch):
+    def broken(db, repo_id):
+        raise RuntimeError("no such table")
+    monkeypatch.setattr(sync_telemetry, "stored_rows", broken)
+
+    recorder = SyncRunRecorder(db, 1, _Client(), _Writer(), init_started=0.0)
+    recorder.phase("prs")
+    assert recorder.finish("completed") is None
+
+
+def test_phase_peak_includes_the_process_peak_reached_during_it(db, monkeypatch):
+    rss = {"current": 100, "peak": 150}
+    monkeypatch.setattr(sync_telemetry, "current_rss_bytes", lambda: rss["current"])
+    monkeypatch.setattr(sync_telemetry, "peak_rss_bytes", lambda: rss["peak"])
+
+    recorder = SyncRunRecorder(db, 1, _Client(), _Writer())
+    recorder.phase("prs")
+    rss["peak"] = 400  # a spike between samples
+    recorder.phase("issues")
+    recorder.phase("commits")
+    rss["current"] = 120
+    recorder.phase("finalize")
+
+    assert recorder.phases["prs"]["peak_rss_bytes"] == 400
+    assert recorder.phases["issues"]["peak_rss_bytes"] == 100
+    assert recorder.phases["commits"]["peak_rss_bytes"] == 120
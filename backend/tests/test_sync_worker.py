@@ -0,0 +1,81 @@
+import asyncio
+
+from app.database import SessionLocal
+from app.models import PullRequest, Repository, SyncJob
+from app.services.data_collector import DataCollector
+from app.services.sync_jobs import enqueue_sync
+from app.worker import SyncWorker
+
+
+def run_worker(concurrency: int = 2, timeout: float = 60.0) -> None:
+    """Run a SyncWorker until no job is queued or running."""
+    async def main():
+        worker = SyncWorker(concurrency=concurrency, poll_seconds=0.05)
+        runner = asyncio.create_task(worker.run())
+        deadline = asyncio.get_running_loop().time() + timeout
+        try:
+            while asyncio.get_running_loop().time() < deadline:
+                await asyncio.sleep(0.1)
+                with SessionLocal() as db:
+                    active = db.query(SyncJob).filter(SyncJob.status.in_(("queued", "running"))).count()
+                if not active:
+                    return
+            raise AssertionError("sync jobs still active at the deadline")
+        finally:
+            await worker.stop()
+            runner.cancel()
+            await asyncio.gather(runner, return_exceptions=True)
+    asyncio.run(main())
+
+
+def test_concurrent_syncs_both_complete(github, db):
+    github.latency = 0.005
+    github.add_repo("o", "a", prs=60, issues=40, commits=20)
+    github.add_repo("o", "b", prs=60, issues=40, commits=20)
+    enqueue_sync(db, "o", "a")
+    enqueue_sync(db, "o", "b")
+    db.commit()
+
+    run_worker(concurrency=2)
+
+    db.expire_all()
+    jobs = db.query(SyncJob).all()
+    assert [(j.name, j.status, j.attempts) for j in sorted(jobs, key=lambda j: j.name)] == [
+        ("a", "succeeded", 1), ("b", "succeeded", 1),
+    ]
+    for repo in db.query(Repository).all():
+        assert repo.sync_status == "completed"
+        assert db.query(PullRequest).filter(PullRequest.repository_id == repo.id).count() == 60
+
+
+def test_concurrent_first_syncs_create_their_repositories(github):
+    # No placeholders: init_sync inserts each repository row itself.
+    github.latency = 0.005
+    github.add_repo("o", "a", prs=40, issues=20, commits=10)
+    github.add_repo("o", "b", prs=40, issues=20, commits=10)
+
+    async def sync(name):
+        with SessionLocal() as session:
+            collector = DataCollector(session)
+            repo = await collector.init_sync("o", name)
+            await collector.execute_sync(repo.id, "o", name)
+
+    async def main():
+        await asyncio.gather(sync("a"), sync("b"))
+    asyncio.run(main())
+
+    with SessionLocal() as session:
+        repos = session.query(Repository).order_by(Repository.name).all()
+        assert [(r.name, r.sync_status) for r in repos] == [("a", "completed"), ("b", "completed")]
+
+
+def test_missing_repository_fails_without_retries(github, db):
+    # Queued before the repository vanished (or by a caller that skipped the check).
+    enqueue_sync(db, "o", "gone")
+
+    run_worker(concurrency=1)
+
+    assert github.calls["/repos/o/gone"] == 1
+    db.expire_all()
+    assert db.query(Repository).count() == 0
+    assert db.query(SyncJob).count() == 0
@@ -0,0 +1,67 @@
+import hashlib
+import hmac
+import json
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.models import PullRequest, Review
+from app.services import webhooks
+from app.services.webhooks import WebhookDelivery, apply_deliveries, get_webhook_applier, verify_signature
+from fake_github import iso
+
+
+def sign(secret: str, body: bytes) -> str:
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def test_verify_signature():
+    body = b'{"zen": "Keep it logically awesome."}'
+    assert verify_signature("test-secret", body, sign("test-secret", body))
+    assert not verify_signature("test-secret", body, sign("other-secret", body))
+    assert not verify_signature("test-secret", body + b" ", sign("test-secret", body))
+    assert not verify_signature("test-secret", body, None)
+    assert not verify_signature("test-secret", body, sign("test-secret", body)[len("sha256="):])
+    assert not verify_signature("", body, sign("", body))
+
+
+def test_unsigned_or_forged_deliveries_are_rejected(monkeypatch):
+    monkeypatch.setattr(webhooks, "_applier", None)
+    body = json.dumps({"action": "opened", "repository": {"id": 1}}).encode()
+    client = TestClient(app)
+
+    def post(signature):
+        headers = {"X-GitHub-Event": "issues", "Content-Type": "application/json"}
+        if signature:
+            headers["X-Hub-Signature-256"] = signature
+        return client.post("/api/webhooks/github", content=body, headers=headers)
+
+    assert post(None).status_code == 401
+    assert post(sign("wrong-secret", body)).status_code == 401
+    assert get_webhook_applier().stats()["received"] == 0
+    assert post(sign("test-secret", body)).status_code == 202
+    assert get_webhook_applier().stats()["received"] == 1
+
+
+def test_webhook_pr_is_backfilled_by_the_next_sync(github, sync, db):
+    repo = github.add_repo("o", "a", prs=6)
+    # PR 5 has two reviews; it is opened only after the first sync.
+    pr = next(p for p in repo.prs if p["number"] == 5)
+    repo.prs.remove(pr)
+    repo_id = sync("o", "a")
+
+    pr["updated_at"] = iso(datetime.utcnow())
+    repo.prs.insert(0, pr)
+    payload = {"action": "opened", "pull_request": pr, "repository": {"id": repo.github_id}}
+    assert apply_deliveries(db, [WebhookDelivery("pull_request", "d1", payload)])["applied"] == 1
+    stored = db.query(PullRequest).filter(PullRequest.github_id == pr["id"]).one()
+    assert stored.updated_at is None
+
+    sync("o", "a")
+
+    db.expire_all()
+    stored = db.query(PullRequest).filter(PullRequest.github_id == pr["id"]).one()
+    assert stored.repository_id == repo_id
+    assert db.query(Review).filter(Review.pull_request_id == stored.id).count() == 2
+    assert stored.reviews_count == 2
@@ -95,7 +95,7 @@ const TopHeader = () => {
                         const pct = indeterminate ? 0 : Math.min(99, Math.max(0, rawPct));
 
                         const stageLabel = selectedRepo.sync_status === 'queued'
-                            ? 'Queued...'
+                            ? (selectedRepo.queue_position ? `Queued #${selectedRepo.queue_position}` : 'Queued...')
                             : indeterminate
                                 ? 'Preparing...'
                                 : `Linking ${Math.min(current, total)}/${total}`;
@@ -120,6 +120,10 @@ const TopHeader = () => {
                                 </div>
                                 <div className="text-[10px] text-muted-foreground text-right">
                                     {(() => {
+                                        const eta = selectedRepo.sync_eta_seconds;
+                                        if (selectedRepo.sync_status === 'queued' && eta != null) {
+                                            return eta < 60 ? `Done in ~${Math.ceil(eta)}s` : `Done in ~${Math.ceil(eta / 60)}m`;
+                                        }
                                         if (indeterminate) return "Calculating...";
                                         const syncStart = parseBackendDate(selectedRepo.last_synced_at);
                                         const elapsed = (Date.now() - (syncStart ? syncStart.getTime() : Date.now())) / 1000; // seconds
@@ -4,6 +4,9 @@ import { parseBackendDate } from '@/lib/utils';
 
 const RepoContext = createContext();
 
+// Repository columns carried by sync_status / sync_progress events.
+const SYNC_FIELDS = ['sync_status', 'sync_phase', 'sync_page', 'sync_item_count', 'sync_total_items'];
+
 export const useRepo = () => useContext(RepoContext);
 
 export const RepoProvider = ({ children }) => {
@@ -12,6 +15,14 @@ export const RepoProvider = ({ children }) => {
     const [loading, setLoading] = useState(false);
     const [syncing, setSyncing] = useState(false);
     const [lastSynced, setLastSynced] = useState(null);
+    // True while the /events stream is connected; polling is the fallback.
+    const [live, setLive] = useState(false);
+    // repo id -> counter bumped on every data_changed event for that repo.
+    const [dataVersions, setDataVersions] = useState({});
+    // Bumped when the stream reports missed events: every view reloads.
+    const [resyncs, setResyncs] = useState(0);
+    // Bumped by the fallback poll while a sync runs without the stream.
+    const [pollVersion, setPollVersion] = useState(0);
 
     // Keep latest repos accessible inside interval callbacks without re-creating them.
     const reposRef = useRef(repos);
@@ -63,19 +74,60 @@ export const RepoProvider = ({ children }) => {
         fetchRepos();
     }, [fetchRepos]);
 
-    // Global sync polling: runs whenever ANY repo is syncing/queued, and keeps
-    // running across page navigation because this provider sits above the router.
+    // Live updates: sync progress is merged into the repos list as it is
+    // pushed, and pages refetch their data only on data_changed.
+    useEffect(() => {
+        if (typeof EventSource === 'undefined') return;
+        const source = repoService.openEventStream();
+
+        const mergeState = (e) => {
+            const event = JSON.parse(e.data);
+            if (!reposRef.current.some(r => r.id === event.repo_id)) {
+                fetchRepos(true); // a repo this client hasn't loaded yet
+                return event;
+            }
+            const fields = {};
+            SYNC_FIELDS.forEach(key => { if (key in event) fields[key] = event[key]; });
+            setRepos(prev => prev.map(r => (r.id === event.repo_id ? { ...r, ...fields } : r)));
+            return event;
+        };
+
+        // The browser reconnects on its own, sending Last-Event-ID; the
+        // server replays what was missed or sends `resync` if it can't.
+        source.onopen = () => setLive(true);
+        source.onerror = () => setLive(false);
+        source.addEventListener('resync', () => {
+            fetchRepos(true);
+            setResyncs(n => n + 1);
+        });
+        source.addEventListener('sync_progress', mergeState);
+        source.addEventListener('sync_status', (e) => {
+            const { sync_status } = mergeState(e);
+            // Completion also moves last_synced_at / open counts.
+            if (sync_status === 'completed' || sync_status === 'failed') fetchRepos(true);
+        });
+        source.addEventListener('data_changed', (e) => {
+            const { repo_id } = JSON.parse(e.data);
+            setDataVersions(prev => ({ ...prev, [repo_id]: (prev[repo_id] || 0) + 1 }));
+        });
+        return () => source.close();
+    }, [fetchRepos]);
+
+    // Fallback sync polling while the event stream is down: runs whenever ANY
+    // repo is syncing/queued, and keeps running across page navigation because
+    // this provider sits above the router.
     const anySyncing = repos.some(
         r => r.sync_status === 'syncing' || r.sync_status === 'queued'
     );
 
     useEffect(() => {
-        if (!anySyncing) return;
+        if (!anySyncing || live) return;
         const interval = setInterval(() => {
             fetchRepos(true); // silent poll
+            setPollVersion(n => n + 1);
         }, 2000);
         return () => clearInterval(interval);
-    }, [anySyncing, fetchRepos]);
+    }, [anySyncing, live, fetchRepos]);
 
     const syncRepo = async (owner, name) => {
         try {
@@ -110,6 +162,13 @@ export const RepoProvider = ({ children }) => {
             syncRepo,
             selectRepo,
             refreshRepos: fetchRepos,
+            live,
+            // Changes whenever the selected repo's data changes; pages use
+            // it as an effect dependency to refetch.
+            dataVersion: (dataVersions[selectedRepoId] || 0) + resyncs,
+            // Ticks every fallback poll while a sync runs and the stream is
+            // down; pages without their own polling refetch on it.
+            pollVersion,
         }}>
             {children}
         </RepoContext.Provider>
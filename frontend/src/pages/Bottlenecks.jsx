@@ -5,7 +5,7 @@ import { formatDuration } from '@/lib/utils';
 import { Loader2, Clock, AlertTriangle, AlertCircle, GitPullRequest, ArrowRight, Info, CheckCircle2, MessageSquare, X, Sparkles } from 'lucide-react';
 
 const Bottlenecks = () => {
-    const { selectedRepo } = useRepo();
+    const { selectedRepo, dataVersion, pollVersion } = useRepo();
     const [data, setData] = useState(null);
     const [loading, setLoading] = useState(false);
     const [error, setError] = useState(null);
@@ -31,7 +31,7 @@ const Bottlenecks = () => {
             }
         };
         fetchData();
-    }, [selectedRepo]);
+    }, [selectedRepo?.id, dataVersion, pollVersion]);
 
     const handleDraftNudge = async (pr) => {
         setSelectedPR(pr);
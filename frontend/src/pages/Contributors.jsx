@@ -1,4 +1,4 @@
-import React, { useEffect, useState, useMemo } from 'react';
+import React, { useEffect, useState, useMemo, useRef } from 'react';
 import { useRepo } from '@/context/RepoContext';
 import { repoService } from '@/services/api';
 import { formatDuration } from '@/lib/utils';
@@ -37,7 +37,7 @@ const EVENT_LABELS = {
 };
 
 const Contributors = () => {
-    const { selectedRepo } = useRepo();
+    const { selectedRepo, live, dataVersion } = useRepo();
     const [data, setData] = useState(null);
     const [timeline, setTimeline] = useState(null);
     const [leaderboard, setLeaderboard] = useState(null);
@@ -53,6 +53,7 @@ const Contributors = () => {
     const [hiddenSeries, setHiddenSeries] = useState({}); // { [seriesKey]: true }
 
     const isSyncing = selectedRepo && (selectedRepo.sync_status === 'syncing' || selectedRepo.sync_status === 'queued');
+    const refreshRef = useRef(null);
 
     useEffect(() => {
         if (!selectedRepo) return;
@@ -93,15 +94,27 @@ const Contributors = () => {
             }
         };
 
-        // Initial full fetch.
+        // Initial full fetch; later refreshes are silent (health-only while
+        // syncing, to fill in partial data).
         fetchAll(false, false);
-        // Refresh quickly while syncing (health-only poll to fill in partial data),
-        // otherwise poll the full analytics set every 5 min.
-        const refreshMs = isSyncing ? 5000 : 5 * 60 * 1000;
-        const interval = setInterval(() => fetchAll(true, isSyncing), refreshMs);
-        return () => { cancelled = true; clearInterval(interval); };
+        refreshRef.current = () => fetchAll(true, isSyncing);
+        return () => { cancelled = true; refreshRef.current = null; };
     }, [selectedRepo?.id, selectedRepo?.sync_status, isSyncing]);
 
+    // Refresh when the event stream reports new data for this repo.
+    useEffect(() => {
+        if (dataVersion) refreshRef.current?.();
+    }, [dataVersion]);
+
+    // Without the event stream, poll: quickly while syncing, otherwise
+    // every 5 min.
+    useEffect(() => {
+        if (live) return;
+        const refreshMs = isSyncing ? 5000 : 5 * 60 * 1000;
+        const interval = setInterval(() => refreshRef.current?.(), refreshMs);
+        return () => clearInterval(interval);
+    }, [live, isSyncing]);
+
     const toggleSeries = (key) => setHiddenSeries(prev => ({ ...prev, [key]: !prev[key] }));
 
     // Build the series list + chart rows for the active grouping mode.
@@ -1,4 +1,4 @@
-import React, { useEffect, useState, useMemo } from 'react';
+import React, { useEffect, useState, useMemo, useRef } from 'react';
 import { useRepo } from '@/context/RepoContext';
 import { repoService } from '@/services/api';
 import { formatDuration } from '@/lib/utils';
@@ -23,7 +23,7 @@ const CATEGORY_COLORS = {
 };
 
 const IssuesHealth = () => {
-    const { selectedRepo } = useRepo();
+    const { selectedRepo, live, dataVersion } = useRepo();
     const [data, setData] = useState(null);
     const [triageLoad, setTriageLoad] = useState(null);
     const [workloadBalance, setWorkloadBalance] = useState(null);
@@ -36,6 +36,7 @@ const IssuesHealth = () => {
     const [selectedZombies, setSelectedZombies] = useState(new Set());
 
     const isSyncing = selectedRepo && (selectedRepo.sync_status === 'syncing' || selectedRepo.sync_status === 'queued');
+    const refreshRef = useRef(null);
 
     useEffect(() => {
         if (!selectedRepo) return;
@@ -77,11 +78,24 @@ const IssuesHealth = () => {
         };
 
         fetchAll();
-        const refreshMs = isSyncing ? 5000 : 5 * 60 * 1000;
-        const interval = setInterval(() => fetchAll(true), refreshMs);
-        return () => { cancelled = true; clearInterval(interval); };
+        refreshRef.current = () => fetchAll(true);
+        return () => { cancelled = true; refreshRef.current = null; };
     }, [selectedRepo?.id, selectedRepo?.sync_status, isSyncing]);
 
+    // Refresh when the event stream reports new data for this repo.
+    useEffect(() => {
+        if (dataVersion) refreshRef.current?.();
+    }, [dataVersion]);
+
+    // Without the event stream, poll: quickly while syncing, otherwise
+    // every 5 min.
+    useEffect(() => {
+        if (live) return;
+        const refreshMs = isSyncing ? 5000 : 5 * 60 * 1000;
+        const interval = setInterval(() => refreshRef.current?.(), refreshMs);
+        return () => clearInterval(interval);
+    }, [live, isSyncing]);
+
     // Pie chart data for category breakdown
     const categoryPieData = useMemo(() => {
         if (!categoryBreakdown) return [];
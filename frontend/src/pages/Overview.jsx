@@ -11,7 +11,7 @@ import {
 } from 'recharts';
 
 const Overview = () => {
-    const { selectedRepo } = useRepo();
+    const { selectedRepo, dataVersion, pollVersion } = useRepo();
     const [data, setData] = useState(null);
     const [loading, setLoading] = useState(false);
     const [error, setError] = useState(null);
@@ -37,7 +37,7 @@ const Overview = () => {
         };
 
         fetchData();
-    }, [selectedRepo]);
+    }, [selectedRepo?.id, dataVersion, pollVersion]);
 
     useGSAP(() => {
         if (!data) return;
@@ -5,7 +5,7 @@ import { formatDuration } from '@/lib/utils';
 import { Loader2, AlertTriangle, Clock, List, AlertCircle, CheckCircle2, Info } from 'lucide-react';
 
 const PRBottlenecks = () => {
-    const { selectedRepo } = useRepo();
+    const { selectedRepo, dataVersion, pollVersion } = useRepo();
     const [data, setData] = useState(null);
     const [loading, setLoading] = useState(false);
     const [error, setError] = useState(null);
@@ -28,7 +28,7 @@ const PRBottlenecks = () => {
             }
         };
         fetchData();
-    }, [selectedRepo]);
+    }, [selectedRepo?.id, dataVersion, pollVersion]);
 
     if (!selectedRepo) return <div className="flex justify-center items-center h-[50vh] text-muted-foreground">Select a repository first.</div>;
     if (loading && !data) return <div className="flex justify-center items-center h-[50vh] gap-3 text-muted-foreground"><Loader2 className="animate-spin" /> Loading bottlenecks analysis...</div>;
@@ -52,7 +52,7 @@ const exportCSV = (rows, repoName) => {
 
 // ── Main Page ─────────────────────────────────────────────────────────────────
 const PRReviewHealth = () => {
-    const { selectedRepo } = useRepo();
+    const { selectedRepo, dataVersion, pollVersion } = useRepo();
     const [data, setData] = useState(null);
     const [loading, setLoading] = useState(false);
     const [error, setError] = useState(null);
@@ -83,7 +83,7 @@ const PRReviewHealth = () => {
         } finally {
             setLoading(false);
         }
-    }, [selectedRepo, days]);
+    }, [selectedRepo?.id, selectedRepo?.owner, selectedRepo?.name, days, dataVersion, pollVersion]);
 
     useEffect(() => {
         fetchData();
@@ -42,6 +42,9 @@ export const repoService = {
         return response.data;
     },
 
+    // Server-sent events: sync_status / sync_progress / data_changed.
+    openEventStream: () => new EventSource(`${API_URL}/events`),
+
     getActivityTimeline: async (id, days = 365) => {
         const response = await api.get(`/repositories/${id}/activity-timeline?days=${days}`);
         return response.data;